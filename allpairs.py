@@ -0,0 +1,256 @@
+"""
+CSC111 Project: allpairs.py
+
+Module Description
+==================
+
+Module for computing the shortest travel times and paths between many pairs of vertices of a
+graph at once, used when routing through waypoints.
+
+    - DenseAllPairs: the Floyd-Warshall algorithm in min-plus form on a dense float32 matrix of
+      travel times, where every step updates the whole matrix with one numpy broadcast, along with
+      a matrix of next hops to rebuild the paths. It takes n steps of n * n work for n vertices,
+      but each step runs in numpy instead of python, so for the small graphs of most time slices
+      it beats running Dijkstra's algorithm from every vertex.
+    - SparseAllPairs: Dijkstra's algorithm from every source, each run once the first time a path
+      from it is asked for, which is the better choice for large graphs or few sources.
+
+all_pairs chooses between them from the size of the graph and the number of sources.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Optional
+
+import numpy as np
+
+from graph import Graph
+from pathcalculator import Path, make_path
+
+# the largest number of vertices a graph can have for its dense matrices to be used
+DENSE_LIMIT = 1500
+
+# the dense matrices take about DENSE_STEP_COST * n * n times as long as one search from a source
+# of a graph of n vertices, so they are only used when there are more sources than that
+DENSE_STEP_COST = 0.001
+
+
+class AllPairs:
+    """Interface for the shortest travel times and paths between vertices of a graph"""
+    # Private Instance Attributes:
+    #   - _graph: the graph the paths are in
+    #   - _items: the item of every vertex, which are numbered in this order
+    #   - _index: the number of every vertex item
+    #   - _neighbours: the (number, weight) of every neighbour of each vertex
+
+    _graph: Graph
+    _items: list
+    _index: dict[Any, int]
+    _neighbours: list[list[tuple[int, float]]]
+
+    def __init__(self, g: Graph) -> None:
+        self._graph = g
+        self._items = sorted(g.get_all_vertices(), key=str)
+        self._index = {item: i for i, item in enumerate(self._items)}
+        self._neighbours = [[(self._index[u.item], weight)
+                             for u, weight in g.get_vertex(item).neighbours.items()]
+                            for item in self._items]
+
+    def distance(self, start: Any, end: Any) -> float:
+        """Return the smallest cumulative weight from start to end, which is infinite if end
+        cannot be reached from start.
+        Raise a ValueError if start or end is not a vertex item of the graph.
+        """
+        raise NotImplementedError
+
+    def path(self, start: Any, end: Any) -> Path:
+        """Return the Path containing the smallest cumulative weight from start to end.
+        Raise a ValueError if start or end is not a vertex item of the graph.
+        """
+        items = self._path_items(self._number(start), self._number(end))
+        if items is None:
+            return make_path([], [])
+
+        items = self._graph.expand_path([self._items[i] for i in items])
+        return make_path(items, [self._graph.get_weight(items[i], items[i + 1])
+                                 for i in range(len(items) - 1)])
+
+    def _number(self, item: Any) -> int:
+        """Return the number of the vertex with the given item.
+        Raise a ValueError if there is no such vertex.
+        """
+        if item not in self._index:
+            raise ValueError
+        return self._index[item]
+
+    def _path_items(self, start: int, end: int) -> Optional[list[int]]:
+        """Return the numbers of the vertices along the shortest path from start to end, or None
+        if end cannot be reached from start
+        """
+        raise NotImplementedError
+
+
+class DenseAllPairs(AllPairs):
+    """The shortest paths between every pair of vertices of a graph, in dense matrices
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 1)
+    >>> g.add_edge('A', 'C', 10, 5)
+    >>> pairs = DenseAllPairs(g)
+    >>> round(pairs.distance('A', 'C'), 4)
+    0.2
+    >>> list(pairs.path('C', 'A'))
+    ['C', 'B', 'A']
+    >>> pairs.distance('A', 'D'), list(pairs.path('A', 'D'))
+    (inf, [])
+    """
+    # Private Instance Attributes:
+    #   - _distances: the travel time from every vertex (row) to every vertex (column)
+    #   - _next_hops: the number of the vertex after the row's vertex on the shortest path to the
+    #       column's vertex, or -1 if there is no path
+
+    _distances: np.ndarray
+    _next_hops: np.ndarray
+
+    def __init__(self, g: Graph) -> None:
+        super().__init__(g)
+        n = len(self._items)
+        distances = np.full((n, n), np.inf, dtype=np.float32)
+        next_hops = np.full((n, n), -1, dtype=np.int32)
+        for v, neighbours in enumerate(self._neighbours):
+            for u, weight in neighbours:
+                distances[v, u] = weight
+                next_hops[v, u] = u
+        np.fill_diagonal(distances, 0)
+        np.fill_diagonal(next_hops, np.arange(n, dtype=np.int32))
+
+        through = np.empty_like(distances)
+        shorter = np.empty((n, n), dtype=bool)
+        for k in range(n):
+            # the paths from every vertex to every other vertex that go through k
+            np.add(distances[:, k, None], distances[None, k, :], out=through)
+            np.less(through, distances, out=shorter)
+            np.copyto(distances, through, where=shorter)
+            np.copyto(next_hops, next_hops[:, k, None], where=shorter)
+
+        self._distances = distances
+        self._next_hops = next_hops
+
+    def distance(self, start: Any, end: Any) -> float:
+        """Return the smallest cumulative weight from start to end, which is infinite if end
+        cannot be reached from start.
+        Raise a ValueError if start or end is not a vertex item of the graph.
+        """
+        return float(self._distances[self._number(start), self._number(end)])
+
+    def _path_items(self, start: int, end: int) -> Optional[list[int]]:
+        if self._next_hops[start, end] == -1:
+            return None
+
+        items = [start]
+        while items[-1] != end:
+            items.append(int(self._next_hops[items[-1], end]))
+        return items
+
+
+class SparseAllPairs(AllPairs):
+    """The shortest paths from sources of a graph, each found by Dijkstra's algorithm the first
+    time it is needed
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 1)
+    >>> g.add_edge('A', 'C', 10, 5)
+    >>> pairs = SparseAllPairs(g)
+    >>> round(pairs.distance('A', 'C'), 4)
+    0.2
+    >>> list(pairs.path('C', 'A'))
+    ['C', 'B', 'A']
+    >>> pairs.distance('A', 'D'), list(pairs.path('A', 'D'))
+    (inf, [])
+    """
+    # Private Instance Attributes:
+    #   - _trees: the distance to, and the number of the vertex before, every vertex reached from
+    #       each source searched from so far
+
+    _trees: dict[int, tuple[dict[int, float], dict[int, int]]]
+
+    def __init__(self, g: Graph) -> None:
+        super().__init__(g)
+        self._trees = {}
+
+    def distance(self, start: Any, end: Any) -> float:
+        """Return the smallest cumulative weight from start to end, which is infinite if end
+        cannot be reached from start.
+        Raise a ValueError if start or end is not a vertex item of the graph.
+        """
+        distances, _ = self._tree(self._number(start))
+        return distances.get(self._number(end), float('inf'))
+
+    def _path_items(self, start: int, end: int) -> Optional[list[int]]:
+        _, previous = self._tree(start)
+        if end not in previous:
+            return None
+
+        items = [end]
+        while items[-1] != start:
+            items.append(previous[items[-1]])
+        items.reverse()
+        return items
+
+    def _tree(self, source: int) -> tuple[dict[int, float], dict[int, int]]:
+        """Return the shortest path tree from source, searching for it if it is not known yet"""
+        if source not in self._trees:
+            distances, previous = {}, {source: source}
+            best = {source: 0.0}
+            heap = [(0.0, source)]
+            while heap != []:
+                distance, v = heapq.heappop(heap)
+                if v in distances:
+                    continue
+                distances[v] = distance
+                for u, weight in self._neighbours[v]:
+                    if u not in distances and distance + weight < best.get(u, float('inf')):
+                        best[u] = distance + weight
+                        previous[u] = v
+                        heapq.heappush(heap, (distance + weight, u))
+            self._trees[source] = (distances, previous)
+
+        return self._trees[source]
+
+
+def all_pairs(g: Graph, sources: Optional[int] = None) -> AllPairs:
+    """Return the shortest paths of g from sources different vertices (every vertex if sources is
+    None), in dense matrices if g is small enough for them to be faster and otherwise searched
+    from each source when needed
+    """
+    n = len(g.get_all_vertices())
+    if sources is None:
+        sources = n
+    if n <= DENSE_LIMIT and sources >= n * n * DENSE_STEP_COST:
+        return DenseAllPairs(g)
+    else:
+        return SparseAllPairs(g)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['heapq', 'numpy', 'graph', 'pathcalculator'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -0,0 +1,257 @@
+"""CSC111 Project: benchmarks.py
+
+Module Description
+==================
+
+Benchmarks used to keep track of the performance of the project.
+
+    - python benchmarks.py imports
+        Measures how long importing the headless routing modules takes using python -X importtime.
+    - python benchmarks.py contraction
+        Measures how much contracting the chains of a synthetic street grid (or of the graph of a
+        time slice of the dataset, with --data) shrinks it and speeds up shortest path queries.
+    - python benchmarks.py queues
+        Measures shortest path queries with each kind of priority queue in priorityqueue.QUEUES.
+    - python benchmarks.py overlay
+        Measures how long partitioning a graph once and customizing its overlay take, compared
+        with building a contracted graph, and the speed of queries over the overlay.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import argparse
+import random
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from graph import Graph
+
+HEADLESS_MODULES = ('graph', 'pathcalculator', 'shortest_path_calculator')
+HEADLESS_BUDGET_MS = 100.0
+
+
+def parse_importtime(output: str, modules: tuple) -> dict[str, float]:
+    """Return the cumulative import time in milliseconds of each of the given modules from the
+    stderr output of python -X importtime.
+
+    Only top level imports are counted, so that a module imported by another one of the given
+    modules is not counted twice.
+
+    >>> out = 'import time: self [us] | cumulative | imported package\\n' \\
+    ...       'import time:       100 |        100 |   heapq\\n' \\
+    ...       'import time:       300 |       1500 | graph\\n'
+    >>> parse_importtime(out, ('graph', 'heapq'))
+    {'graph': 1.5}
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        is_top_level = not name[1:].startswith(' ')
+        if is_top_level and name.strip() in modules:
+            times[name.strip()] = int(cumulative) / 1000
+
+    return times
+
+
+def benchmark_imports(modules: tuple = HEADLESS_MODULES, runs: int = 5) -> float:
+    """Return the best (smallest) total time in milliseconds out of runs fresh interpreters to
+    import all of the given modules.
+    """
+    statement = 'import ' + ', '.join(modules)
+    best = float('inf')
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                capture_output=True, text=True, check=True)
+        times = parse_importtime(result.stderr, modules)
+        best = min(best, sum(times.values()))
+
+    return best
+
+
+def count_edges(g: Graph) -> int:
+    """Return the number of edges of g"""
+    return sum(len(g.get_vertex(item).neighbours) for item in g.get_all_vertices()) // 2
+
+
+def benchmark_contraction(g: Graph, queries: int = 200, seed: int = 0) -> dict[str, float]:
+    """Return the sizes of g and of its contraction, the time taken to contract it and the mean
+    time in milliseconds of a shortest path query between random vertices in both.
+    Raise an AssertionError if the two graphs give paths of different weights.
+    """
+    from contraction import ContractedGraph
+    from pathcalculator import dijkstra
+
+    start = time.perf_counter()
+    contracted = ContractedGraph(g)
+    contract_seconds = time.perf_counter() - start
+    results = {'vertices': len(g.get_all_vertices()), 'edges': count_edges(g),
+               'contracted vertices': len(contracted.get_all_vertices()),
+               'contracted edges': count_edges(contracted),
+               'contract ms': contract_seconds * 1000}
+
+    rng = random.Random(seed)
+    items = sorted(g.get_all_vertices(), key=str)
+    pairs = [(rng.choice(items), rng.choice(items)) for _ in range(queries)]
+    weights = {}
+    for name, graph in (('query ms', g), ('contracted query ms', contracted)):
+        start = time.perf_counter()
+        weights[name] = [dijkstra(graph, *pair).get_path_weight() for pair in pairs]
+        results[name] = (time.perf_counter() - start) * 1000 / queries
+
+    assert all(abs(w1 - w2) < 1e-9 for w1, w2 in zip(*weights.values()))
+    return results
+
+
+def benchmark_queues(g: Graph, queries: int = 200, seed: int = 0) -> dict[str, float]:
+    """Return the mean time in milliseconds of a shortest path query between random vertices of g
+    with each kind of priority queue.
+    Raise an AssertionError if the queues give paths of different weights.
+    """
+    from pathcalculator import dijkstra
+    from priorityqueue import QUEUES
+
+    rng = random.Random(seed)
+    items = sorted(g.get_all_vertices(), key=str)
+    pairs = [(rng.choice(items), rng.choice(items)) for _ in range(queries)]
+    results, weights = {}, {}
+    for name in QUEUES:
+        start = time.perf_counter()
+        weights[name] = [dijkstra(g, *pair, queue=name).get_path_weight() for pair in pairs]
+        results[name] = (time.perf_counter() - start) * 1000 / queries
+
+    assert all(max(ws) - min(ws) < 1e-9 for ws in zip(*weights.values()))
+    return results
+
+
+def benchmark_overlay(g: Graph, queries: int = 200, seed: int = 0) -> dict[str, float]:
+    """Return the time in milliseconds taken to partition g, to customize its overlay and to
+    contract g, and the mean time in milliseconds of a shortest path query between random vertices
+    of g and over the overlay.
+    Raise an AssertionError if the overlay gives paths of different weights.
+    """
+    from contraction import ContractedGraph
+    from overlay import Partition, graph_weights
+    from pathcalculator import dijkstra
+
+    results = {}
+    start = time.perf_counter()
+    partition = Partition(g)
+    results['partition ms'] = (time.perf_counter() - start) * 1000
+    weights = graph_weights(g)
+    start = time.perf_counter()
+    overlay = partition.customize(weights)
+    results['customize ms'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    ContractedGraph(g)
+    results['contract ms'] = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(seed)
+    items = sorted(g.get_all_vertices(), key=str)
+    pairs = [(rng.choice(items), rng.choice(items)) for _ in range(queries)]
+    found = {}
+    for name, query in (('query ms', lambda s, e: dijkstra(g, s, e)),
+                        ('overlay query ms', overlay.query)):
+        start = time.perf_counter()
+        found[name] = [query(*pair).get_path_weight() for pair in pairs]
+        results[name] = (time.perf_counter() - start) * 1000 / queries
+
+    assert all(abs(w1 - w2) < 1e-9 for w1, w2 in zip(*found.values()))
+    return results
+
+
+def _benchmark_graph(args: argparse.Namespace) -> Graph:
+    """Return the graph of the time slice of args.data, or a synthetic grid if it is None"""
+    if args.data is None:
+        from syntheticgraph import corridor_grid
+        return corridor_grid(args.size, args.size, args.checkpoints)
+    else:
+        from routingcli import load_slice_graph
+        return load_slice_graph(args.data, args.time, args.day, args.month)
+
+
+def _add_graph_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments choosing the graph a benchmark runs on"""
+    parser.add_argument('--data', help='use the slice of this transformed traffic csv')
+    parser.add_argument('--time', default='17')
+    parser.add_argument('--day', default='4')
+    parser.add_argument('--month', default='3')
+    parser.add_argument('--size', type=int, default=40,
+                        help='the number of rows and columns of the synthetic grid')
+    parser.add_argument('--checkpoints', type=int, default=3,
+                        help='the number of checkpoints along every block of the grid')
+    parser.add_argument('--queries', type=int, default=200)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point for running the benchmarks"""
+    parser = argparse.ArgumentParser(description='Run the project benchmarks.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    imports = subparsers.add_parser('imports', help='time importing the headless modules')
+    imports.add_argument('--runs', type=int, default=5)
+    imports.add_argument('--budget', type=float, default=HEADLESS_BUDGET_MS,
+                         help='fail if the imports take longer than this many milliseconds')
+
+    contraction = subparsers.add_parser('contraction', help='time queries on a contracted graph')
+    _add_graph_arguments(contraction)
+
+    queues = subparsers.add_parser('queues', help='time queries with each priority queue')
+    _add_graph_arguments(queues)
+
+    overlay = subparsers.add_parser('overlay', help='time customizing and querying an overlay')
+    _add_graph_arguments(overlay)
+
+    args = parser.parse_args(argv)
+
+    if args.benchmark == 'imports':
+        total = benchmark_imports(HEADLESS_MODULES, args.runs)
+        print(f'importing {", ".join(HEADLESS_MODULES)}: {total:.1f} ms '
+              f'(budget {args.budget:.0f} ms)')
+        if total > args.budget:
+            sys.exit(1)
+
+    elif args.benchmark == 'contraction':
+        results = benchmark_contraction(_benchmark_graph(args), args.queries)
+        print(f'vertices: {results["vertices"]} -> {results["contracted vertices"]}, '
+              f'edges: {results["edges"]} -> {results["contracted edges"]} '
+              f'(contracted in {results["contract ms"]:.0f} ms)')
+        print(f'mean query: {results["query ms"]:.2f} ms -> '
+              f'{results["contracted query ms"]:.2f} ms '
+              f'({results["query ms"] / results["contracted query ms"]:.1f}x faster)')
+
+    elif args.benchmark == 'queues':
+        results = benchmark_queues(_benchmark_graph(args), args.queries)
+        for name, milliseconds in results.items():
+            print(f'{name}: {milliseconds:.2f} ms per query')
+
+    elif args.benchmark == 'overlay':
+        results = benchmark_overlay(_benchmark_graph(args), args.queries)
+        print(f'partitioned once in {results["partition ms"]:.0f} ms, customized in '
+              f'{results["customize ms"]:.0f} ms (contracted in {results["contract ms"]:.0f} ms)')
+        print(f'mean query: {results["query ms"]:.2f} ms -> '
+              f'{results["overlay query ms"]:.2f} ms over the overlay')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python benchmarks.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'random', 'subprocess', 'sys', 'time', 'graph',
+                              'contraction', 'pathcalculator', 'priorityqueue', 'overlay',
+                              'syntheticgraph', 'routingcli'],
+            'allowed-io': ['main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
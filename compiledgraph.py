@@ -0,0 +1,199 @@
+"""
+CSC111 Project: compiledgraph.py
+
+Module Description
+==================
+
+Module containing the CompiledGraph, a read-only copy of a Graph stored in flat arrays instead of
+vertex objects, in compressed sparse row form: the neighbours of the vertex numbered i are
+targets[offsets[i]:offsets[i + 1]], with the matching edge weights in weights. Vertex items,
+coordinates and connected component labels are stored alongside, so a compiled graph can be
+saved, loaded and turned back into a Graph without the dataset.
+
+Compiled graphs are saved as single numpy .npz files. Saving writes a temporary file next to the
+destination and then renames it, so a reader never sees a partly written file.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Optional
+
+import numpy as np
+
+from graph import Graph
+
+
+class CompiledGraph:
+    """A graph stored in compressed sparse row arrays
+
+    Instance Attributes:
+        - offsets: where the neighbours of each vertex start in targets, with one extra entry at
+            the end holding len(targets)
+        - targets: the numbers of the neighbours of every vertex, one vertex after another
+        - weights: the weight of the edge to each vertex in targets
+        - coordinates: the (latitude, longitude) of each vertex
+        - components: the number of the connected component of each vertex
+
+    >>> g = Graph()
+    >>> g.add_vertex('A', 41.8, -87.6)
+    >>> g.add_vertex('B', 41.9, -87.6)
+    >>> g.add_vertex('C', 41.9, -87.7)
+    >>> g.add_edge('A', 'B', 10, 5)
+    >>> compiled = CompiledGraph.from_graph(g)
+    >>> compiled.get_items()
+    ['A', 'B', 'C']
+    >>> targets, weights = compiled.neighbours(compiled.index_of('A'))
+    >>> targets.tolist(), weights.tolist()
+    ([1], [0.5])
+    >>> compiled.edge_weight(1, 0)
+    0.5
+    >>> compiled.components.tolist()
+    [0, 0, 1]
+    >>> compiled.to_graph().get_weight('B', 'A')
+    0.5
+    """
+    # Private Instance Attributes:
+    #   - _items: the item of each vertex, in the order of its number
+    #   - _index: the number of each vertex item, or None until index_of is first called
+
+    offsets: np.ndarray
+    targets: np.ndarray
+    weights: np.ndarray
+    coordinates: np.ndarray
+    components: np.ndarray
+    _items: list
+    _index: Optional[dict[Any, int]]
+
+    def __init__(self, items: list, offsets: np.ndarray, targets: np.ndarray,
+                 weights: np.ndarray, coordinates: np.ndarray, components: np.ndarray) -> None:
+        """
+        Preconditions:
+            - len(offsets) == len(items) + 1
+            - len(targets) == len(weights) == offsets[-1]
+            - coordinates.shape == (len(items), 2)
+            - len(components) == len(items)
+        """
+        self._items = items
+        self._index = None
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.coordinates = coordinates
+        self.components = components
+
+    @classmethod
+    def from_graph(cls, g: Graph) -> CompiledGraph:
+        """Return the compiled copy of g. Vertices are numbered in the order of their items as
+        strings, so compiling the same graph always gives the same arrays.
+        """
+        items = sorted(g.get_all_vertices(), key=str)
+        index = {item: i for i, item in enumerate(items)}
+
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        targets, weights = [], []
+        for i, item in enumerate(items):
+            neighbours = sorted((index[u.item], weight)
+                                for u, weight in g.get_vertex(item).neighbours.items())
+            targets.extend(target for target, _ in neighbours)
+            weights.extend(weight for _, weight in neighbours)
+            offsets[i + 1] = len(targets)
+
+        coordinates = np.array([g.get_vertex(item).lat_and_long for item in items],
+                               dtype=float).reshape(-1, 2)
+        components = np.array([g.get_component_label(item) for item in items], dtype=np.int64)
+
+        return cls(items, offsets, np.array(targets, dtype=np.int64),
+                   np.array(weights, dtype=float), coordinates, components)
+
+    @classmethod
+    def load(cls, filename: str) -> CompiledGraph:
+        """Return the CompiledGraph saved in filename by save"""
+        with np.load(filename) as saved:
+            return cls(saved['items'].tolist(), saved['offsets'], saved['targets'],
+                       saved['weights'], saved['coordinates'], saved['components'])
+
+    def save(self, filename: str) -> None:
+        """Save this CompiledGraph in filename, replacing it atomically if it already exists.
+        Vertex items are saved as strings.
+        """
+        directory = os.path.dirname(os.path.abspath(filename))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                np.savez(file, items=np.array([str(item) for item in self._items]),
+                         offsets=self.offsets, targets=self.targets, weights=self.weights,
+                         coordinates=self.coordinates, components=self.components)
+            os.replace(temporary, filename)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_items(self) -> list:
+        """Return the item of every vertex, in the order of their numbers"""
+        return self._items
+
+    def index_of(self, item: Any) -> int:
+        """Return the number of the vertex with the given item.
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if self._index is None:
+            self._index = {item: i for i, item in enumerate(self._items)}
+        if item in self._index:
+            return self._index[item]
+        else:
+            raise ValueError
+
+    def neighbours(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the numbers of the neighbours of the vertex numbered i and the weights of the
+        edges to them
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.targets[start:end], self.weights[start:end]
+
+    def edge_weight(self, i: int, j: int) -> float:
+        """Return the weight of the edge from the vertex numbered i to the vertex numbered j.
+        Raise a ValueError if there is no such edge.
+        """
+        targets, weights = self.neighbours(i)
+        # the neighbours of every vertex are stored in increasing order
+        k = int(np.searchsorted(targets, j))
+        if k == len(targets) or targets[k] != j:
+            raise ValueError
+        return float(weights[k])
+
+    def to_graph(self) -> Graph:
+        """Return a Graph with the same vertices and edges as this CompiledGraph"""
+        g = Graph()
+        for item, (latitude, longitude) in zip(self._items, self.coordinates.tolist()):
+            g.add_vertex(item, latitude, longitude)
+
+        targets, weights = self.targets.tolist(), self.weights.tolist()
+        for i, item in enumerate(self._items):
+            for k in range(self.offsets[i], self.offsets[i + 1]):
+                if targets[k] > i:
+                    # a speed of 1 makes the weight of the edge exactly the stored weight
+                    g.add_edge(item, self._items[targets[k]], 1, weights[k])
+
+        return g
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['numpy', 'os', 'tempfile', 'graph'],
+        'allowed-io': ['CompiledGraph.save'],
+        'max-nested-blocks': 5
+    })
@@ -0,0 +1,220 @@
+"""
+CSC111 Project: contraction.py
+
+Module Description
+==================
+
+Module containing the ContractedGraph, a smaller copy of a Graph for routing in which every chain
+of checkpoints with exactly two neighbours (a street corridor without intersections) is replaced
+by a single edge weighted by the total weight of the chain. The left out checkpoints are
+remembered, so:
+    - paths found by pathcalculator are expanded back through every checkpoint they pass,
+    - any checkpoint of the original graph can still be the start or end of a search: the chain
+      holding it is split at it the first time it is used,
+    - coordinates (used by mapping and visualization) are read from the original graph.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from graph import Graph
+
+
+class ContractedGraph(Graph):
+    """A Graph with its chains of vertices of degree two contracted into single edges
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D', 'E', 'F']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> for street1, street2 in [('A', 'B'), ('B', 'C'), ('C', 'D'), ('D', 'E'), ('D', 'F')]:
+    ...     g.add_edge(street1, street2, 10, 1)
+    >>> contracted = ContractedGraph(g)
+    >>> sorted(contracted.get_all_vertices())
+    ['A', 'D', 'E', 'F']
+    >>> round(contracted.get_weight('A', 'D'), 2)
+    0.3
+    >>> contracted.expand_path(['A', 'D', 'E'])
+    ['A', 'B', 'C', 'D', 'E']
+    >>> contracted.prepare_endpoint('B')
+    >>> sorted(contracted.get_all_vertices())
+    ['A', 'B', 'D', 'E', 'F']
+    """
+    # Private Instance Attributes:
+    #   - _original: the graph this graph was contracted from
+    #   - _chains: the items of the left out vertices along the edge between every pair of
+    #       items, in order from the first item of the pair to the second, for each contracted
+    #       edge in both directions
+    #   - _chain_of: the pair of items of the contracted edge each left out item is on
+
+    _original: Graph
+    _chains: dict[tuple[Any, Any], list]
+    _chain_of: dict[Any, tuple[Any, Any]]
+
+    def __init__(self, g: Graph, keep: Iterable = ()) -> None:
+        """Contract g, keeping every vertex whose item is in keep even if it has two neighbours"""
+        super().__init__()
+        self._original = g
+        self._chains = {}
+        self._chain_of = {}
+
+        items = g.get_all_vertices()
+        kept = {item for item in items if len(g.get_vertex(item).neighbours) != 2}
+        kept.update(item for item in keep if item in items)
+        for item in kept:
+            self._add_original_vertex(item)
+
+        # edges between kept vertices are added first, so chains can tell if they would
+        # duplicate one of them
+        for item in kept:
+            for u, weight in g.get_vertex(item).neighbours.items():
+                if u.item in kept:
+                    self._set_weight(item, u.item, weight)
+
+        left_out = set()
+        for item in kept:
+            for u in g.get_vertex(item).neighbours:
+                if u.item not in kept and u.item not in left_out:
+                    chain = self._walk(item, u.item, kept)
+                    left_out.update(chain[1:-1])
+                    self._add_chain(chain)
+
+        # what is left are cycles of vertices that all have two neighbours
+        for item in items:
+            if item not in kept and item not in left_out:
+                kept.add(item)
+                self._add_original_vertex(item)
+                chain = self._walk(item, next(iter(g.get_vertex(item).neighbours)).item, kept)
+                left_out.update(chain[1:-1])
+                self._add_chain(chain)
+
+    def get_original(self) -> Graph:
+        """Return the graph this graph was contracted from"""
+        return self._original
+
+    def check_in(self, user: str) -> bool:
+        """Return whether user is the item of a vertex of the original graph, including the
+        vertices left out of this graph
+        """
+        return super().check_in(user) or user in self._chain_of
+
+    def get_weight(self, item1: Any, item2: Any) -> float:
+        """Return the weight of the edge between item1 and item2 in this graph, or in the
+        original graph if they are not adjacent in this graph
+
+        Preconditions:
+            - item1 and item2 are vertices of the original graph
+        """
+        v1, v2 = self._vertices.get(item1), self._vertices.get(item2)
+        if v1 is not None and v2 in v1.neighbours:
+            return v1.neighbours[v2]
+        else:
+            return self._original.get_weight(item1, item2)
+
+    def get_all_lat_long(self, lst: Any) -> tuple:
+        """Return the latitudes and longitudes of the vertices of the original graph with the
+        items in lst
+        """
+        return self._original.get_all_lat_long(lst)
+
+    def nearest_vertex(self, latitude: float, longitude: float) -> Any:
+        """Return the item of the vertex of the original graph closest to the given location"""
+        return self._original.nearest_vertex(latitude, longitude)
+
+    def nearest_vertices(self, coordinates: Any) -> list:
+        """Return the item of the vertex of the original graph closest to each (latitude,
+        longitude) row of the numpy array coordinates
+        """
+        return self._original.nearest_vertices(coordinates)
+
+    def vertices_within(self, latitude: float, longitude: float, radius: float) -> list:
+        """Return the items of the vertices of the original graph at most radius metres away from
+        the given location
+        """
+        return self._original.vertices_within(latitude, longitude, radius)
+
+    def expand_path(self, items: list) -> list:
+        """Return items with the left out vertices of every contracted edge put back"""
+        expanded = items[:1]
+        for i in range(len(items) - 1):
+            expanded.extend(self._chains.get((items[i], items[i + 1]), ()))
+            expanded.append(items[i + 1])
+        return expanded
+
+    def prepare_endpoint(self, item: Any) -> None:
+        """Put the vertex with the given item back into this graph if it was left out, by
+        splitting the contracted edge it is on in two
+        """
+        if item not in self._chain_of:
+            return
+
+        item1, item2 = self._chain_of[item]
+        chain = [item1] + self._chains.pop((item1, item2)) + [item2]
+        self._chains.pop((item2, item1))
+        for left_out in chain[1:-1]:
+            self._chain_of.pop(left_out)
+
+        v1, v2 = self.get_vertex(item1), self.get_vertex(item2)
+        v1.neighbours.pop(v2)
+        v2.neighbours.pop(v1)
+
+        self._add_original_vertex(item)
+        split = chain.index(item)
+        self._add_chain(chain[:split + 1])
+        self._add_chain(chain[split:])
+
+    def _add_original_vertex(self, item: Any) -> None:
+        """Add the vertex with the given item of the original graph to this graph"""
+        latitude, longitude = self._original.get_vertex(item).lat_and_long
+        self.add_vertex(item, latitude, longitude)
+
+    def _walk(self, start: Any, first: Any, kept: set) -> list:
+        """Return the items of the chain of the original graph starting with the edge from start
+        to first and ending at the next item in kept
+        """
+        chain = [start]
+        previous, current = start, first
+        while current not in kept:
+            chain.append(current)
+            following = next(u.item for u in self._original.get_vertex(current).neighbours
+                             if u.item != previous)
+            previous, current = current, following
+        chain.append(current)
+        return chain
+
+    def _add_chain(self, chain: list) -> None:
+        """Add the chain of items of the original graph as an edge between its ends.
+        When that edge would join an item to itself or duplicate an existing edge, the first
+        left out vertex of the chain is kept instead, and the rest of the chain is added.
+        """
+        while len(chain) > 2 and (chain[0] == chain[-1] or self.adjacent(chain[0], chain[-1])):
+            self._add_original_vertex(chain[1])
+            self._set_weight(chain[0], chain[1], self._original.get_weight(chain[0], chain[1]))
+            chain = chain[1:]
+
+        first, last = chain[0], chain[-1]
+        weight = sum(self._original.get_weight(chain[i], chain[i + 1])
+                     for i in range(len(chain) - 1))
+        self._set_weight(first, last, weight)
+        if len(chain) > 2:
+            self._chains[(first, last)] = chain[1:-1]
+            self._chains[(last, first)] = chain[-2:0:-1]
+            for item in chain[1:-1]:
+                self._chain_of[item] = (first, last)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['graph'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -0,0 +1,204 @@
+"""
+CSC111 Project: csgraphbackend.py
+
+Module Description
+==================
+
+Module for answering many shortest path queries at once with scipy.sparse.csgraph, which runs
+Dijkstra's algorithm in compiled code instead of the python loop of pathcalculator.
+
+A Graph is compiled (see compiledgraph) and handed to scipy as a sparse matrix once, and every
+search from a set of starts is then a single call to scipy.sparse.csgraph.dijkstra. Its
+predecessor arrays are turned back into street names and pathcalculator Paths.
+
+SciPy is optional: when it is not installed, batch_paths and nearest_path fall back to the
+python searches of pathcalculator, which give the same paths.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+
+from compiledgraph import CompiledGraph
+from graph import Graph
+from pathcalculator import Path, batch_dijkstra, make_path, reachable_from_any, snap
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:
+    csr_matrix = None
+    csgraph_dijkstra = None
+
+# the predecessor scipy gives to starts and to vertices that were not reached
+_NO_PREDECESSOR = -9999
+
+
+def scipy_available() -> bool:
+    """Return whether SciPy is installed, so that CSGraphRouter can be used"""
+    return csgraph_dijkstra is not None
+
+
+class CSGraphRouter:
+    """Shortest paths of a graph found by scipy.sparse.csgraph
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 2)
+    >>> g.add_edge('A', 'C', 10, 5)
+    >>> router = CSGraphRouter(g)
+    >>> [list(path) for path in router.batch_dijkstra([('A', 'C'), ('C', 'A'), ('A', 'D')])]
+    [['A', 'B', 'C'], ['C', 'B', 'A'], []]
+    >>> list(router.nearest_path(['A', 'C'], 'B'))
+    ['A', 'B']
+    """
+    # Private Instance Attributes:
+    #   - _graph: the graph the paths are in, or None if the router was given a compiled graph
+    #   - _compiled: the compiled copy of _graph, numbering its vertices
+    #   - _matrix: the sparse matrix of the weights of the edges of _graph
+
+    _graph: Optional[Graph]
+    _compiled: CompiledGraph
+    _matrix: Any
+
+    def __init__(self, g: Union[Graph, CompiledGraph], endpoints: Iterable = ()) -> None:
+        """Compile g for scipy. Every item of endpoints is prepared to be the start or end of a
+        search first (see Graph.prepare_endpoint), since g can no longer change after this.
+        A graph that is already compiled is used as it is, without copying its arrays.
+
+        Preconditions:
+            - scipy_available()
+        """
+        if isinstance(g, CompiledGraph):
+            self._graph = None
+            self._compiled = g
+        else:
+            for item in endpoints:
+                g.prepare_endpoint(item)
+            self._graph = g
+            self._compiled = CompiledGraph.from_graph(g)
+        n = len(self._compiled)
+        # explicit zeros of a sparse matrix are edges to scipy, so zero weights are kept
+        self._matrix = csr_matrix((self._compiled.weights, self._compiled.targets,
+                                   self._compiled.offsets), shape=(n, n))
+
+    def dijkstra(self, start: Any, end: Any) -> Path:
+        """Return the Path containing the smallest cumulative weight from start to end.
+        Raise a ValueError if start or end is not a vertex item of the compiled graph.
+        """
+        return self.batch_dijkstra([(start, end)])[0]
+
+    def batch_dijkstra(self, queries: list[tuple[Any, Any]]) -> list[Path]:
+        """Return the Path with the smallest cumulative weight for every (start, end) query, in
+        the order of queries, from a single search from all of the distinct starts.
+        Raise a ValueError if a start or end is not a vertex item of the compiled graph.
+        """
+        index_of = self._compiled.index_of
+        numbered = [(index_of(start), index_of(end)) for start, end in queries]
+        starts = sorted({start for start, _ in numbered})
+        row_of = {start: row for row, start in enumerate(starts)}
+        if starts == []:
+            return []
+
+        _, predecessors = csgraph_dijkstra(self._matrix, indices=starts,
+                                           return_predecessors=True)
+        return [self._path(predecessors[row_of[start]], start, end) for start, end in numbered]
+
+    def nearest_path(self, starts: list, end: Any) -> Path:
+        """Return the Path with the smallest cumulative weight to end from whichever of starts
+        is closest to it, from a single search from all of starts.
+        Raise a ValueError if a start or end is not a vertex item of the compiled graph.
+        """
+        indices = [self._compiled.index_of(start) for start in starts]
+        target = self._compiled.index_of(end)
+        _, predecessors, sources = csgraph_dijkstra(self._matrix, indices=indices,
+                                                    return_predecessors=True, min_only=True)
+        return self._path(predecessors, int(sources[target]), target)
+
+    def _path(self, predecessors: np.ndarray, start: int, end: int) -> Path:
+        """Return the Path from the vertex numbered start to the vertex numbered end following
+        predecessors back from end, or the Path of no path found if end was not reached
+        """
+        if start < 0 or (start != end and predecessors[end] == _NO_PREDECESSOR):
+            return make_path([], [])
+
+        numbers = [end]
+        while numbers[-1] != start:
+            numbers.append(int(predecessors[numbers[-1]]))
+
+        numbers.reverse()
+        items = self._compiled.get_items()
+        if self._graph is None:
+            return make_path([items[i] for i in numbers],
+                             [self._compiled.edge_weight(numbers[i], numbers[i + 1])
+                              for i in range(len(numbers) - 1)])
+
+        path = self._graph.expand_path([items[i] for i in numbers])
+        return make_path(path, [self._graph.get_weight(path[i], path[i + 1])
+                                for i in range(len(path) - 1)])
+
+
+def batch_paths(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    """Return the Path with the smallest cumulative weight for every (start, end) query, in the
+    order of queries, using scipy if it is installed and pathcalculator.batch_dijkstra otherwise.
+    Locations are snapped as in pathcalculator.dijkstra.
+
+    >>> from syntheticgraph import random_graph
+    >>> g = random_graph(60, 120, seed=4)
+    >>> queries = [(f'V{i}', f'V{(7 * i) % 60}') for i in range(60)]
+    >>> paths, expected = batch_paths(g, queries), batch_dijkstra(g, queries)
+    >>> all(abs(path.get_path_weight() - other.get_path_weight()) < 1e-9
+    ...     for path, other in zip(paths, expected))
+    True
+    """
+    if not scipy_available():
+        return batch_dijkstra(g, queries)
+
+    snapped = [(snap(g, start), snap(g, end)) for start, end in queries]
+    return CSGraphRouter(g).batch_dijkstra(snapped)
+
+
+def nearest_path(g: Graph, starts: list, end: Any) -> Path:
+    """Return the Path with the smallest cumulative weight to end from whichever of starts is
+    closest to it, using scipy if it is installed and a python search otherwise.
+    Locations are snapped as in pathcalculator.dijkstra.
+
+    >>> from syntheticgraph import random_graph
+    >>> g = random_graph(60, 120, seed=4)
+    >>> path = nearest_path(g, ['V3', 'V17', 'V42'], 'V8')
+    >>> reached = reachable_from_any(g, ['V3', 'V17', 'V42'], float('inf'))
+    >>> abs(path.get_path_weight() - reached.times.tolist()[reached.items.index('V8')]) < 1e-9
+    True
+    """
+    starts = [snap(g, start) for start in starts]
+    end = snap(g, end)
+    if scipy_available():
+        return CSGraphRouter(g).nearest_path(starts, end)
+
+    reached = reachable_from_any(g, starts, float('inf'))
+    if end not in reached.items:
+        return make_path([], [])
+    start = starts[int(reached.origins[reached.items.index(end)])]
+    return batch_dijkstra(g, [(start, end)])[0]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['numpy', 'scipy.sparse', 'scipy.sparse.csgraph', 'compiledgraph',
+                          'graph', 'pathcalculator'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -6,59 +6,78 @@ Program that transforms the original dataset according to our project needs.
     - creates tidy data by removing undesired and unavailable speed values
     - creates a new csv file with the desired data
 Contains another computation that finds out the minimum and maximum latitude and longitude values.
+
+Nothing is computed when this module is imported. Run it as a script to transform the dataset:
+
+    python datatransformation.py trafficdata.csv transformed_final.csv
 Copyright and Usage Information
 ===============================
 This file is Copyright (c) 2021 Kaartik Issar, Aryaman Modi,
 Craig Katsube and Garv Sood.
 """
+import argparse
 import csv
 import math
-import pandas as pd
-
-DF = pd.read_csv('trafficdata.csv')
-FD = pd.DataFrame(DF, columns=['time', 'segment_id', 'speed', 'street', 'direction',
-                               'from_street', 'to_street', 'length', 'bus_count',
-                               'hour', 'day_of_week', 'month', 'start_latitude', 'start_longitude',
-                               'end_latitude', 'end_longitude'])
-FD_ONE = FD[FD['speed'] != -1]
-FD_TWO = FD_ONE[FD_ONE['speed'] != 0]
-# saving the dataframe as csv
-FD_TWO.to_csv('transformed_final.csv')
-
-####################################################################################################
-
-# finding out the dimensions of the map of chicago we are going to use.in our visualisation
-
-MAXLONG = -math.inf
-MINLONG = math.inf
-MAXLAT = -math.inf
-MINLAT = math.inf
-with open('transformed_final.csv') as CSV_FILE2:
-    TRAFFIC_DATA = csv.reader(CSV_FILE2)
-    next(TRAFFIC_DATA)  # to skip the first row
-    for ROW in TRAFFIC_DATA:
-        if float(ROW[15]) > MAXLONG:
-            MAXLONG = float(ROW[15])
-        if float(ROW[15]) < MINLONG:
-            MINLONG = float(ROW[15])
-        if float(ROW[14]) > MAXLAT:
-            MAXLAT = float(ROW[14])
-        if float(ROW[14]) < MINLAT:
-            MINLAT = float(ROW[14])
-
-with open('transformed_final.csv') as CSV_FILE2:
-    TRAFFIC_DATA = csv.reader(CSV_FILE2)
-    next(TRAFFIC_DATA)  # to skip the first row
-    for ROW in TRAFFIC_DATA:
-        if float(ROW[15]) > MAXLONG:
-            MAXLONG = float(ROW[17])
-        if float(ROW[15]) < MINLONG:
-            MINLONG = float(ROW[17])
-        if float(ROW[14]) > MAXLAT:
-            MAXLAT = float(ROW[16])
-        if float(ROW[14]) < MINLAT:
-            MINLAT = float(ROW[16])
-END_POINTS = [MAXLONG, MINLONG, MAXLAT, MINLAT]
+from typing import Optional
+
+SOURCE_FILE = 'trafficdata.csv'
+TRANSFORMED_FILE = 'transformed_final.csv'
+
+SELECTED_COLUMNS = ['time', 'segment_id', 'speed', 'street', 'direction',
+                    'from_street', 'to_street', 'length', 'bus_count',
+                    'hour', 'day_of_week', 'month', 'start_latitude', 'start_longitude',
+                    'end_latitude', 'end_longitude']
+
+
+def transform_dataset(source: str = SOURCE_FILE, destination: str = TRANSFORMED_FILE) -> None:
+    """Select the columns we use from source, remove the rows with unavailable (-1) or zero
+    speeds and save the result as a csv at destination.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(source)
+    fd = pd.DataFrame(df, columns=SELECTED_COLUMNS)
+    fd_one = fd[fd['speed'] != -1]
+    fd_two = fd_one[fd_one['speed'] != 0]
+    # saving the dataframe as csv
+    fd_two.to_csv(destination)
+
+
+def compute_end_points(transformed_file: str = TRANSFORMED_FILE) -> list[float]:
+    """Return [max longitude, min longitude, max latitude, min latitude] over both the start and
+    the end coordinates of every row in the transformed dataset.
+
+    These are the dimensions of the map of chicago we use in our visualisation.
+    row[13] and row[14] are the start latitude and longitude, row[15] and row[16] are the end
+    latitude and longitude.
+    """
+    max_long, min_long = -math.inf, math.inf
+    max_lat, min_lat = -math.inf, math.inf
+
+    with open(transformed_file, encoding='utf-8') as csv_file:
+        traffic_data = csv.reader(csv_file)
+        next(traffic_data)  # to skip the first row
+        for row in traffic_data:
+            for lat, long in ((float(row[13]), float(row[14])), (float(row[15]), float(row[16]))):
+                max_long, min_long = max(max_long, long), min(min_long, long)
+                max_lat, min_lat = max(max_lat, lat), min(min_lat, lat)
+
+    return [max_long, min_long, max_lat, min_lat]
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: transform the dataset and print its end points"""
+    parser = argparse.ArgumentParser(description='Transform the raw Chicago traffic dataset.')
+    parser.add_argument('source', nargs='?', default=SOURCE_FILE)
+    parser.add_argument('destination', nargs='?', default=TRANSFORMED_FILE)
+    parser.add_argument('--skip-transform', action='store_true',
+                        help='only compute the end points of an already transformed file')
+    args = parser.parse_args(argv)
+
+    if not args.skip_transform:
+        transform_dataset(args.source, args.destination)
+    print(compute_end_points(args.destination))
+
 
 if __name__ == '__main__':
     import doctest
@@ -68,8 +87,10 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'max-line-length': 100,
         'disable': ['E1136', 'E9971'],
-        'extra-imports': ['heapq', 'graph', 'abc', 'pandas', 'math', 'csv'],
-        'allowed-io': [],
+        'extra-imports': ['argparse', 'pandas', 'math', 'csv'],
+        'allowed-io': ['compute_end_points', 'main'],
         'max-nested-blocks': 5
 
     })
+
+    main()
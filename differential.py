@@ -0,0 +1,376 @@
+"""
+CSC111 Project: differential.py
+
+Module Description
+==================
+
+Differential checking of the routing engines against the reference search,
+pathcalculator.dijkstra with the default priority queue.
+
+    python differential.py --trials 50 --vertices 30 --edges 60 --queries 20
+
+Every trial builds a random graph with syntheticgraph.random_graph and a random set of queries
+(including a query from a vertex to itself and one to a vertex without edges), then runs every
+engine in ENGINES on them. A path found by an engine is wrong if its weight differs from the
+reference by more than the tolerance, if one of the two finds a path and the other does not, or if
+the path does not go from the start to the end along edges of the graph with the weight it claims.
+Engines that only find travel times (like reachable_within) answer with a float, infinite when the
+end is not reached, which is wrong if it differs from the weight of the reference path. Engines
+raising an error are wrong too.
+
+Every wrong query is shrunk to a minimal graph that still makes the engine wrong, by removing
+edges and then vertices one at a time for as long as the engine stays wrong, and printed, so it
+can be turned into a doctest. The program exits with status 1 if any engine was wrong.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from graph import Graph
+from pathcalculator import Path, RouteCache, batch_dijkstra, dijkstra, k_shortest_paths, \
+    make_path, reachable_within
+from priorityqueue import QUEUES
+from syntheticgraph import random_graph
+
+# path weights may differ by this fraction of the reference weight, which leaves room for the
+# float32 matrices of allpairs.DenseAllPairs
+RELATIVE_TOLERANCE = 1e-5
+ABSOLUTE_TOLERANCE = 1e-9
+
+# the cell sizes of the overlay partitions, small enough for the graphs checked to have several
+# levels of cells
+OVERLAY_CELL_SIZES = (4, 16)
+
+# a graph as the (latitude, longitude) of every vertex item and the (item1, item2, weight) of
+# every edge
+Vertices = dict[Any, tuple[float, float]]
+Edges = list[tuple[Any, Any, float]]
+
+# the path, or only the travel time, an engine finds for every query
+Engine = Callable[[Graph, list[tuple[Any, Any]]], list[Union[Path, float]]]
+
+# the number of paths asked of k_shortest_paths, whose first path is checked
+K_PATHS = 3
+
+
+class Failure(NamedTuple):
+    """A query an engine got wrong
+
+    Instance Attributes:
+        - engine: the name of the engine in ENGINES
+        - start: the start of the query
+        - end: the end of the query
+        - reason: what was wrong with the path the engine found
+        - vertices: the vertices of the smallest graph found in which the engine is wrong
+        - edges: the edges of that graph
+    """
+    engine: str
+    start: Any
+    end: Any
+    reason: str
+    vertices: Vertices
+    edges: Edges
+
+
+def _dijkstra_engine(queue: str) -> Engine:
+    return lambda g, queries: [dijkstra(g, start, end, queue=queue) for start, end in queries]
+
+
+def _contracted_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    from contraction import ContractedGraph
+
+    contracted = ContractedGraph(g)
+    return [dijkstra(contracted, start, end) for start, end in queries]
+
+
+def _overlay_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    from overlay import Partition, graph_weights
+
+    overlay = Partition(g, OVERLAY_CELL_SIZES).customize(graph_weights(g))
+    return [overlay.query(start, end) for start, end in queries]
+
+
+def _all_pairs_engine(dense: bool) -> Engine:
+    def engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+        from allpairs import DenseAllPairs, SparseAllPairs
+
+        paths = DenseAllPairs(g) if dense else SparseAllPairs(g)
+        return [paths.path(start, end) for start, end in queries]
+
+    return engine
+
+
+def _route_cache_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    cache = RouteCache(g)
+    # every query is asked twice, so the remembered paths are checked as well
+    for start, end in queries:
+        cache.dijkstra(start, end)
+    paths = [cache.dijkstra(start, end) for start, end in queries]
+    cache.close()
+    return paths
+
+
+def _csgraph_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    from csgraphbackend import CSGraphRouter
+
+    return CSGraphRouter(g).batch_dijkstra(queries)
+
+
+def _k_shortest_paths_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[Path]:
+    paths = []
+    for start, end in queries:
+        found = k_shortest_paths(g, start, end, K_PATHS)
+        weights = [path.get_path_weight() for path in found]
+        if weights != sorted(weights):
+            raise AssertionError('the paths are not in increasing order of weight')
+        paths.append(found[0] if found != [] else make_path([], []))
+    return paths
+
+
+def _reachable_engine(g: Graph, queries: list[tuple[Any, Any]]) -> list[float]:
+    times = []
+    for start, end in queries:
+        reached = reachable_within(g, start, float('inf'))
+        if end not in reached.items:
+            times.append(float('inf'))
+            continue
+
+        time = float(reached.times[reached.items.index(end)])
+        # a budget of exactly the travel time to end reaches it, and a smaller budget does not
+        if end not in reachable_within(g, start, time).items or \
+                (time > 0 and end in reachable_within(g, start, time * (1 - 1e-9)).items):
+            raise AssertionError('the budget does not cut the search off at the right vertices')
+        times.append(time)
+    return times
+
+
+def _engines() -> dict[str, Engine]:
+    """Return every engine that can be run here, by name"""
+    from csgraphbackend import scipy_available
+
+    engines = {'dijkstra ' + queue: _dijkstra_engine(queue) for queue in QUEUES}
+    engines.update({'batch': batch_dijkstra,
+                    'route cache': _route_cache_engine,
+                    'k shortest paths': _k_shortest_paths_engine,
+                    'reachable within': _reachable_engine,
+                    'contracted': _contracted_engine,
+                    'overlay': _overlay_engine,
+                    'all pairs dense': _all_pairs_engine(True),
+                    'all pairs sparse': _all_pairs_engine(False)})
+    if scipy_available():
+        engines['csgraph'] = _csgraph_engine
+    return engines
+
+
+ENGINES = _engines()
+
+
+def graph_of(vertices: Vertices, edges: Edges) -> Graph:
+    """Return the graph with the given vertices and edges
+
+    >>> g = graph_of({'A': (41.8, -87.6), 'B': (41.9, -87.6)}, [('A', 'B', 0.5)])
+    >>> g.get_weight('A', 'B')
+    0.5
+    """
+    g = Graph()
+    for item, (latitude, longitude) in vertices.items():
+        g.add_vertex(item, latitude, longitude)
+    for item1, item2, weight in edges:
+        g.add_edge(item1, item2, 1, weight)
+    return g
+
+
+def parts_of(g: Graph) -> tuple[Vertices, Edges]:
+    """Return the vertices and edges of g, for graph_of"""
+    vertices, edges = {}, []
+    for item in sorted(g.get_all_vertices(), key=str):
+        vertex = g.get_vertex(item)
+        vertices[item] = vertex.lat_and_long
+        edges.extend((item, u.item, weight) for u, weight in vertex.neighbours.items()
+                     if str(item) < str(u.item))
+    return vertices, edges
+
+
+def check(g: Graph, start: Any, end: Any, expected: Path,
+          found: Union[Path, float]) -> Optional[str]:
+    """Return what is wrong with the path (or travel time) found from start to end in g, when
+    expected is the path found by the reference, or None if nothing is
+
+    >>> g = graph_of({'A': (0, 0), 'B': (0, 0), 'C': (0, 0)}, [('A', 'B', 1.0), ('B', 'C', 1.0)])
+    >>> check(g, 'A', 'C', dijkstra(g, 'A', 'C'), dijkstra(g, 'A', 'B'))
+    "ends at 'B'"
+    >>> check(g, 'A', 'C', dijkstra(g, 'A', 'C'), 1.0)
+    'finds a travel time of 1.0 instead of 2.0'
+    """
+    if isinstance(found, float):
+        reference = expected.get_path_weight() if len(expected) > 0 else float('inf')
+        if found == reference or _close(found, reference):
+            return None
+        return f'finds a travel time of {found} instead of {reference}'
+
+    if len(expected) == 0 or len(found) == 0:
+        if len(expected) != len(found):
+            return 'finds no path' if len(found) == 0 else 'finds a path that does not exist'
+        return None
+
+    items = list(found)
+    if items[0] != start:
+        return 'starts at ' + repr(items[0])
+    if items[-1] != end:
+        return 'ends at ' + repr(items[-1])
+    for i in range(len(items) - 1):
+        if not g.adjacent(items[i], items[i + 1]):
+            return f'uses a missing edge from {items[i]!r} to {items[i + 1]!r}'
+
+    weight = sum(g.get_weight(items[i], items[i + 1]) for i in range(len(items) - 1))
+    if not _close(weight, found.get_path_weight()):
+        return f'claims a weight of {found.get_path_weight()} for a path of weight {weight}'
+    if not _close(weight, expected.get_path_weight()):
+        return f'has weight {weight} instead of {expected.get_path_weight()}'
+    return None
+
+
+def find_failures(engine: Engine, vertices: Vertices, edges: Edges,
+                  queries: list[tuple[Any, Any]]) -> list[tuple[Any, Any, str]]:
+    """Return the (start, end, reason) of every query that engine gets wrong in the graph with
+    the given vertices and edges
+    """
+    reference = graph_of(vertices, edges)
+    expected = [dijkstra(reference, start, end) for start, end in queries]
+
+    # engines get their own copy of the graph, since some of them change it
+    g = graph_of(vertices, edges)
+    try:
+        found = engine(g, queries)
+    except Exception as error:  # every error of an engine is a failure of that engine
+        return [(start, end, 'raises ' + repr(error)) for start, end in queries]
+
+    failures = []
+    for (start, end), path, other in zip(queries, found, expected):
+        reason = check(reference, start, end, other, path)
+        if reason is not None:
+            failures.append((start, end, reason))
+    return failures
+
+
+def shrink(engine: Engine, vertices: Vertices, edges: Edges, start: Any,
+           end: Any) -> tuple[Vertices, Edges]:
+    """Return the smallest graph found, by removing edges and then vertices other than start and
+    end one at a time, in which engine still gets the query from start to end wrong
+
+    >>> def engine(g: Graph, queries: list) -> list:  # wrong whenever the edge B-C exists
+    ...     return [dijkstra(g, s, e) if not g.adjacent('B', 'C') else dijkstra(g, s, s)
+    ...             for s, e in queries]
+    >>> vertices = {item: (0, 0) for item in 'ABCD'}
+    >>> edges = [('A', 'B', 1.0), ('B', 'C', 1.0), ('C', 'D', 1.0), ('A', 'D', 5.0)]
+    >>> shrink(engine, vertices, edges, 'A', 'D')
+    ({'A': (0, 0), 'B': (0, 0), 'C': (0, 0), 'D': (0, 0)}, [('B', 'C', 1.0)])
+    """
+    def fails(candidate_vertices: Vertices, candidate_edges: Edges) -> bool:
+        return find_failures(engine, candidate_vertices, candidate_edges, [(start, end)]) != []
+
+    changed = True
+    while changed:
+        changed = False
+        for edge in list(edges):
+            candidate = [other for other in edges if other != edge]
+            if fails(vertices, candidate):
+                edges, changed = candidate, True
+
+        for item in list(vertices):
+            if item in (start, end) or any(item in edge[:2] for edge in edges):
+                continue
+            candidate = {other: location for other, location in vertices.items() if other != item}
+            if fails(candidate, edges):
+                vertices, changed = candidate, True
+
+    return vertices, edges
+
+
+def run_trials(engines: dict[str, Engine], trials: int, vertices: int, edges: int,
+               queries: int, seed: int = 0) -> list[Failure]:
+    """Return the first query every engine gets wrong in each of trials random graphs with the
+    given numbers of vertices and edges and random queries, shrunk to a minimal graph
+
+    >>> run_trials(ENGINES, trials=3, vertices=20, edges=30, queries=10)
+    []
+    """
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(trials):
+        graph_vertices, graph_edges = parts_of(random_graph(vertices, edges,
+                                                            rng.randrange(2 ** 32)))
+        items = list(graph_vertices)
+        trial_queries = [(rng.choice(items), rng.choice(items)) for _ in range(queries)]
+        # a vertex without edges checks queries with no path
+        graph_vertices['isolated'] = graph_vertices[items[0]]
+        trial_queries.extend([(items[0], items[0]), (items[0], 'isolated')])
+
+        for name, engine in engines.items():
+            wrong = find_failures(engine, graph_vertices, graph_edges, trial_queries)
+            if wrong != []:
+                start, end, reason = wrong[0]
+                small_vertices, small_edges = shrink(engine, graph_vertices, graph_edges,
+                                                     start, end)
+                reason = find_failures(engine, small_vertices, small_edges, [(start, end)])[0][2]
+                failures.append(Failure(name, start, end, reason, small_vertices, small_edges))
+
+    return failures
+
+
+def _close(weight1: float, weight2: float) -> bool:
+    return abs(weight1 - weight2) <= max(ABSOLUTE_TOLERANCE,
+                                         RELATIVE_TOLERANCE * max(abs(weight1), abs(weight2)))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: check every engine against the reference on random graphs"""
+    parser = argparse.ArgumentParser(description='Check the routing engines against dijkstra.')
+    parser.add_argument('--trials', type=int, default=50)
+    parser.add_argument('--vertices', type=int, default=30)
+    parser.add_argument('--edges', type=int, default=60)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', action='append', choices=sorted(ENGINES),
+                        help='only check this engine (can be repeated)')
+    args = parser.parse_args(argv)
+
+    engines = {name: ENGINES[name] for name in (args.engine or ENGINES)}
+    failures = run_trials(engines, args.trials, args.vertices, args.edges, args.queries,
+                          args.seed)
+    for failure in failures:
+        print(f'{failure.engine}: the path from {failure.start!r} to {failure.end!r} '
+              f'{failure.reason} in the graph')
+        print(f'    vertices = {failure.vertices!r}')
+        print(f'    edges = {failure.edges!r}')
+
+    print(f'{len(engines)} engines checked on {args.trials} graphs: {len(failures)} failures')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python differential.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'random', 'sys', 'graph', 'pathcalculator',
+                              'priorityqueue', 'syntheticgraph', 'contraction', 'overlay',
+                              'allpairs', 'csgraphbackend'],
+            'allowed-io': ['main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
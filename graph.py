@@ -18,8 +18,15 @@ This file is Copyright (c) 2021 Kaartik Isaar, Aryaman Modi, Craig Katsube and G
 """
 
 from __future__ import annotations
-from typing import Any, Union
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Union
 import csv
+import time
+
+# the weight given to a new observation when it is merged into the weight of an existing edge
+DEFAULT_SMOOTHING = 0.3
+
+# changed edges mapped to their (old weight, new weight), as passed to Graph listeners
+EdgeChanges = dict[tuple[Any, Any], tuple[float, float]]
 
 
 # The following code initialises the Vertex and Graph class, and also defines basic functions
@@ -108,9 +115,8 @@ class _Vertex:
                 u.print_all_connected(visited)
 
     def paths(self, item: Any, visited: set, curr_path: list, paths: list) -> None:
-        """Returns a list of all the paths between self and item. This function works recursively,
-        it works to find a path which ends on the target item and when it find that path it adds it
-        to the list of returned paths.
+        """Adds all the paths between self and item that do not use any item in visited to the
+        list of paths, each preceded by curr_path. The paths are found by iter_paths.
         >>> g = Graph()
         >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
         >>> g.add_vertex("22nd", "11", "13")
@@ -126,20 +132,71 @@ class _Vertex:
         >>> path
         [['Bay Road', '22nd', 'Chicago Square', 'Avenue']]
         """
-
-        visited.add(self.item)
-        curr_path.append(self.item)
+        paths.extend(curr_path + path for path in self.iter_paths(item, excluded=visited))
+
+    def iter_paths(self, item: Any, max_length: Optional[int] = None,
+                   max_weight: Optional[float] = None, max_count: Optional[int] = None,
+                   excluded: Iterable = ()) -> Iterator[list]:
+        """Yield every path (list of items) from self to item, one at a time as they are found,
+        without storing the paths already yielded.
+
+        The search is a depth first search that keeps its own stack instead of recursing, so
+        long paths do not exceed the recursion limit. It stops extending a path once it has
+        max_length items or a cumulative weight over max_weight, and stops altogether after
+        max_count paths. Items in excluded are never used.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
+        >>> g.add_vertex("22nd", "11", "13")
+        >>> g.add_vertex("Chicago Square", "10", "14")
+        >>> g.add_vertex("Avenue", "2", "14")
+        >>> g.add_edge("Bay Road", "22nd", "34", "23")
+        >>> g.add_edge("Chicago Square", "22nd", "33", "22")
+        >>> g.add_edge("Chicago Square", "Avenue", "31", "2")
+        >>> g.add_edge("Bay Road", "Avenue", "39", "29")
+        >>> v1 = g.get_vertex("Bay Road")
+        >>> list(v1.iter_paths("Avenue", max_length=3))
+        [['Bay Road', 'Avenue']]
+        >>> next(v1.iter_paths("Avenue"))
+        ['Bay Road', '22nd', 'Chicago Square', 'Avenue']
+        >>> list(v1.iter_paths("Avenue", max_count=0))
+        []
+        """
+        if max_count is not None and max_count <= 0:
+            return
 
         if self.item == item:
-            paths.append(list(curr_path))
-
-        else:
-            for neighbour in self.neighbours:
-                if neighbour.item not in visited:
-                    neighbour.paths(item, visited, curr_path, paths)
-
-        curr_path.pop()
-        visited.remove(self.item)
+            yield [self.item]
+            return
+
+        count = 0
+        path, weights = [self], [0.0]
+        on_path = set(excluded)
+        on_path.add(self.item)
+        stack = [iter(self.neighbours.items())]
+
+        while stack:
+            for neighbour, weight in stack[-1]:
+                path_weight = weights[-1] + weight
+                if neighbour.item in on_path or \
+                        (max_weight is not None and path_weight > max_weight):
+                    continue
+
+                if neighbour.item == item:
+                    if max_length is None or len(path) + 1 <= max_length:
+                        yield [v.item for v in path] + [item]
+                        count += 1
+                        if count == max_count:
+                            return
+                elif max_length is None or len(path) + 2 <= max_length:
+                    path.append(neighbour)
+                    weights.append(path_weight)
+                    on_path.add(neighbour.item)
+                    stack.append(iter(neighbour.neighbours.items()))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop().item)
+                weights.pop()
 
     def get_connected_component(self, visited: set[_Vertex]) -> set:
         """Return a set of all ITEMS connected to self by a path that does not use
@@ -159,21 +216,58 @@ class _Vertex:
         return visited_so_far
 
 
+class IngestReport(NamedTuple):
+    """The outcome of Graph.ingest
+
+    Instance Attributes:
+        - applied: the number of observations merged into the edge weights
+        - skipped: the number of observations that were not applied, because their streets
+          are not in the graph or their speed is not a positive number
+        - seconds: the time it took to apply the observations
+        - latest: the latest timestamp among the applied observations
+    """
+    applied: int
+    skipped: int
+    seconds: float
+    latest: Any
+
+    def per_second(self) -> float:
+        """Return the number of observations ingested per second"""
+        return (self.applied + self.skipped) / self.seconds if self.seconds > 0 else float('inf')
+
+
 class Graph:
     """
     A Graph used to represent the network of checkpoint locations in Chicago City.
     """
+    # Private Instance Attributes:
+    #   - _vertices: the vertices of this graph mapped from their items
+    #   - _spatial_index: the index over the coordinates of the vertices, built the first time a
+    #       location is snapped and thrown away whenever a vertex is added
+    #   - _component_labels: the connected component number of every vertex item, built the
+    #       first time it is needed and thrown away when two components are joined
+    #   - _listeners: the functions called with every changed edge, mapped to its
+    #       (old weight, new weight), whenever edges are added or updated
+
     _vertices: dict[Any, _Vertex]
+    _spatial_index: Optional[Any]
+    _component_labels: Optional[dict[Any, int]]
+    _listeners: list[Callable[[EdgeChanges], None]]
 
     def __init__(self) -> None:
         """Initialising empty graph"""
         self._vertices = {}
+        self._spatial_index = None
+        self._component_labels = None
+        self._listeners = []
 
     def add_vertex(self, item: Any, latitude: str, longitude: str) -> None:
         """Add a vertex with the given Street location.
         """
         if item not in self._vertices:
             self._vertices[item] = _Vertex(item, latitude, longitude)
+            self._spatial_index = None
+            self._component_labels = None
 
     def add_edge(self, item1: Any, item2: Any, speed: Any, length: Any) -> None:
         """Add a weighted edge between the two vertices with the given items in this graph.
@@ -181,12 +275,150 @@ class Graph:
         """
         weight = float(length) / float(speed)
         if item1 in self._vertices and item2 in self._vertices:
-            v1 = self._vertices[item1]
-            v2 = self._vertices[item2]
-            v1.neighbours[v2], v2.neighbours[v1] = weight, weight
+            old_weight = self._set_weight(item1, item2, weight)
+            if self._listeners:
+                self._notify({(item1, item2): (old_weight, weight)})
+        else:
+            raise ValueError
+
+    def update_edge(self, item1: Any, item2: Any, speed: Any, length: Any,
+                    smoothing: float = DEFAULT_SMOOTHING) -> tuple[float, float]:
+        """Merge an observed speed along the route between item1 and item2 into the weight of its
+        edge with exponential smoothing, adding the edge if it does not exist yet.
+        Return the (old weight, new weight) of the edge, where the old weight of a new edge is inf.
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph, or if speed
+        is not a positive number (the dataset marks unavailable speeds with -1).
+        Listeners are not notified, see ingest.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
+        >>> g.add_vertex("22nd", "11", "13")
+        >>> g.add_edge("Bay Road", "22nd", "10", "20")
+        >>> g.update_edge("Bay Road", "22nd", "20", "20", smoothing=0.5)
+        (2.0, 1.5)
+        >>> g.update_edge("Bay Road", "22nd", "-1", "20")
+        Traceback (most recent call last):
+        ...
+        ValueError
+        """
+        if item1 not in self._vertices or item2 not in self._vertices:
+            raise ValueError
+
+        speed = float(speed)
+        if not speed > 0:
+            raise ValueError
+        observed = float(length) / speed
+        old_weight = self._vertices[item1].neighbours.get(self._vertices[item2], float('inf'))
+        if old_weight == float('inf'):
+            new_weight = observed
         else:
+            new_weight = (1 - smoothing) * old_weight + smoothing * observed
+
+        self._set_weight(item1, item2, new_weight)
+        return old_weight, new_weight
+
+    def ingest(self, observations: Iterable[tuple[Any, Any, Any, Any, Any]],
+               smoothing: float = DEFAULT_SMOOTHING) -> IngestReport:
+        """Merge every (from street, to street, speed, length, timestamp) observation into the
+        edge weights with update_edge, then notify the listeners once of every changed edge.
+        Observations of streets that are not in this graph, or without a positive speed, are
+        skipped.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
+        >>> g.add_vertex("22nd", "11", "13")
+        >>> g.add_edge("Bay Road", "22nd", "10", "20")
+        >>> observations = [("Bay Road", "22nd", "20", "20", 1), ("Bay Road", "Avenue", 2, 2, 1),
+        ...                 ("Bay Road", "22nd", 0, 2, 2)]
+        >>> report = g.ingest(observations)
+        >>> report.applied, report.skipped, report.latest
+        (1, 2, 1)
+        >>> round(g.get_weight("Bay Road", "22nd"), 2)
+        1.7
+        """
+        start_time = time.perf_counter()
+        changes = {}
+        applied, skipped, latest = 0, 0, None
+        for item1, item2, speed, length, timestamp in observations:
+            try:
+                old_weight, new_weight = self.update_edge(item1, item2, speed, length, smoothing)
+            except ValueError:
+                skipped += 1
+                continue
+
+            applied += 1
+            latest = timestamp if latest is None else max(latest, timestamp)
+            key = (item1, item2) if (item2, item1) not in changes else (item2, item1)
+            if key in changes:
+                old_weight = changes[key][0]
+            changes[key] = (old_weight, new_weight)
+
+        if changes and self._listeners:
+            self._notify(changes)
+
+        return IngestReport(applied, skipped, time.perf_counter() - start_time, latest)
+
+    def add_listener(self, listener: Callable[[EdgeChanges], None]) -> None:
+        """Call listener with every changed edge, mapped to its (old weight, new weight), whenever
+        edges of this graph are added or updated. The old weight of a new edge is inf.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[EdgeChanges], None]) -> None:
+        """Stop calling listener when edges change"""
+        self._listeners.remove(listener)
+
+    def get_component_label(self, item: Any) -> int:
+        """Return the number of the connected component containing item. Two items are
+        connected exactly when they have the same label.
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
+        >>> g.add_vertex("22nd", "11", "13")
+        >>> g.add_vertex("Avenue", "2", "14")
+        >>> g.add_edge("Bay Road", "22nd", "34", "23")
+        >>> g.get_component_label("Bay Road") == g.get_component_label("22nd")
+        True
+        >>> g.get_component_label("Bay Road") == g.get_component_label("Avenue")
+        False
+        """
+        if item not in self._vertices:
             raise ValueError
 
+        if self._component_labels is None:
+            labels = {}
+            label = -1
+            for vertex in self._vertices.values():
+                if vertex.item not in labels:
+                    label += 1
+                    stack = [vertex]
+                    labels[vertex.item] = label
+                    while stack:
+                        for u in stack.pop().neighbours:
+                            if u.item not in labels:
+                                labels[u.item] = label
+                                stack.append(u)
+            self._component_labels = labels
+
+        return self._component_labels[item]
+
+    def _set_weight(self, item1: Any, item2: Any, weight: float) -> float:
+        """Set the weight of the edge between item1 and item2 and return its old weight (inf if
+        the edge is new). Component labels are thrown away if the edge joins two components.
+        """
+        v1 = self._vertices[item1]
+        v2 = self._vertices[item2]
+        old_weight = v1.neighbours.get(v2, float('inf'))
+        if old_weight == float('inf') and self._component_labels is not None \
+                and self._component_labels[item1] != self._component_labels[item2]:
+            self._component_labels = None
+
+        v1.neighbours[v2], v2.neighbours[v1] = weight, weight
+        return old_weight
+
+    def _notify(self, changes: EdgeChanges) -> None:
+        """Call every listener with the changed edges"""
+        for listener in self._listeners:
+            listener(changes)
+
     def adjacent(self, item1: Any, item2: Any) -> bool:
         """
         Return if the following two locations are adjacent.
@@ -246,10 +478,30 @@ class Graph:
         >>> g.get_all_paths("Bay Road", "Avenue")
         [['Bay Road', '22nd', 'Chicago Square', 'Avenue'], ['Bay Road', '22nd', 'Avenue'], ['Bay Road', 'Avenue']]
         """
-        all_paths = []
-        v1 = self._vertices[item1]
-        v1.paths(item2, set(), [], all_paths)
-        return all_paths
+        return list(self.iter_paths(item1, item2))
+
+    def iter_paths(self, item1: Any, item2: Any, max_length: Optional[int] = None,
+                   max_weight: Optional[float] = None,
+                   max_count: Optional[int] = None) -> Iterator[list]:
+        """Yield the paths from item1 to item2 one at a time, with at most max_length items and
+        a cumulative weight of at most max_weight, stopping after max_count paths.
+        Raise a ValueError if item1 does not appear as a vertex in this graph.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "12", "14")  # street name with the latitude and longitude
+        >>> g.add_vertex("22nd", "11", "13")
+        >>> g.add_vertex("Chicago Square", "10", "14")
+        >>> g.add_vertex("Avenue", "2", "14")
+        >>> g.add_edge("Bay Road", "22nd", "34", "23")  # 2 items that need to be connected along
+        >>> g.add_edge("Chicago Square", "22nd", "33", "22") # with speed and length values
+        >>> g.add_edge("Chicago Square", "Avenue", "31", "2")
+        >>> g.add_edge("Bay Road", "Avenue", "39", "29")
+        >>> g.add_edge("Avenue", "22nd", "3", "2")
+        >>> list(g.iter_paths("Bay Road", "Avenue", max_weight=1.4))
+        [['Bay Road', '22nd', 'Avenue'], ['Bay Road', 'Avenue']]
+        >>> list(g.iter_paths("Bay Road", "Avenue", max_count=1))
+        [['Bay Road', '22nd', 'Chicago Square', 'Avenue']]
+        """
+        return self.get_vertex(item1).iter_paths(item2, max_length, max_weight, max_count)
 
     def connected(self, item1: Any, item2: Any) -> bool:
         """Return whether item1 and item2 are connected vertices
@@ -391,6 +643,64 @@ class Graph:
         else:
             raise ValueError
 
+    def expand_path(self, items: list) -> list:
+        """Return the items of every vertex passed through when travelling between the vertices
+        with the given items in order. In a Graph that is items itself, but graphs that leave
+        vertices out (contraction.ContractedGraph) put them back.
+        """
+        return items
+
+    def prepare_endpoint(self, item: Any) -> None:
+        """Make sure the vertex with the given item can be the start or end of a search.
+        Every vertex of a Graph already can, so this does nothing (see
+        contraction.ContractedGraph).
+        """
+        return
+
+    def get_spatial_index(self) -> Any:
+        """Return the spatial index (spatialindex.SpatialIndex) over the coordinates of the
+        vertices of this graph, building it if the graph changed since it was last built
+        """
+        if self._spatial_index is None:
+            from spatialindex import SpatialIndex
+            vertices = list(self._vertices.values())
+            self._spatial_index = SpatialIndex([v.item for v in vertices],
+                                               [v.lat_and_long for v in vertices])
+
+        return self._spatial_index
+
+    def nearest_vertex(self, latitude: float, longitude: float) -> Any:
+        """Return the item of the vertex closest to the given location.
+        Raise a ValueError if this graph has no vertices.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "41.80", "-87.60")
+        >>> g.add_vertex("22nd", "41.85", "-87.65")
+        >>> g.nearest_vertex(41.84, -87.66)
+        '22nd'
+        """
+        if not self._vertices:
+            raise ValueError
+        return self.get_spatial_index().nearest(latitude, longitude)
+
+    def nearest_vertices(self, coordinates: Any) -> list:
+        """Return the item of the vertex closest to each (latitude, longitude) row of the numpy
+        array coordinates.
+        Raise a ValueError if this graph has no vertices.
+        """
+        if not self._vertices:
+            raise ValueError
+        return self.get_spatial_index().nearest_many(coordinates)
+
+    def vertices_within(self, latitude: float, longitude: float, radius: float) -> list:
+        """Return the items of the vertices at most radius metres away from the given location.
+        >>> g = Graph()
+        >>> g.add_vertex("Bay Road", "41.80", "-87.60")
+        >>> g.add_vertex("22nd", "41.85", "-87.65")
+        >>> g.vertices_within(41.801, -87.601, 500)
+        ['Bay Road']
+        """
+        return self.get_spatial_index().within_radius(latitude, longitude, radius)
+
     def get_all_connected_components(self, items: set[Any]) -> set[Any]:
         """Return the union of all connected components for each item in items
         """
@@ -2,6 +2,8 @@
 Function(s) that help build the options for the gui interface.
 """
 import csv
+from collections.abc import Sequence
+from typing import Any
 from graph import Graph
 
 
@@ -30,17 +32,29 @@ I_START_LON = 8
 I_END_LAT = 9
 I_END_LON = 10
 
+# the column of each header, so that a row can be indexed by header without searching DATA_HEADER
+_COLUMNS = {header: col for col, header in enumerate(DATA_HEADER)}
+
 
 #############################################
 
 
-def load_titled_data(traffic_file: str) -> tuple[tuple, list[tuple]]:
-    """Return a matrix mirroring data contained in the csv and its corresponding header"""
+def load_titled_data(traffic_file: str) -> tuple[tuple, Sequence[tuple]]:
+    """Return a matrix mirroring data contained in the csv and its corresponding header
+
+    The matrix is a traffictable.TrafficTable, which stores the same rows in far less memory.
+    """
 
-    data = load_data(traffic_file)
+    data = load_table(traffic_file)
     return DATA_HEADER, data
 
 
+def load_table(traffic_file: str) -> Sequence[tuple]:
+    """Return a traffictable.TrafficTable of the same rows as load_data"""
+    from traffictable import TrafficTable
+    return TrafficTable.from_csv(traffic_file)
+
+
 def load_data(traffic_file: str) -> list[tuple]:
     """Return a matrix mirroring the data contained in the csv with some additional filtering
     """
@@ -56,27 +70,30 @@ def load_data(traffic_file: str) -> list[tuple]:
     return data
 
 
-def filter_data_from_selection(data: list[tuple], selections: dict[str, list]) -> list[tuple]:
+def filter_data_from_selection(data: Sequence[tuple],
+                               selections: dict[str, list]) -> Sequence[tuple]:
     """Filter data by complete match for month, day, time and by connectedness for the
     start and end streets
 
+    When data is a traffictable.TrafficTable, the rows are selected with whole column masks,
+    including the connected streets, and a TrafficTable of the selected rows is returned.
+
     Preconditions:
         - all(title in DATA_HEADER for title in selection)
         - data must be in the same format as the matrices formed in this module
     """
-
-    g = Graph()
-    time_headers = {"time", "day", "month"}
-    filtered = []
-    for row in data:
-        if all(header not in selections or _selection_is_empty(selections[header])
-               or _get(header, row) in selections[header] for header in time_headers):
-            _add_row_to_graph(row, g)
-            filtered.append(row)
+    time_headers = ("time", "day", "month")
+    filtered = select_rows(data, {header: selections[header] for header in time_headers
+                                  if header in selections})
 
     if _selections_are_empty(selections, ["start point", "end point"]):
         return filtered
+    elif _is_table(filtered):
+        streets = {street for header in ("start point", "end point")
+                   for street in selections[header]}.difference({''})
+        return filtered.take(filtered.connected_mask(streets))
     else:
+        g = load_graph_from_load_data(filtered)
         place_headers = {"start point", "end point"}
         try:
             connected_vertices = g.get_all_connected_components(
@@ -85,8 +102,47 @@ def filter_data_from_selection(data: list[tuple], selections: dict[str, list]) -
         except ValueError:
             connected_vertices = {}
 
-        return [row for row in filtered if any(place in connected_vertices for place in
-                                               [_get(header, row) for header in place_headers])]
+        return [row for row in filtered if row[I_START] in connected_vertices
+                or row[I_END] in connected_vertices]
+
+
+def select_rows(data: Sequence[tuple], selections: dict[str, list]) -> Sequence[tuple]:
+    """Return the rows of data that have one of the selected values in every column of
+    selections, where a column whose selected values are all empty strings is not restricted
+
+    Preconditions:
+        - all(title in DATA_HEADER for title in selections)
+    """
+    if _is_table(data):
+        return data.take(data.select(selections))
+
+    restricted = [(_COLUMNS[header], {str(value) for value in selection})
+                  for header, selection in selections.items()
+                  if not _selection_is_empty(selection)]
+    return [row for row in data
+            if all(str(row[col]) in values for col, values in restricted)]
+
+
+def distinct_values(data: Sequence[tuple], header: str) -> list:
+    """Return the distinct values in the column of data with the given header
+
+    When data is a traffictable.TrafficTable, the values are read from the column's array instead
+    of from every row.
+
+    Preconditions:
+        - header in DATA_HEADER
+    """
+    if _is_table(data):
+        return data.distinct(header)
+
+    col = _COLUMNS[header]
+    return list(dict.fromkeys(row[col] for row in data))
+
+
+def _is_table(data: Sequence[tuple]) -> bool:
+    """Return whether data is a traffictable.TrafficTable"""
+    from traffictable import TrafficTable
+    return isinstance(data, TrafficTable)
 
 
 def _selections_are_empty(selections: dict[str, list], titles: list[str]) -> bool:
@@ -105,17 +161,16 @@ def _add_row_to_graph(row: tuple, g: Graph) -> None:
     g.add_edge(row[I_START], row[I_END], row[I_SPEED], row[I_LENGTH])
 
 
-def _get(header: str, row: tuple) -> str:
+def _get(header: str, row: tuple) -> Any:
     """
     Preconditions:
         - header in DATA_HEADERS
         - row in the module supported format
     """
-    col = DATA_HEADER.index(header)
-    return row[col]
+    return row[_COLUMNS[header]]
 
 
-def load_graph_from_load_data(info: list[tuple]) -> Graph:
+def load_graph_from_load_data(info: Sequence[tuple]) -> Graph:
     """
     Loads a graph from the provided matrix of data
 
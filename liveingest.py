@@ -0,0 +1,223 @@
+"""
+CSC111 Project: liveingest.py
+
+Module Description
+==================
+
+Module for feeding fresh speed observations into a running graph without reloading the dataset.
+Observations are csv lines of
+
+    from street, to street, speed, length, timestamp
+
+read from a file, from a file that is still being written to (like tail -f), or from stdin, which
+stands in for a socket (for example: nc -l 9000 | python liveingest.py transformed_final.csv -).
+Every batch of observations is merged into the edge weights with Graph.ingest, which only throws
+away the cached results and indexes that the changed edges affect, and the throughput of every
+batch is reported. A batch is applied once it is full, or once its oldest observation has waited
+MAX_WAIT seconds, so that a slow live stream still reaches the graph promptly.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import argparse
+import csv
+import queue
+import sys
+import threading
+import time
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from graph import Graph, IngestReport, DEFAULT_SMOOTHING
+from guisupporter import load_data, load_graph_from_load_data
+
+BATCH_SIZE = 1000
+MAX_WAIT = 1.0
+
+
+def follow(file: TextIO, poll_interval: float = 0.5) -> Iterator[str]:
+    """Yield the lines of file forever, waiting for new lines to be written once the end of the
+    file is reached
+    """
+    while True:
+        line = file.readline()
+        if line:
+            yield line
+        else:
+            time.sleep(poll_interval)
+
+
+class ObservationReader:
+    """The (from street, to street, speed, length, timestamp) observations of csv lines.
+    Lines that are not observations (a header, a malformed line, or an unavailable speed that is
+    not positive, as in the dataset) are skipped and counted, so that one bad line does not stop a
+    stream.
+
+    >>> reader = ObservationReader(['from,to,speed,length,time', 'Madison,Kinzie,25,0.5,0',
+    ...                             'A,B,-1,0.5,0', 'A,B', ''])
+    >>> list(reader), reader.skipped
+    ([('Madison', 'Kinzie', 25.0, 0.5, '0')], 3)
+
+    Instance Attributes:
+        - skipped: the number of lines read so far that were skipped: headers, malformed lines,
+          and lines whose speed is unparsable or not positive
+    """
+    # Private Instance Attributes:
+    #   - _lines: the csv lines to read
+
+    _lines: Iterable[str]
+    skipped: int
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = lines
+        self.skipped = 0
+
+    def __iter__(self) -> Iterator[tuple[str, str, float, float, str]]:
+        for row in csv.reader(self._lines):
+            if len(row) == 0:
+                continue
+            try:
+                if len(row) != 5:
+                    raise ValueError
+                speed, length = float(row[2]), float(row[3])
+                if not speed > 0:
+                    raise ValueError
+            except ValueError:
+                self.skipped += 1
+                continue
+            yield row[0], row[1], speed, length, row[4]
+
+
+def read_observations(lines: Iterable[str]) -> Iterator[tuple[str, str, float, float, str]]:
+    """Yield the (from street, to street, speed, length, timestamp) observation of every csv line,
+    skipping the lines that are not observations (see ObservationReader).
+
+    >>> list(read_observations(['Madison,Kinzie,25,0.5,2021-03-04T17:00', 'A,B,-1,0.5,0']))
+    [('Madison', 'Kinzie', 25.0, 0.5, '2021-03-04T17:00')]
+    """
+    return iter(ObservationReader(lines))
+
+
+def ingest_stream(g: Graph, observations: Iterable[tuple], batch_size: int = BATCH_SIZE,
+                  smoothing: float = DEFAULT_SMOOTHING,
+                  max_wait: Optional[float] = None) -> Iterator[IngestReport]:
+    """Ingest the observations into g in batches of batch_size and yield the report of every
+    batch as soon as it is applied.
+
+    If max_wait is given, the observations are read as they arrive (from a live stream), and a
+    batch is also applied once its oldest observation has waited max_wait seconds, instead of
+    waiting for batch_size observations that may take a long time to arrive.
+
+    >>> g = Graph()
+    >>> g.add_vertex("Bay Road", "12", "14")
+    >>> g.add_vertex("22nd", "11", "13")
+    >>> g.add_edge("Bay Road", "22nd", "10", "20")
+    >>> observations = [("Bay Road", "22nd", 20, 20, t) for t in range(5)]
+    >>> [report.applied for report in ingest_stream(g, observations, 2)]
+    [2, 2, 1]
+    >>> [report.applied for report in ingest_stream(g, observations, 2, max_wait=1.0)]
+    [2, 2, 1]
+    """
+    if max_wait is None:
+        observations = iter(observations)
+        while True:
+            batch = list(islice(observations, batch_size))
+            if not batch:
+                return
+            yield g.ingest(batch, smoothing)
+
+    pending = queue.Queue(maxsize=batch_size)
+    threading.Thread(target=_produce, args=(observations, pending), daemon=True).start()
+    batch, deadline = [], None
+    while True:
+        try:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            observation = pending.get(timeout=timeout)
+        except queue.Empty:
+            observation = None
+
+        if observation is not None and not isinstance(observation, tuple):
+            if batch:
+                yield g.ingest(batch, smoothing)
+            if isinstance(observation, BaseException):
+                raise observation
+            return
+
+        if observation is not None:
+            if not batch:
+                deadline = time.monotonic() + max_wait
+            batch.append(observation)
+        if len(batch) >= batch_size or (batch and observation is None):
+            yield g.ingest(batch, smoothing)
+            batch, deadline = [], None
+
+
+def _produce(observations: Iterable[tuple], pending: queue.Queue) -> None:
+    """Put every observation into pending as it arrives, followed by an end marker: the
+    exception the observations raised, or any other non-tuple object when they run out
+    """
+    end: Any = object()
+    try:
+        for observation in observations:
+            pending.put(observation)
+    except Exception as error:  # handed over to the consuming thread
+        end = error
+    pending.put(end)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: ingest observations into the graph of a dataset and report the
+    throughput of every batch
+    """
+    parser = argparse.ArgumentParser(description='Ingest live speed observations.')
+    parser.add_argument('data', help='the transformed traffic csv the graph is built from')
+    parser.add_argument('observations', help='the csv of observations, "-" to read from stdin')
+    parser.add_argument('--follow', action='store_true',
+                        help='keep waiting for observations appended to the file')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--smoothing', type=float, default=DEFAULT_SMOOTHING)
+    parser.add_argument('--max-wait', type=float, default=MAX_WAIT,
+                        help='the seconds a live observation may wait for its batch to fill up')
+    args = parser.parse_args(argv)
+
+    g = load_graph_from_load_data(load_data(args.data))
+
+    file = sys.stdin if args.observations == '-' else open(args.observations, encoding='utf-8')
+    try:
+        lines = follow(file) if args.follow else file
+        reader = ObservationReader(lines)
+        live = args.follow or file is sys.stdin
+        total, seconds = 0, 0.0
+        for report in ingest_stream(g, reader, args.batch_size, args.smoothing,
+                                    args.max_wait if live else None):
+            total += report.applied + report.skipped
+            seconds += report.seconds
+            print(f'{report.applied} applied, {report.skipped} rejected, '
+                  f'{report.per_second():.0f} observations/s, latest {report.latest}, '
+                  f'{reader.skipped} unreadable lines so far', flush=True)
+        if seconds > 0:
+            print(f'{total} observations at {total / seconds:.0f} observations/s, '
+                  f'{reader.skipped} unreadable lines skipped')
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python liveingest.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'csv', 'queue', 'sys', 'threading', 'time', 'itertools',
+                              'graph', 'guisupporter'],
+            'allowed-io': ['follow', 'main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
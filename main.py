@@ -1,32 +1,48 @@
-"""Entry point for the program"""
+"""Entry point for the program
+
+The GUI (tkinter), plotting (matplotlib) and web map (mapping) modules are only imported once
+they are needed, so that importing this module does not pay for them.
+"""
+from collections import OrderedDict
+from collections.abc import Sequence
 from typing import Any, Callable
 
-from usergui import InputFrameBuilder
-from mediatorbuilder import MenuMediatorBuilder
-from shortest_path_calculator import gets_original_gives_full_path
-from pathcalculator import dijkstra
-from visualization import visualise
-from mapping import mapping_on_maps_multiple, mapping_on_maps_singular
+from shortest_path_calculator import EXACT_LIMIT, ItineraryPlanner
 
 from graph import Graph
 
-from guisupporter import load_graph_from_load_data
+from guisupporter import select_rows
 from guisupporter import load_titled_data
+from overlay import SliceOverlays
+from pathcalculator import Path, k_shortest_paths
 
 CHICAGO_TRAFFIC_FILE = "transformed_final.csv"
 
+# the menus selecting the time slice of a route, and the columns they select by
+SLICE_MENUS = ("time menu", "day menu", "month menu")
+SLICE_HEADERS = ("time", "day", "month")
+
+# the number of alternatives to the shortest route drawn on its map
+ALTERNATIVES = 2
+
+# the most routes whose alternatives are kept, so that showing a route again does not search for
+# its alternatives again
+CACHED_ALTERNATIVES = 16
+
 
 def create_and_run_input_frame() -> None:
     """Creates an input frame using the InputFrameBuilder and Chicago traffic dataset
     and runs the frame"""
+    from usergui import InputFrameBuilder
+    from mediatorbuilder import MenuMediatorBuilder
 
     header, data = load_titled_data(CHICAGO_TRAFFIC_FILE)
     mmb = MenuMediatorBuilder(header, data)
     mmb.create_option_menu("day menu", ("day",))
     mmb.create_option_menu("month menu", ("month",))
     mmb.create_option_menu("time menu", ("time",))
-    mmb.create_option_menu("start street*", ("start point", "end point"))
-    mmb.create_option_menu("end street*", ("start point", "end point"))
+    mmb.create_search_menu("start street*", ("start point", "end point"))
+    mmb.create_search_menu("end street*", ("start point", "end point"))
     mmb.create_option_list("intermediate streets", ("start point", "end point"))
 
     ifb = InputFrameBuilder()
@@ -35,54 +51,93 @@ def create_and_run_input_frame() -> None:
     ifb.get_frame().mainloop()
 
 
-def inject_data(data: list[tuple]) -> Callable[[dict[str, Any]], None]:
+def inject_data(data: Sequence[tuple]) -> Callable[[dict[str, Any]], None]:
     """Wrapper for inserting data into the output function"""
+    # the graph and overlay of a time slice are built once and reused while it is selected again
+    overlays = SliceOverlays(data, lambda key: _filter_by(data, dict(zip(SLICE_MENUS, key))))
+    planners = {}
+    alternatives = OrderedDict()
 
     def process_input(options: dict[str, Any]) -> None:
         """Uses the options to generate the graph and visualize the graph and shortest path"""
 
-        filtered_data = _filter_by(data, options)
-        g = load_graph_from_load_data(filtered_data)
-        _visualize_graph(g, options)
+        key = tuple(options[title] for title in SLICE_MENUS)
+        g = overlays.get_graph(key)
+        _visualize_graph(g, options,
+                         lambda start, end: overlays.route(key, start, end),
+                         lambda start, end: _get_planner(planners, (key, start, end), g),
+                         lambda start, end, path: _get_alternatives(alternatives,
+                                                                    (key, start, end), g, path))
 
     return process_input
 
 
-def _visualize_graph(g: Graph, options: dict[str, Any]) -> None:
+def _get_planner(planners: dict[tuple, ItineraryPlanner], key: tuple,
+                 g: Graph) -> ItineraryPlanner:
+    """Return the planner of the itinerary key, a (time slice, start, end), in g
+
+    Only the planner of the last itinerary is kept, so that editing its streets in between only
+    searches from the streets added.
+    """
+    if key not in planners:
+        planners.clear()
+        planners[key] = ItineraryPlanner(g, key[1], key[2])
+    return planners[key]
+
+
+def _get_alternatives(alternatives: OrderedDict[tuple, list[list]], key: tuple, g: Graph,
+                      path: list) -> list[list]:
+    """Return the ALTERNATIVES next shortest routes other than path of the route key, a (time
+    slice, start, end), in g
+
+    Only the alternatives of the CACHED_ALTERNATIVES routes shown most recently are kept.
+    """
+    if key in alternatives:
+        alternatives.move_to_end(key)
+    else:
+        _, start, end = key
+        paths = k_shortest_paths(g, start, end, ALTERNATIVES + 1)
+        alternatives[key] = [list(other) for other in paths if list(other) != path][:ALTERNATIVES]
+        if len(alternatives) > CACHED_ALTERNATIVES:
+            alternatives.popitem(last=False)
+    return alternatives[key]
+
+
+def _visualize_graph(g: Graph, options: dict[str, Any],
+                     route: Callable[[Any, Any], Path],
+                     get_planner: Callable[[Any, Any], ItineraryPlanner],
+                     get_alternatives: Callable[[Any, Any, list], list[list]]) -> None:
+    from visualization import visualise
+    from mapping import mapping_on_maps_multiple, mapping_on_maps_singular
 
     start = options["start street*"]
     end = options["end street*"]
 
-    intermediate_points = filter(lambda x: x != "", options["intermediate streets"])
+    intermediate_points = [x for x in options["intermediate streets"] if x != ""]
 
-    if all(intermediate == "" for intermediate in intermediate_points):
-        path = list(dijkstra(g, start, end))
-        mapping_on_maps_singular(g, path)
+    if intermediate_points == []:
+        # a time slice routed in repeatedly is customized once and its overlay reused
+        path = list(route(start, end))
+        # the next shortest routes are drawn on the same map as the shortest one
+        mapping_on_maps_singular(g, path, get_alternatives(start, end, path))
     else:
-        path = gets_original_gives_full_path(g, start, end, list(intermediate_points))
+        planner = get_planner(start, end)
+        planner.set_points(intermediate_points)
+        path = planner.get_full_path(exact=len(planner.get_points()) <= EXACT_LIMIT)
         mapping_on_maps_multiple(g, path)
 
     visualise(path, g)
 
 
-def _filter_by(data: list[tuple], options: dict[str, Any]) -> list[tuple]:
+def _filter_by(data: Sequence[tuple], options: dict[str, Any]) -> Sequence[tuple]:
     """Return data filtered using the data provided in options
 
     Postconditions:
         - every row in the returned list contains every required option
     """
 
-    required = ("time menu", "day menu", "month menu")
-    indices = (4, 5, 6)
-
-    filtered_matrix = []
-    for row in data:
-        if all(options[title] == "" or row[index] == options[title]
-               for title, index in zip(required, indices)):
-
-            filtered_matrix.append(row)
-
-    return filtered_matrix
+    return select_rows(data, {header: [options[title]]
+                              for title, header in zip(SLICE_MENUS, SLICE_HEADERS)})
 
 
 if __name__ == "__main__":
@@ -3,86 +3,340 @@ CSC111 Project: mapping.py
 
 Module Description
 ==================
-The following module utilizes the gmplot module to scatter the various points in our shortest paths
-and then draw lines showing which point is connected to which point, or how we can travel from one
+The following module draws the various points in our shortest paths on a google map and then
+draws lines showing which point is connected to which point, or how we can travel from one
 point to the next.
 
+The area that can be reached from some origins within a travel time budget can also be drawn,
+with every reached checkpoint coloured by how long it takes to get there.
+
+Any number of routes are written into a single html (or GeoJSON) file, so that a route and its
+alternatives open in one browser tab. Each route's line is simplified with the Douglas-Peucker
+algorithm and stored as an encoded polyline, every checkpoint along it gets a marker, and the file
+is written one route at a time instead of being built in memory.
+
 Copyright and Usage Information
 ===============================
 This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
 """
-
+import json
 import webbrowser
-import gmplot
+from typing import Any, Optional, TextIO
+
 from graph import Graph
 # Graph = __import__("Graph & Node").Graph
 
+# the center of chicago
+MAP_CENTER = (41.8781, -87.6298)
+MAP_ZOOM = 13
+
+# roughly 5 metres in degrees of latitude
+DEFAULT_TOLERANCE = 0.00005
+
+# the html file the routes found by the gui are shown in
+ROUTES_MAP_FILE = 'routes.html'
+
+# the html file routingcli writes reachable area maps to by default
+REACHABLE_MAP_FILE = 'reachable.html'
+
+ROUTE_COLOURS = ('#6495ED', '#DC143C', '#228B22', '#FF8C00', '#8A2BE2', '#008B8B', '#B8860B')
+
+# the colour of each band of travel time on a reachable area map, from the closest to the farthest
+REACHABLE_COLOURS = ('#1A9850', '#91CF60', '#FEE08B', '#FC8D59', '#D73027')
+
+# the radius in metres of the circle drawn around every reached checkpoint
+REACHABLE_RADIUS = 80
+
 
 def mapping_on_maps_multiple(graph: Graph, path: list) -> None:
     """
-    Mapping function for only start and end points. This is so that we can have two separate
-    html files for the two different calculations, calculating the shortest path between 2 points
-    and calculating the shortest path between 2 points which goes through multiple other points.
+    Mapping function for the shortest path between 2 points which goes through multiple other
+    points, see show_routes.
+    """
+    show_routes(graph, [path], ['Route through the streets in between'])
+
+
+def mapping_on_maps_singular(graph: Graph, path: list,
+                             alternatives: Optional[list[list]] = None) -> None:
+    """
+    Mapping function for the shortest path between only the start and end points, shown on the
+    same map as the alternatives to it, see show_routes.
+    """
+    alternatives = [] if alternatives is None else alternatives
+    show_routes(graph, [path] + alternatives,
+                ['Shortest route'] + [f'Alternative {i + 1}' for i in range(len(alternatives))])
+
+
+def show_routes(graph: Graph, paths: list[list], names: Optional[list[str]] = None,
+                filename: str = ROUTES_MAP_FILE) -> None:
+    """Write every path in paths into the single google maps html file filename and open it in
+    one browser tab
+    """
+    write_routes_map(graph, paths, filename, names)
+    webbrowser.open(filename)
+
+
+def write_routes_map(graph: Graph, paths: list[list], filename: str,
+                     names: Optional[list[str]] = None, tolerance: float = DEFAULT_TOLERANCE,
+                     apikey: str = '') -> None:
+    """Write every path in paths into a single google maps html file.
+
+    Each path gets markers for its start and end points, a smaller marker for every checkpoint in
+    between, and one line, drawn in its own colour.
+    """
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(_HTML_HEADER.format(apikey=apikey, lat=MAP_CENTER[0], long=MAP_CENTER[1],
+                                       zoom=MAP_ZOOM))
+        for i, path in enumerate(paths):
+            if len(path) == 0:
+                continue
+            route = _route_properties(graph, path, i, names, tolerance)
+            # escaping '</' keeps street names from closing the script element
+            file.write('  routes.push(' + json.dumps(route).replace('</', '<\\/') + ');\n')
+        file.write(_HTML_FOOTER)
+
+
+def write_routes_geojson(graph: Graph, paths: list[list], filename: str,
+                         names: Optional[list[str]] = None,
+                         tolerance: float = DEFAULT_TOLERANCE) -> None:
+    """Write every path in paths as a LineString feature of a single GeoJSON FeatureCollection"""
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write('{"type": "FeatureCollection", "features": [\n')
+        written = 0
+        for i, path in enumerate(paths):
+            if len(path) == 0:
+                continue
+            coordinates = _simplified_coordinates(graph, path, tolerance)
+            feature = {'type': 'Feature',
+                       'geometry': {'type': 'LineString',
+                                    'coordinates': [[long, lat] for lat, long in coordinates]},
+                       'properties': _route_names(path, i, names)}
+            _write_separated(file, json.dumps(feature), written)
+            written += 1
+        file.write('\n]}\n')
+
+
+def write_reachable_map(reachable: Any, filename: str, budget: Optional[float] = None,
+                        apikey: str = '') -> None:
+    """Write the area reached by a bounded search (a pathcalculator.Reachable) into a google maps
+    html file.
+
+    Every reached checkpoint is drawn as a circle coloured by its band of travel time, where the
+    bands split budget (or the longest travel time when budget is None) into equal parts, and
+    every origin gets a marker.
+    """
+    band_width = _band_width(reachable, budget)
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(_HTML_HEADER.format(apikey=apikey, lat=MAP_CENTER[0], long=MAP_CENTER[1],
+                                       zoom=MAP_ZOOM))
+        file.write('  var points = [\n')
+        for i, (lat, long) in enumerate(reachable.coordinates.tolist()):
+            time = float(reachable.times[i])
+            # the origins are the only points reached without travelling at all
+            point = [lat, long, _band(time, band_width), str(reachable.items[i]), time == 0]
+            _write_separated(file, '    ' + json.dumps(point).replace('</', '<\\/'), i)
+        file.write('\n  ];\n')
+        file.write('  var colours = ' + json.dumps(REACHABLE_COLOURS) + ';\n')
+        file.write(_REACHABLE_FOOTER.format(radius=REACHABLE_RADIUS))
+
+
+def write_reachable_geojson(reachable: Any, filename: str, budget: Optional[float] = None) -> None:
+    """Write every checkpoint reached by a bounded search (a pathcalculator.Reachable) as a Point
+    feature of a single GeoJSON FeatureCollection, with its travel time, band and origin
+    """
+    band_width = _band_width(reachable, budget)
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write('{"type": "FeatureCollection", "features": [\n')
+        for i, (lat, long) in enumerate(reachable.coordinates.tolist()):
+            time = float(reachable.times[i])
+            feature = {'type': 'Feature',
+                       'geometry': {'type': 'Point', 'coordinates': [long, lat]},
+                       'properties': {'name': str(reachable.items[i]), 'time': time,
+                                      'band': _band(time, band_width),
+                                      'origin': int(reachable.origins[i])}}
+            _write_separated(file, json.dumps(feature), i)
+        file.write('\n]}\n')
+
+
+def encode_polyline(points: list[tuple[float, float]]) -> str:
+    """Return the points encoded with the google encoded polyline algorithm
+
+    >>> encode_polyline([(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)])
+    '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    """
+    encoded = []
+    prev_lat, prev_long = 0, 0
+    for lat, long in points:
+        lat_e5, long_e5 = round(lat * 1e5), round(long * 1e5)
+        for delta in (lat_e5 - prev_lat, long_e5 - prev_long):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        prev_lat, prev_long = lat_e5, long_e5
+
+    return ''.join(encoded)
+
+
+def simplify(points: list[tuple[float, float]], tolerance: float) -> list[int]:
+    """Return the indices of the points kept by the Douglas-Peucker algorithm, that is the points
+    whose removal would move the line by more than tolerance.
+
+    >>> simplify([(0, 0), (1, 0.01), (2, 0), (3, 5), (4, 0)], 0.1)
+    [0, 2, 3, 4]
     """
-    start = path[0]
-    end = path[-1]
-    q = [start, end]  # So that we can have markers for the start and end points.
-    r, t = graph.get_all_lat_long(q)  # To receive the latitude and longitude for the start and
-    # end location .
+    if len(points) < 3:
+        return list(range(len(points)))
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        farthest, distance = first, 0.0
+        for i in range(first + 1, last):
+            d = _distance_to_segment(points[i], points[first], points[last])
+            if d > distance:
+                farthest, distance = i, d
+        if distance > tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [i for i, kept in enumerate(keep) if kept]
+
 
-    x, y = graph.get_all_lat_long(path)  # To receive the latitude and longitude for all the
-    # different points in our path.
-    z = x[1:-1]
-    w = y[1:-1]
+def _distance_to_segment(p: tuple[float, float], a: tuple[float, float],
+                         b: tuple[float, float]) -> float:
+    """Return the distance from p to the line segment from a to b"""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        t = 0.0
+    else:
+        t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_squared))
+    x, y = a[0] + t * dx - p[0], a[1] + t * dy - p[1]
+    return (x * x + y * y) ** 0.5
 
-    gmap = gmplot.GoogleMapPlotter(41.8781, -87.6298, 13)  # Plots the map frm the center of
-    # chicago.
-    gmap.marker(r[0], t[0], color='black', title=path[0])  # Adds markers for start and end
-    gmap.marker(r[1], t[1], color='black', title=path[-1])  # locations.
 
-    # Scatter the different points in our path on the google map.
-    gmap.scatter(z, w, color='blue', size=80, marker=True, title=path[1:-1])
+def _simplified_coordinates(graph: Graph, path: list,
+                            tolerance: float) -> list[tuple[float, float]]:
+    """Return the simplified (latitude, longitude) coordinates along path"""
+    lats, longs = graph.get_all_lat_long(path)
+    coordinates = list(zip(lats, longs))
+    return [coordinates[i] for i in simplify(coordinates, tolerance)]
 
-    # Draw lines connecting the different co-ordinates or points in our google map.
-    gmap.plot(x, y, '#6495ED', edge_width=2.0)
 
-    gmap.draw('map1.html')
-    webbrowser.open('map1.html')
+def _route_names(path: list, index: int, names: Optional[list[str]]) -> dict[str, Any]:
+    """Return the name, start and end of the path at index"""
+    name = names[index] if names is not None else 'Route ' + str(index + 1)
+    return {'name': name, 'start': str(path[0]), 'end': str(path[-1])}
 
 
-def mapping_on_maps_singular(graph: Graph, path: list) -> None:
+def _route_properties(graph: Graph, path: list, index: int, names: Optional[list[str]],
+                      tolerance: float) -> dict[str, Any]:
+    """Return the information of the path at index that is needed to draw it on the html map.
+    Every checkpoint between the start and the end is kept as a [latitude, longitude, name]
+    marker, even where the line is simplified.
+
+    >>> g = Graph()
+    >>> for street, lat in [('A', 41.8), ('B', 41.9), ('C', 42.0)]:
+    ...     g.add_vertex(street, lat, -87.6)
+    >>> route = _route_properties(g, ['A', 'B', 'C'], 0, None, 1.0)
+    >>> route['checkpoints'], route['name'], route['start'], route['end']
+    ([[41.9, -87.6, 'B']], 'Route 1', 'A', 'C')
     """
-    Mapping function for only start and end points. This is so that we can have two separate
-    html files for the two different calculations, calculating the shortest path between 2 points
-    and calculating the shortest path between 2 points which goes through multiple other points.
+    coordinates = _simplified_coordinates(graph, path, tolerance)
+    route = _route_names(path, index, names)
+    route['colour'] = ROUTE_COLOURS[index % len(ROUTE_COLOURS)]
+    route['polyline'] = encode_polyline(coordinates)
+    lats, longs = graph.get_all_lat_long(path[1:-1])
+    route['checkpoints'] = [[lat, long, str(item)]
+                            for lat, long, item in zip(lats, longs, path[1:-1])]
+    return route
+
+
+def _band_width(reachable: Any, budget: Optional[float]) -> float:
+    """Return the travel time covered by each colour band of a reachable area map"""
+    if budget is None:
+        budget = float(reachable.times.max()) if len(reachable.times) > 0 else 0.0
+    return budget / len(REACHABLE_COLOURS) if budget > 0 else 1.0
+
+
+def _band(time: float, band_width: float) -> int:
+    """Return the colour band of time
+
+    >>> [_band(time, 0.25) for time in [0.0, 0.3, 1.0, 2.0]]
+    [0, 1, 4, 4]
     """
-    s = path[0]
-    h = path[-1]
-    q = [s, h]  # So that we can have markers for the start and end points by
-    r, t = graph.get_all_lat_long(q)  # receiving the latitude and longitude for the start and
-    # end location .
+    return min(int(time / band_width), len(REACHABLE_COLOURS) - 1)
 
-    x, y = graph.get_all_lat_long(path)  # To receive the latitude and longitude for all the
-    # different points in our path.
-    z = x[1:-1]
-    w = y[1:-1]
 
-    gmap1 = gmplot.GoogleMapPlotter(41.8781, -87.6298, 13)  # Plots the map frm the center of
-    # chicago.
+def _write_separated(file: TextIO, text: str, written: int) -> None:
+    """Write text to file, preceded by a comma if it is not the first element written"""
+    if written > 0:
+        file.write(',\n')
+    file.write(text)
 
-    gmap1.marker(r[0], t[0], color='black', title=path[0])  # Adds markers for start and end
-    gmap1.marker(r[1], t[1], color='black', title=path[-1])  # locations.
 
-    # Scatter the different points in our path on the google map.
-    gmap1.scatter(z, w, color='blue',
-                  size=80, marker=True, title=path[1:-1])
+_HTML_HEADER = """<html>
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="initial-scale=1.0, user-scalable=no" />
+<script type="text/javascript"
+  src="https://maps.googleapis.com/maps/api/js?libraries=geometry&key={apikey}"></script>
+<script type="text/javascript">
+function initialize() {{
+  var map = new google.maps.Map(document.getElementById("map_canvas"), {{
+    zoom: {zoom},
+    center: new google.maps.LatLng({lat}, {long})
+  }});
+  var routes = [];
+"""
 
-    # Draw lines connecting the different co-ordinates or points in our google map.
-    gmap1.plot(x, y,
-               '#6495ED', edge_width=2.0)
+_HTML_FOOTER = """  routes.forEach(function (route) {
+    var points = google.maps.geometry.encoding.decodePath(route.polyline);
+    new google.maps.Polyline({
+      path: points, map: map, strokeColor: route.colour, strokeWeight: 2
+    });
+    new google.maps.Marker({position: points[0], map: map, title: route.start});
+    new google.maps.Marker({position: points[points.length - 1], map: map, title: route.end});
+    route.checkpoints.forEach(function (checkpoint) {
+      new google.maps.Marker({
+        position: new google.maps.LatLng(checkpoint[0], checkpoint[1]), map: map,
+        title: checkpoint[2],
+        icon: {path: google.maps.SymbolPath.CIRCLE, scale: 4, strokeColor: route.colour}
+      });
+    });
+  });
+}
+</script>
+</head>
+<body style="margin:0px; padding:0px;" onload="initialize()">
+  <div id="map_canvas" style="width: 100%; height: 100%;"></div>
+</body>
+</html>
+"""
 
-    gmap1.draw('map2.html')
-    webbrowser.open('map2.html')
+_REACHABLE_FOOTER = """  points.forEach(function (point) {{
+    var position = new google.maps.LatLng(point[0], point[1]);
+    new google.maps.Circle({{
+      center: position, radius: {radius}, map: map, strokeWeight: 0,
+      fillColor: colours[point[2]], fillOpacity: 0.5
+    }});
+    if (point[4]) {{
+      new google.maps.Marker({{position: position, map: map, title: point[3]}});
+    }}
+  }});
+}}
+</script>
+</head>
+<body style="margin:0px; padding:0px;" onload="initialize()">
+  <div id="map_canvas" style="width: 100%; height: 100%;"></div>
+</body>
+</html>
+"""
 
 
 if __name__ == '__main__':
@@ -93,8 +347,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'max-line-length': 100,
         'disable': ['E1136'],
-        'extra-imports': ['gmplot', 'webbrowser', 'graph'],
-        'allowed-io': [],
+        'extra-imports': ['json', 'webbrowser', 'graph'],
+        'allowed-io': ['write_routes_map', 'write_routes_geojson', 'write_reachable_map',
+                       'write_reachable_geojson'],
         'max-nested-blocks': 5
 
     })
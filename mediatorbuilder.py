@@ -1,10 +1,11 @@
 """Module for Builders for WidgetMediators"""
 
+from collections.abc import Sequence
 from tkinter import Widget
 from typing import Callable
 
 from menumediator import WidgetMediator, NullMediator, MenuMediator, \
-    OptionMenuComponent, OptionListComponent
+    OptionMenuComponent, OptionListComponent, SearchComponent
 
 
 class MediatorBuilder:
@@ -36,11 +37,11 @@ class MenuMediatorBuilder(MediatorBuilder):
     #   - _inits: promises to create the Widgets when a parent frame is given
 
     _titles: tuple
-    _data: list[tuple]
+    _data: Sequence[tuple]
 
     _inits: list[Callable[[Widget, MenuMediator], None]] = []
 
-    def __init__(self, titles: tuple, data: list[tuple]) -> None:
+    def __init__(self, titles: tuple, data: Sequence[tuple]) -> None:
         """
         Preconditions:
             - all(len(titles) == len(row) for row in data)
@@ -49,11 +50,14 @@ class MenuMediatorBuilder(MediatorBuilder):
         self._data = data
 
     def get_mediator(self, parent: Widget) -> MenuMediator:
-        """Return a MenuMediator using the settings saved in the builder"""
+        """Return a MenuMediator using the settings saved in the builder, scheduling its updates
+        with parent
+        """
 
-        mm = MenuMediator(self._titles, self._data)
+        mm = MenuMediator(self._titles, self._data, parent)
         for init_and_add in self._inits:
             init_and_add(parent, mm)
+        mm.update_selection(())
 
         return mm
 
@@ -82,3 +86,16 @@ class MenuMediatorBuilder(MediatorBuilder):
             mm.add_component(olc, component_name, data_titles)
 
         self._inits.append(create_olc)
+
+    def create_search_menu(self, component_name: str, data_titles: tuple) -> None:
+        """
+        Preconditions:
+            - data_title in self._options
+        """
+
+        def create_sc(parent: Widget, mm: MenuMediator) -> None:
+            """Creates a SearchComponent using the variables taken from the local context"""
+            sc = SearchComponent(parent, mm)
+            mm.add_component(sc, component_name, data_titles)
+
+        self._inits.append(create_sc)
@@ -4,11 +4,20 @@
 
 from __future__ import annotations
 
-from tkinter import Button, Frame, Menu, Variable, OptionMenu, Widget
-from typing import Any, Callable
-from collections import Iterable
+import heapq
+from bisect import bisect_left, bisect_right
+from tkinter import Button, Entry, Frame, Listbox, Menu, StringVar, Variable, OptionMenu, Widget
+from typing import Any, Callable, Optional
+from collections.abc import Iterable, Sequence
 
-from guisupporter import filter_data_from_selection
+from guisupporter import distinct_values, filter_data_from_selection
+
+# the most options a SearchComponent lists at once
+MAX_MATCHES = 8
+
+# how long a MenuMediator waits after a selection for more selections before updating the menus,
+# in milliseconds
+UPDATE_DELAY = 50
 
 
 ####################################################################
@@ -110,16 +119,19 @@ class OptionListComponent(MediatorComponent, Frame):
     # Private Attributes:
     #   _menu_components: stack of OptionMenuComponents to add and remove using buttons
     #   _menu_frame: the frame to add/remove widgets to/from
+    #   _options: the options of the OptionMenus, given to every OptionMenu added
     #   - _mediator: the mediator to notify a selection has been made to update other colleages
 
     _menu_components: list[OptionMenuComponent] = []
     _menu_frame: Frame
+    _options: list
 
     _mediator: MenuMediator
 
     def __init__(self, parent: Widget, mediator: MenuMediator) -> None:
         super().__init__(parent)
         self._mediator = mediator
+        self._options = []
 
         self._menu_frame = Frame(self)
         self._setup_frame()
@@ -141,13 +153,12 @@ class OptionListComponent(MediatorComponent, Frame):
         """Adds an OptionMenu to this component"""
 
         omc = OptionMenuComponent(self._menu_frame, self._mediator)
+        omc.set_selection(self._options)
         self._menu_components.append(omc)
 
         om = omc.get_widget()
         om.pack(anchor="n")
 
-        self._mediator.update_selection(())
-
     def remove_option_menu(self) -> None:
         """Removes an OptionMenu from this component"""
         if self._menu_components:
@@ -156,6 +167,8 @@ class OptionListComponent(MediatorComponent, Frame):
             om = omc.get_widget()
             om.pack_forget()
 
+            self._mediator.update_selection(())
+
     def reset_selection(self) -> None:
         """Sets the all option menu variables to an empty string and removes additional OptionMenus
         """
@@ -166,6 +179,7 @@ class OptionListComponent(MediatorComponent, Frame):
 
     def set_selection(self, data: list) -> None:
         """Restricts the selection of all children OptionMenus to the same data"""
+        self._options = data
         for om in self._menu_components:
             om.set_selection(data)
 
@@ -183,6 +197,185 @@ class OptionListComponent(MediatorComponent, Frame):
         return tuple(om.get_selected() for om in self._menu_components)
 
 
+class SearchComponent(MediatorComponent, Frame):
+    """WidgetMediator component for choosing one of many options by typing: the options matching
+    the text typed so far are listed under it, and clicking one (or pressing Enter for the first)
+    selects it. Unlike an OptionMenu, only MAX_MATCHES options are ever shown, so the widget stays
+    responsive however many options there are.
+    """
+    # Private Attributes:
+    #   - _var: the text typed in the entry
+    #   - _entry: the entry the user types in
+    #   - _list: the list of the options matching the typed text
+    #   - _index: the index of the options that can be selected
+    #   - _selected: the selected option, or an empty string if none is
+    #   - _mediator: the mediator to notify a selection has been made to update other colleages
+
+    _var: StringVar
+    _entry: Entry
+    _list: Listbox
+    _index: SearchIndex
+    _selected: str
+
+    _mediator: MenuMediator
+
+    def __init__(self, parent: Widget, mediator: MenuMediator) -> None:
+        super().__init__(parent)
+        self._mediator = mediator
+        self._index = SearchIndex([])
+        self._selected = ""
+
+        self._var = StringVar(self)
+        self._entry = Entry(self, textvariable=self._var)
+        self._entry.pack(fill="x")
+        self._list = Listbox(self, height=MAX_MATCHES, exportselection=False)
+        self._list.pack(fill="x")
+
+        self._var.trace_add("write", lambda *_: self._show_matches())
+        self._list.bind("<<ListboxSelect>>", lambda _: self._choose_highlighted())
+        self._entry.bind("<Return>", lambda _: self._choose_first())
+
+    def reset_selection(self) -> None:
+        """Clears the typed text and the selection"""
+        self._selected = ""
+        self._var.set("")
+
+    def set_selection(self, data: list) -> None:
+        """Sets the options that can be selected to data"""
+        self._index = SearchIndex(str(option) for option in data)
+        self._show_matches()
+
+    def get_widget(self) -> Widget:
+        """Return self which is the Frame composed of the entry and the list of matches"""
+        return self
+
+    def configure_menu(self, config: str, value: str) -> None:
+        """Configures the setting of the entry and the list of matches"""
+        self._entry[config] = value
+        self._list[config] = value
+
+    def get_selected(self) -> Any:
+        """Return the selected option, or an empty string if none is"""
+        return self._selected
+
+    def _show_matches(self) -> None:
+        """Lists the options matching the typed text, and selects the option it names, or no
+        option if it names none (such as when the entry is cleared)
+        """
+        text = self._var.get()
+        self._list.delete(0, "end")
+        self._list.insert("end", *self._index.matches(text))
+
+        named = self._index.find(text)
+        if named is None:
+            named = ""
+        if named != self._selected:
+            self._set_selected(named)
+
+    def _choose_highlighted(self) -> None:
+        highlighted = self._list.curselection()
+        if highlighted:
+            self._choose(self._list.get(highlighted[0]))
+
+    def _choose_first(self) -> None:
+        if self._list.size() > 0:
+            self._choose(self._list.get(0))
+
+    def _choose(self, option: str) -> None:
+        """Selects option, showing it in the entry"""
+        self._set_selected(option)
+        self._var.set(option)
+
+    def _set_selected(self, option: str) -> None:
+        self._selected = option
+        self._mediator.update_selection(())
+
+
+class SearchIndex:
+    """Index of names for finding the names matching typed text.
+
+    Names are compared normalized (see normalize), and every word of a name is indexed, so a name
+    is found by typing the beginning of any of its words. The index is a sorted list searched with
+    bisect, and the range matching the last text searched is remembered, so that each keystroke
+    extending it only searches within that range.
+
+    >>> index = SearchIndex(['W Kinzie St', 'Kinzie', '26th', '18TH', 'Kimball'])
+    >>> index.matches('ki')
+    ['Kimball', 'Kinzie', 'W Kinzie St']
+    >>> index.matches('  KINZ')
+    ['Kinzie', 'W Kinzie St']
+    >>> index.matches('18th'), index.find('w  kinzie st')
+    (['18TH'], 'W Kinzie St')
+    """
+    # Private Attributes:
+    #   - _names: the distinct names
+    #   - _keys: the normalized text from the start of each word of every name, in increasing order
+    #   - _entries: the (number of the word, index into _names) of every key, so names matching
+    #       from their first word come first
+    #   - _exact: the name with every normalized name
+    #   - _last: the last normalized text searched, and the range of keys starting with it
+
+    _names: list[str]
+    _keys: list[str]
+    _entries: list[tuple[int, int]]
+    _exact: dict[str, str]
+    _last: tuple[str, int, int]
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names = sorted(set(names), key=lambda name: (normalize(name), name))
+        self._exact = {}
+        indexed = []
+        for i, name in enumerate(self._names):
+            words = normalize(name).split(" ")
+            self._exact.setdefault(" ".join(words), name)
+            for w in range(len(words)):
+                indexed.append((" ".join(words[w:]), w, i))
+        indexed.sort()
+
+        self._keys = [key for key, _, _ in indexed]
+        self._entries = [(w, i) for _, w, i in indexed]
+        self._last = ("", 0, len(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the name that is text once normalized, or None if there is none"""
+        return self._exact.get(normalize(text))
+
+    def matches(self, text: str, limit: int = MAX_MATCHES) -> list[str]:
+        """Return at most limit names with a word starting with text, those starting with it
+        first, in order
+        """
+        key = normalize(text)
+        last, low, high = self._last
+        if not key.startswith(last):
+            low, high = 0, len(self._keys)
+        low = bisect_left(self._keys, key, low, high)
+        high = bisect_right(self._keys, key + "\U0010ffff", low, high)
+        self._last = (key, low, high)
+
+        entries = self._entries[low:high]
+        heapq.heapify(entries)
+        found, seen = [], set()
+        while entries and len(found) < limit:
+            _, i = heapq.heappop(entries)
+            if i not in seen:
+                seen.add(i)
+                found.append(self._names[i])
+        return found
+
+
+def normalize(name: str) -> str:
+    """Return name in the form names are compared in: case folded, with runs of whitespace
+    turned into single spaces and no whitespace at either end
+
+    >>> normalize('  W   KINZIE st ')
+    'w kinzie st'
+    """
+    return " ".join(name.casefold().split())
+
+
 ##############################################################################
 # Mediators
 ##############################################################################
@@ -233,26 +426,66 @@ class NullMediator(WidgetMediator):
 class MenuMediator(WidgetMediator):
     """Class for mediating a collection of input devices (Menus) that operate on a related
     set of data
+
+    Given a widget to schedule with, selections made in quick succession are coalesced into a
+    single update of the menus, run UPDATE_DELAY milliseconds after the last of them. Without one,
+    the menus are updated as soon as a selection is made. Either way, only the menus whose options
+    changed are given their new options.
+
+    >>> class Recorder(MediatorComponent):
+    ...     def __init__(self, selected: str) -> None:
+    ...         self.selected, self.given = selected, []
+    ...     def get_selected(self) -> str:
+    ...         return self.selected
+    ...     def set_selection(self, data: list) -> None:
+    ...         self.given.append(sorted(data))
+    ...     def configure_menu(self, config: str, value: str) -> None:
+    ...         return
+    >>> from guisupporter import DATA_HEADER
+    >>> rows = [(30, "A", "B", 1, time, day, "3", 41.8, -87.6, 41.8, -87.6)
+    ...         for day, time in [("1", "8"), ("1", "9"), ("2", "9")]]
+    >>> mm = MenuMediator(DATA_HEADER, rows)
+    >>> day, time, street = Recorder(""), Recorder(""), Recorder("")
+    >>> mm.add_component(day, "day menu", ("day",))
+    >>> mm.add_component(time, "time menu", ("time",))
+    >>> mm.add_component(street, "street menu", ("start point", "end point"))
+    >>> mm.update_selection(())
+    >>> day.selected = "1"
+    >>> mm.update_selection(())
+    >>> day.given, time.given, len(street.given)
+    ([['1', '2'], ['1']], [['8', '9']], 1)
     """
     # Private Attributes:
     #   - _data_titles: the titles each component is associated with
     #   - _components: the name of each component mapped to said component
     #   - _titles: all titles of the self._data
     #   - _data: the data used to mediate between colleagues
+    #   - _scheduler: the widget whose after method schedules updates, or None to update at once
+    #   - _pending: the id of the scheduled update, or None if none is scheduled
+    #   - _options: the set of the options each component was last given
 
     _data_titles: dict[MediatorComponent, tuple]
     _components: dict[str, MediatorComponent]
 
     _titles: tuple
-    _data: list[tuple]
+    _data: Sequence[tuple]
+
+    _scheduler: Optional[Widget]
+    _pending: Optional[str]
+    _options: dict[MediatorComponent, frozenset]
 
-    def __init__(self, titles: tuple, data: list[tuple]):
+    def __init__(self, titles: tuple, data: Sequence[tuple],
+                 scheduler: Optional[Widget] = None):
         self._titles = titles
         self._data = data
 
         self._data_titles = {}
         self._components = {}
 
+        self._scheduler = scheduler
+        self._pending = None
+        self._options = {}
+
     def add_component(self, mc: MediatorComponent, component_name: str, titles: tuple) -> None:
         """Adds a component associating it with its given name and titles"""
         self._data_titles[mc] = titles
@@ -295,46 +528,38 @@ class MenuMediator(WidgetMediator):
             mc.configure_menu(config, value)
 
     def update_selection(self, data: tuple) -> None:
-        """Updates all the options of the menus to display only valid selections"""
-        self.configure_menu("state", "disabled")
-        self._reset_all_menus()
-        self.configure_menu("state", "normal")
+        """Updates all the options of the menus to display only valid selections, after
+        UPDATE_DELAY milliseconds without another selection if there is a scheduler
+        """
+        if self._scheduler is None:
+            self._reset_all_menus()
+            return
+
+        if self._pending is not None:
+            self._scheduler.after_cancel(self._pending)
+        self._pending = self._scheduler.after(UPDATE_DELAY, self._reset_all_menus)
 
     def _reset_all_menus(self) -> None:
-        """Resets all OptionMenus to only display items that produce a valid selection"""
+        """Resets the OptionMenus whose valid options changed to only display items that produce
+        a valid selection
+        """
+        self._pending = None
 
-        filtered_option_rows = filter_data_from_selection(self._data, self._get_title_selection())
-        column_map = _map_title_to_column(self._titles, filtered_option_rows)
+        filtered = filter_data_from_selection(self._data, self._get_title_selection())
+        # the distinct values of every title, read once from its column
+        column_values = {}
         for mc, titles in self._data_titles.items():
-            mc.set_selection(_flatten([column_map[title] for title in titles]))
-
-
-def _create_column_lists(matrix: list[tuple]) -> list[list]:
-    """Return a list of sets such that each set is the set of all items in a column of the matrix
-    """
-
-    if len(matrix) == 0:
-        return []
-    else:
-        columns = len(matrix[0])
-        column_lists = [[] for _ in range(columns)]
-        for row in matrix:
-            for col, item in enumerate(row):
-                column_lists[col].append(item)
-
-        return column_lists
-
-
-def _map_title_to_column(titles: tuple, matrix: list[tuple]) -> dict[Any, list]:
-    """Return a dict mapping title to the respective column in the matrix
-
-    Preconditions:
-        - all(len(titles) == len(row) for row in matrix)
-    """
-
-    column_data = _create_column_lists(matrix)
-    return {title: column
-            for title, column in zip(titles, column_data)}
+            options = []
+            for title in titles:
+                if title in self._titles and title not in column_values:
+                    column_values[title] = distinct_values(filtered, title)
+                options.extend(column_values.get(title, []))
+            option_set = frozenset(options)
+            if self._options.get(mc) != option_set:
+                self._options[mc] = option_set
+                mc.configure_menu("state", "disabled")
+                mc.set_selection(options)
+                mc.configure_menu("state", "normal")
 
 
 def _flatten(obj: Any) -> list:
@@ -0,0 +1,505 @@
+"""
+CSC111 Project: overlay.py
+
+Module Description
+==================
+
+Module for routing with a multilevel partition overlay, in the style of Customizable Route
+Planning. The street network keeps the same topology in every time slice and only its weights
+change, so the work is split in two:
+
+    - Partition: done once from the topology. The checkpoints are split into cells by recursive
+      coordinate bisection, at several levels of nested cells (small cells inside bigger ones).
+      The boundary vertices of a cell are the ones with an edge leaving it.
+    - Overlay (Partition.customize): done once for the weights of a time slice. For every cell,
+      from the smallest level up, the shortest distances between its boundary vertices through
+      the cell are computed (the cell's clique), using the cliques of the level below.
+
+A query then searches the original edges only inside the smallest cells holding its start and
+end, and otherwise jumps across whole cells with their cliques, at the highest level that does not
+contain the start or the end. The clique edges of the result are unpacked back into street
+segments by searching inside their cell again.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
+
+from graph import Graph
+from guisupporter import I_END, I_LENGTH, I_SPEED, I_START, load_graph_from_load_data
+from pathcalculator import Path, dijkstra, make_path
+
+# the largest number of checkpoints in a cell, from the smallest level of cells up
+DEFAULT_CELL_SIZES = (32, 256, 2048)
+
+# the number of routes of a time slice SliceOverlays answers with dijkstra before customizing an
+# overlay for it, since a customization costs as much as many dijkstra queries
+CUSTOMIZE_AFTER = 3
+
+# the most time slices SliceOverlays keeps the graphs, overlays and route counts of
+MAX_SLICES = 4
+
+# the kind of step taken along an original edge, other steps are clique edges of a level
+_EDGE = -1
+
+
+class Partition:
+    """A multilevel partition of the vertices of a street graph into nested cells
+
+    >>> from syntheticgraph import corridor_grid
+    >>> g = corridor_grid(8, 8, checkpoints=1)
+    >>> partition = Partition(g, cell_sizes=(8, 32))
+    >>> partition.levels()
+    2
+    >>> overlay = partition.customize(graph_weights(g))
+    >>> from pathcalculator import dijkstra
+    >>> path = overlay.query('I0_0', 'I7_7')
+    >>> round(path.get_path_weight(), 9) == round(dijkstra(g, 'I0_0', 'I7_7').get_path_weight(), 9)
+    True
+    >>> list(path)[:3]
+    ['I0_0', 'C0_0N0', 'I1_0']
+    """
+    # Private Instance Attributes:
+    #   - _items: the item of every vertex, which are numbered in this order
+    #   - _index: the number of every vertex item
+    #   - _neighbours: the numbers of the neighbours of every vertex in the topology
+    #   - _cells: the cell of every vertex at every level, where level 0 has the smallest cells
+    #   - _members: the vertices of every cell of level 0
+    #   - _subcells: the cells of the level below that make up every cell of each level above 0
+    #   - _boundary: the vertices of every cell of every level with an edge leaving the cell
+
+    _items: list
+    _index: dict[Any, int]
+    _neighbours: list[list[int]]
+    _cells: list[list[int]]
+    _members: dict[int, list[int]]
+    _subcells: list[dict[int, list[int]]]
+    _boundary: list[dict[int, list[int]]]
+
+    def __init__(self, g: Graph, cell_sizes: tuple[int, ...] = DEFAULT_CELL_SIZES) -> None:
+        """Partition the vertices of g, whose edges are the topology of every time slice.
+
+        Preconditions:
+            - all(cell_sizes[i] < cell_sizes[i + 1] for i in range(len(cell_sizes) - 1))
+            - cell_sizes[0] >= 1
+        """
+        self._items = sorted(g.get_all_vertices(), key=str)
+        self._index = {item: i for i, item in enumerate(self._items)}
+        self._neighbours = [[self._index[u.item] for u in g.get_vertex(item).neighbours]
+                            for item in self._items]
+        coordinates = [g.get_vertex(item).lat_and_long for item in self._items]
+
+        self._cells = _bisect(coordinates, cell_sizes)
+
+        self._members = {}
+        for v, cell in enumerate(self._cells[0]):
+            self._members.setdefault(cell, []).append(v)
+
+        self._subcells = [{}]
+        for level in range(1, len(cell_sizes)):
+            subcells = {}
+            for v in range(len(self._items)):
+                subcells.setdefault(self._cells[level][v], set()).add(self._cells[level - 1][v])
+            self._subcells.append({cell: sorted(cells) for cell, cells in subcells.items()})
+
+        self._boundary = []
+        for cells in self._cells:
+            boundary = {}
+            for v, neighbours in enumerate(self._neighbours):
+                if any(cells[u] != cells[v] for u in neighbours):
+                    boundary.setdefault(cells[v], []).append(v)
+            self._boundary.append(boundary)
+
+    def levels(self) -> int:
+        """Return the number of levels of cells"""
+        return len(self._cells)
+
+    def get_items(self) -> list:
+        """Return the items of the partitioned vertices"""
+        return self._items
+
+    def index_of(self, item: Any) -> int:
+        """Return the number of the vertex item.
+        Raise a ValueError if item is not a partitioned vertex.
+        """
+        if item not in self._index:
+            raise ValueError
+        return self._index[item]
+
+    def item_at(self, v: int) -> Any:
+        """Return the item of the vertex numbered v"""
+        return self._items[v]
+
+    def cells(self, level: int) -> list[int]:
+        """Return the cell of every vertex, by number, at the given level"""
+        return self._cells[level]
+
+    def cell_of(self, item: Any, level: int) -> int:
+        """Return the cell containing item at the given level.
+        Raise a ValueError if item is not a partitioned vertex.
+        """
+        return self._cells[level][self.index_of(item)]
+
+    def customize(self, weights: dict[tuple[Any, Any], float]) -> Overlay:
+        """Return the Overlay of this partition for the given weights, which map the (item1,
+        item2) of every edge of the time slice, in both directions, to its weight. Edges of the
+        topology missing from weights are not in the time slice.
+        """
+        adjacency = []
+        for v, neighbours in enumerate(self._neighbours):
+            item = self._items[v]
+            adjacency.append([(u, weights[(item, self._items[u])]) for u in neighbours
+                              if (item, self._items[u]) in weights])
+
+        overlay = Overlay(self, adjacency)
+        for level in range(self.levels()):
+            for cell, boundary in self._boundary[level].items():
+                for v in boundary:
+                    distances, _ = overlay.search_cell(level, cell, v, set(boundary))
+                    overlay.set_clique(level, v, {u: distances[u] for u in boundary
+                                                  if u != v and u in distances})
+        return overlay
+
+
+class Overlay:
+    """The cliques of every cell of a Partition for the weights of one time slice"""
+    # Private Instance Attributes:
+    #   - _partition: the partition this overlay customizes
+    #   - _adjacency: the (neighbour, weight) of every edge of each vertex in the time slice
+    #   - _cliques: the distance through its cell from every boundary vertex to the other
+    #       boundary vertices of its cell, at every level
+
+    _partition: Partition
+    _adjacency: list[list[tuple[int, float]]]
+    _cliques: list[dict[int, dict[int, float]]]
+
+    def __init__(self, partition: Partition, adjacency: list[list[tuple[int, float]]]) -> None:
+        self._partition = partition
+        self._adjacency = adjacency
+        self._cliques = [{} for _ in range(partition.levels())]
+
+    def set_clique(self, level: int, v: int, distances: dict[int, float]) -> None:
+        """Set the distances from the boundary vertex numbered v to the other boundary vertices of
+        its cell at the given level
+        """
+        self._cliques[level][v] = distances
+
+    def query(self, start: Any, end: Any) -> Path:
+        """Return the Path containing the smallest cumulative weight from start to end.
+        Raise a ValueError if start or end is not a partitioned vertex.
+        """
+        s, t = self._partition.index_of(start), self._partition.index_of(end)
+
+        distances = {s: 0.0}
+        previous = {s: (s, _EDGE, 0.0)}
+        settled = set()
+        heap = [(0.0, s)]
+        while heap:
+            distance, v = heapq.heappop(heap)
+            if v in settled:
+                continue
+            settled.add(v)
+            if v == t:
+                break
+
+            for u, weight, kind in self._query_steps(v, s, t):
+                if u not in settled and distance + weight < distances.get(u, float('inf')):
+                    distances[u] = distance + weight
+                    previous[u] = (v, kind, weight)
+                    heapq.heappush(heap, (distance + weight, u))
+
+        if t not in settled:
+            return make_path([], [])
+
+        steps = []
+        v = t
+        while v != s:
+            u, kind, weight = previous[v]
+            steps.append((u, v, kind, weight))
+            v = u
+        steps.reverse()
+
+        items, weights = [start], []
+        for u, v, kind, weight in steps:
+            for _, w, edge_weight in self._unpack(u, v, kind, weight):
+                items.append(self._partition.item_at(w))
+                weights.append(edge_weight)
+        return make_path(items, weights)
+
+    def search_cell(self, level: int, cell: int, source: int,
+                    targets: set[int]) -> tuple[dict[int, float], dict[int, tuple]]:
+        """Return the distances from source to the vertices reached by a search inside cell at
+        the given level that stops once every target is reached, and the (previous vertex, kind
+        of step, weight) of every one of them.
+
+        At level 0 the search follows the original edges inside the cell, and at the levels above
+        it follows the cliques of the cells of the level below and the edges between them.
+        """
+        cells = self._partition.cells(level)
+        distances = {source: 0.0}
+        previous = {}
+        settled = set()
+        remaining = set(targets)
+        heap = [(0.0, source)]
+        while heap and remaining:
+            distance, v = heapq.heappop(heap)
+            if v in settled:
+                continue
+            settled.add(v)
+            remaining.discard(v)
+
+            for u, weight, kind in self._cell_steps(level, v):
+                if cells[u] == cell and u not in settled \
+                        and distance + weight < distances.get(u, float('inf')):
+                    distances[u] = distance + weight
+                    previous[u] = (v, kind, weight)
+                    heapq.heappush(heap, (distance + weight, u))
+
+        return {v: distances[v] for v in settled}, previous
+
+    def _cell_steps(self, level: int, v: int) -> list[tuple[int, float, int]]:
+        """Return the (vertex, weight, kind of step) of every step from v inside its cell at the
+        given level
+        """
+        if level == 0:
+            return [(u, weight, _EDGE) for u, weight in self._adjacency[v]]
+
+        below = self._partition.cells(level - 1)
+        steps = [(u, weight, level - 1)
+                 for u, weight in self._cliques[level - 1].get(v, {}).items()]
+        steps.extend((u, weight, _EDGE) for u, weight in self._adjacency[v] if below[u] != below[v])
+        return steps
+
+    def _query_steps(self, v: int, s: int, t: int) -> list[tuple[int, float, int]]:
+        """Return the (vertex, weight, kind of step) of every step from v of a query from s to t,
+        using the cliques of the highest level at which the cell of v holds neither s nor t
+        """
+        level = self._query_level(v, s, t)
+        if level is None:
+            return [(u, weight, _EDGE) for u, weight in self._adjacency[v]]
+
+        cells = self._partition.cells(level)
+        steps = [(u, weight, level) for u, weight in self._cliques[level].get(v, {}).items()]
+        steps.extend((u, weight, _EDGE) for u, weight in self._adjacency[v]
+                     if cells[u] != cells[v])
+        return steps
+
+    def _query_level(self, v: int, s: int, t: int) -> Optional[int]:
+        """Return the highest level at which the cell of v holds neither s nor t, or None if
+        there is none
+        """
+        for level in range(self._partition.levels() - 1, -1, -1):
+            cells = self._partition.cells(level)
+            if cells[v] != cells[s] and cells[v] != cells[t]:
+                return level
+        return None
+
+    def _unpack(self, u: int, v: int, kind: int, weight: float) -> list[tuple[int, int, float]]:
+        """Return the (from, to, weight) of every original edge along the step from u to v"""
+        if kind == _EDGE:
+            return [(u, v, weight)]
+
+        cell = self._partition.cells(kind)[u]
+        _, previous = self.search_cell(kind, cell, u, {v})
+        steps = []
+        w = v
+        while w != u:
+            x, step_kind, step_weight = previous[w]
+            steps.append((x, w, step_kind, step_weight))
+            w = x
+
+        edges = []
+        for x, w, step_kind, step_weight in reversed(steps):
+            edges.extend(self._unpack(x, w, step_kind, step_weight))
+        return edges
+
+
+class SliceOverlays:
+    """The graphs and overlays of the time slices of a dataset. The overlays share one partition
+    of the streets of the whole dataset, so switching to a new time slice only costs a
+    customization.
+
+    Only the MAX_SLICES time slices used most recently are kept, and the rows and graph of a time
+    slice are only built once while it is kept. route answers the first CUSTOMIZE_AFTER routes of
+    a time slice with dijkstra, so a time slice that is only routed in a few times never pays for
+    the partition or a customization.
+
+    >>> from syntheticgraph import corridor_grid
+    >>> g = corridor_grid(4, 4, checkpoints=1)
+    >>> rows = [('10', item, u.item, str(10 * weight), '17', '4', '3', '0', '0', '0', '0')
+    ...         for item in g.get_all_vertices()
+    ...         for u, weight in g.get_vertex(item).neighbours.items()]
+    >>> overlays = SliceOverlays(rows, lambda key: rows, cell_sizes=(4, 8))
+    >>> weights = [round(overlays.route('17', 'I0_0', 'I3_3').get_path_weight(), 9)
+    ...            for _ in range(CUSTOMIZE_AFTER + 1)]
+    >>> len(set(weights)), overlays.customized('17')
+    (1, True)
+    >>> overlays.get_graph('17') is overlays.get_graph('17')
+    True
+    """
+    # Private Instance Attributes:
+    #   - _data: the rows of the whole dataset
+    #   - _select: returns the rows of the time slice identified by a key
+    #   - _cell_sizes: the cell sizes of the partition
+    #   - _partition: the partition of the streets of the whole dataset, or None until the first
+    #       overlay is needed
+    #   - _slices: the time slices used most recently, from the least recently used
+
+    _data: Sequence[tuple]
+    _select: Callable[[Any], Sequence[tuple]]
+    _cell_sizes: tuple[int, ...]
+    _partition: Optional[Partition]
+    _slices: OrderedDict[Any, _TimeSlice]
+
+    def __init__(self, data: Sequence[tuple], select: Callable[[Any], Sequence[tuple]],
+                 cell_sizes: tuple[int, ...] = DEFAULT_CELL_SIZES) -> None:
+        self._data = data
+        self._select = select
+        self._cell_sizes = cell_sizes
+        self._partition = None
+        self._slices = OrderedDict()
+
+    def get_graph(self, key: Any) -> Graph:
+        """Return the graph of the time slice identified by key"""
+        time_slice = self._use(key)
+        if time_slice.graph is None:
+            time_slice.graph = load_graph_from_load_data(time_slice.rows)
+        return time_slice.graph
+
+    def get_overlay(self, key: Any) -> Overlay:
+        """Return the overlay of the time slice identified by key"""
+        time_slice = self._use(key)
+        if time_slice.overlay is None:
+            if self._partition is None:
+                self._partition = Partition(load_graph_from_load_data(self._data),
+                                            self._cell_sizes)
+            time_slice.overlay = self._partition.customize(row_weights(time_slice.rows))
+        return time_slice.overlay
+
+    def route(self, key: Any, start: Any, end: Any) -> Path:
+        """Return the shortest Path from start to end in the time slice identified by key, with
+        its overlay once it has been routed in CUSTOMIZE_AFTER times and with dijkstra on its
+        graph before that
+        """
+        time_slice = self._use(key)
+        time_slice.routes += 1
+        if time_slice.overlay is None and time_slice.routes <= CUSTOMIZE_AFTER:
+            return dijkstra(self.get_graph(key), start, end)
+        return self.get_overlay(key).query(start, end)
+
+    def customized(self, key: Any) -> bool:
+        """Return whether the overlay of the time slice identified by key is kept"""
+        return key in self._slices and self._slices[key].overlay is not None
+
+    def _use(self, key: Any) -> _TimeSlice:
+        """Return the time slice identified by key, making it the most recently used and
+        forgetting the least recently used time slice if there are more than MAX_SLICES
+        """
+        if key in self._slices:
+            self._slices.move_to_end(key)
+        else:
+            self._slices[key] = _TimeSlice(self._select(key))
+            if len(self._slices) > MAX_SLICES:
+                self._slices.popitem(last=False)
+        return self._slices[key]
+
+
+class _TimeSlice:
+    """What SliceOverlays keeps of a time slice
+
+    Instance Attributes:
+        - rows: the rows of the time slice
+        - graph: the graph of the rows, or None until it is needed
+        - routes: the number of routes answered in the time slice
+        - overlay: the overlay of the time slice, or None until it is customized
+    """
+    rows: Sequence[tuple]
+    graph: Optional[Graph]
+    routes: int
+    overlay: Optional[Overlay]
+
+    def __init__(self, rows: Sequence[tuple]) -> None:
+        self.rows = rows
+        self.graph = None
+        self.routes = 0
+        self.overlay = None
+
+
+def graph_weights(g: Graph) -> dict[tuple[Any, Any], float]:
+    """Return the weight of every edge of g, in both directions, for Partition.customize"""
+    weights = {}
+    for item in g.get_all_vertices():
+        for u, weight in g.get_vertex(item).neighbours.items():
+            weights[(item, u.item)] = weight
+    return weights
+
+
+def row_weights(rows: Sequence[tuple]) -> dict[tuple[Any, Any], float]:
+    """Return the weight of the edge of every row, in both directions, for Partition.customize.
+    Like Graph.add_edge, a later row replaces the weight of an earlier row with the same streets.
+
+    >>> row_weights([('20', 'A', 'B', '2', '17', '4', '3', '0', '0', '0', '1')])
+    {('A', 'B'): 0.1, ('B', 'A'): 0.1}
+    """
+    weights = {}
+    for row in rows:
+        weight = float(row[I_LENGTH]) / float(row[I_SPEED])
+        weights[(row[I_START], row[I_END])] = weight
+        weights[(row[I_END], row[I_START])] = weight
+    return weights
+
+
+def _bisect(coordinates: list[tuple[float, float]],
+            cell_sizes: tuple[int, ...]) -> list[list[int]]:
+    """Return the cell of every point at every level, found by recursively splitting the points
+    in half at the median of their widest coordinate. A cell of a level is the largest part of
+    the splitting that has at most cell_sizes[level] points, so cells are nested.
+    """
+    cells = [[0] * len(coordinates) for _ in cell_sizes]
+    counts = [0] * len(cell_sizes)
+
+    # every part is (its points, the cell it is in at every level or -1 if not decided yet)
+    stack = [(list(range(len(coordinates))), [-1] * len(cell_sizes))]
+    while stack:
+        points, assigned = stack.pop()
+        assigned = list(assigned)
+        for level, size in enumerate(cell_sizes):
+            if assigned[level] == -1 and len(points) <= size:
+                assigned[level] = counts[level]
+                counts[level] += 1
+
+        if assigned[0] != -1:
+            for level, cell in enumerate(assigned):
+                for p in points:
+                    cells[level][p] = cell
+            continue
+
+        spreads = [max(coordinates[p][axis] for p in points)
+                   - min(coordinates[p][axis] for p in points) for axis in (0, 1)]
+        axis = 0 if spreads[0] >= spreads[1] else 1
+        points.sort(key=lambda p: coordinates[p][axis])
+        middle = len(points) // 2
+        stack.append((points[:middle], assigned))
+        stack.append((points[middle:], assigned))
+
+    return cells
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['heapq', 'collections.abc', 'graph', 'guisupporter', 'pathcalculator'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -17,11 +17,13 @@ This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik
 from __future__ import annotations
 
 from abc import ABC
-from typing import Any
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple, Optional
 from collections.abc import Iterable, Iterator
 
 import heapq
 from graph import Graph
+from priorityqueue import DEFAULT_QUEUE, make_queue
 
 #############################################################################
 # PUBLIC INTERFACE
@@ -49,19 +51,26 @@ def get_shortest_path_map(g: Graph,
     for point in points:
         shortest_map[point] = {}
 
+    for item in [start, end] + list(points):
+        g.prepare_endpoint(item)
+
+    # every path starts at start or at one of points
+    from allpairs import all_pairs
+    paths = all_pairs(g, len(points) + 1)
+
     for point in points:
         for other in points:
             if other != point:
-                shortest_path = _dijkstra(g, point, other)
+                shortest_path = paths.path(point, other)
                 reverse = shortest_path.get_reversed()
 
                 shortest_map[point][other] = shortest_path
                 shortest_map[other][point] = reverse
 
-        from_start = _dijkstra(g, start, point)
+        from_start = paths.path(start, point)
         shortest_map[start][point] = from_start
 
-        to_end = _dijkstra(g, point, end)
+        to_end = paths.path(point, end)
         shortest_map[point][end] = to_end
 
     return shortest_map
@@ -108,9 +117,367 @@ def get_shortest_graph(g: Graph, start: Any, end: Any, points: list) -> Graph:
     return convert_shortest_map_to_graph(shortest_map)
 
 
-def dijkstra(g: Graph, start: Any, end: Any) -> Path:
-    """Return the Path containing the smallest cumulative weight from point a to b"""
-    return _dijkstra(g, start, end)
+def dijkstra(g: Graph, start: Any, end: Any, queue: str = DEFAULT_QUEUE) -> Path:
+    """Return the Path containing the smallest cumulative weight from point a to b
+
+    start and end may also be (latitude, longitude) tuples, which are snapped to the closest
+    vertex of g.
+    queue names the kind of priority queue the search uses, one of priorityqueue.QUEUES.
+    Raise a ValueError if start or end is neither a vertex item of g nor a location, or if there
+    is no such kind of queue.
+    """
+    return _expanded(g, _dijkstra(g, snap(g, start), snap(g, end), queue))
+
+
+def batch_dijkstra(g: Graph, queries: list[tuple[Any, Any]],
+                   queue: str = DEFAULT_QUEUE) -> list[Path]:
+    """Return the Path with the smallest cumulative weight for every (start, end) query, in the
+    order of queries.
+
+    Queries are grouped by their start, and a single search is run from every distinct start
+    until all the ends asked for from it are reached. Every path is then read from the
+    predecessors found by that search.
+    Locations are snapped as in dijkstra.
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 2)
+    >>> paths = batch_dijkstra(g, [('A', 'C'), ('B', 'D'), ('A', 'B')])
+    >>> [list(path) for path in paths]
+    [['A', 'B', 'C'], [], ['A', 'B']]
+    """
+    snapped = [(snap(g, start), snap(g, end)) for start, end in queries]
+    targets = {}
+    for start, end in snapped:
+        targets.setdefault(start, set()).add(end)
+
+    paths = {}
+    for start, ends in targets.items():
+        previous = _search_until_settled(g, start, ends, queue)
+        for end in ends:
+            paths[(start, end)] = _expanded(g, _path_from_previous(previous, start, end))
+
+    return [paths[query] for query in snapped]
+
+
+def time_dependent_dijkstra(g: Graph, cube: Any, start: Any, end: Any,
+                            departure: datetime) -> tuple[Path, Optional[datetime]]:
+    """Return the quickest Path from start to end when leaving start at departure, and the time
+    of arrival at end (None if end cannot be reached).
+
+    The weight of every edge is the travel time recorded in cube (a speedcube.SpeedCube) for the
+    hour, day and month at which the edge is reached. Edges missing from cube keep their weight
+    in g. Waiting at a vertex for the next hour is allowed when it gets to the next vertex sooner,
+    which keeps the travel times first-in-first-out so the search stays exact.
+    The weights of the returned Path are travel times in hours, including any waiting.
+    Raise a ValueError if g is a contraction.ContractedGraph, whose contracted edges are not
+    street segments with speeds in cube.
+    """
+    from contraction import ContractedGraph
+    if isinstance(g, ContractedGraph):
+        raise ValueError
+
+    start, end = snap(g, start), snap(g, end)
+
+    p_start = _PathNode(start, 0)
+    settled = set()
+    arrivals = {start: 0.0}
+    heap = [(0.0, 0, p_start)]
+    pushed = 1
+
+    while heap != []:
+        elapsed, _, p = heapq.heappop(heap)
+        v = p.get_item()
+        if v in settled:
+            continue
+        settled.add(v)
+
+        if v == end:
+            return p.get_reversed(), departure + timedelta(hours=elapsed)
+
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            u = neighbour_vertex.item
+            if u in settled:
+                continue
+
+            if (v, u) in cube:
+                arrival = _fifo_arrival(cube, v, u, departure, elapsed)
+            else:
+                arrival = elapsed + weight
+
+            if arrival < arrivals.get(u, float('inf')):
+                arrivals[u] = arrival
+                heapq.heappush(heap, (arrival, pushed, _PathNode(u, arrival - elapsed, p)))
+                pushed += 1
+
+    return _NullPathNode(), None
+
+
+def k_shortest_paths(g: Graph, start: Any, end: Any, k: int) -> list[Path]:
+    """Return up to k loopless Paths from start to end in increasing order of weight, using
+    Yen's algorithm
+
+    The tree of shortest paths to end is computed once. A spur path is read straight from the
+    tree when the tree path avoids every removed vertex and edge, and is otherwise searched for
+    with A*, using the distances in the tree (which can only be shorter) as the estimate.
+    """
+    start, end = snap(g, start), snap(g, end)
+    distances, next_hops = _shortest_path_tree(g, end)
+    if start not in distances or k <= 0:
+        return []
+
+    found = [_tree_path(next_hops, start)]
+    candidates = []
+    seen = {tuple(found[0])}
+    pushed = 0
+
+    while len(found) < k:
+        previous = found[-1]
+        for i in range(len(previous) - 1):
+            spur, root = previous[i], previous[:i + 1]
+            removed_edges = {frozenset((path[i], path[i + 1])) for path in found
+                             if path[:i + 1] == root}
+            removed_vertices = set(root[:-1])
+
+            spur_path = _spur_path(g, distances, next_hops, spur, end, removed_vertices,
+                                   removed_edges)
+            if spur_path is None:
+                continue
+
+            candidate = root[:-1] + spur_path
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (_items_weight(g, candidate), pushed, candidate))
+                pushed += 1
+
+        if candidates == []:
+            break
+        found.append(heapq.heappop(candidates)[2])
+
+    return [_path_from_items(g, g.expand_path(items)) for items in found]
+
+
+def make_path(items: list, weights: list[float]) -> Path:
+    """Return the Path through items in order, where weights[i] is the weight of the edge between
+    items[i] and items[i + 1]. An empty list of items gives the Path of no path found.
+
+    >>> path = make_path(['A', 'B', 'C'], [0.5, 0.25])
+    >>> list(path), path.get_path_weight()
+    (['A', 'B', 'C'], 0.75)
+
+    Preconditions:
+        - len(items) == 0 or len(weights) == len(items) - 1
+    """
+    if len(items) == 0:
+        return _NullPathNode()
+
+    node = _PathNode(items[-1], 0)
+    for i in range(len(items) - 2, -1, -1):
+        node = _PathNode(items[i], weights[i], node)
+    return node
+
+
+def snap(g: Graph, location: Any) -> Any:
+    """Return location if it is a vertex item of g, otherwise treat it as a (latitude, longitude)
+    pair and return the item of the vertex of g closest to it.
+    The returned item is prepared to be the start or end of a search with g.prepare_endpoint.
+    """
+    if g.check_in(location):
+        item = location
+    elif isinstance(location, tuple) and len(location) == 2:
+        item = g.nearest_vertex(float(location[0]), float(location[1]))
+    else:
+        raise ValueError
+
+    g.prepare_endpoint(item)
+    return item
+
+
+class Reachable(NamedTuple):
+    """The vertices reached by a search bounded by a travel time budget, as parallel arrays
+
+    Instance Attributes:
+        - items: the item of every reached vertex, in increasing order of travel time
+        - times: the travel time to each item from the closest origin
+        - origins: the index (into the origins searched from) of the closest origin of each item
+        - coordinates: the (latitude, longitude) of each item
+    """
+    items: list
+    times: Any
+    origins: Any
+    coordinates: Any
+
+
+def reachable_within(g: Graph, start: Any, budget: float) -> Reachable:
+    """Return the vertices of g that can be reached from start with a travel time of at most
+    budget, in the units of the edge weights of g (hours for the graphs of the dataset, so ten
+    minutes is a budget of 10 / 60).
+
+    start may also be a (latitude, longitude) tuple, as in dijkstra.
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 2)
+    >>> g.add_edge('C', 'D', 10, 5)
+    >>> reached = reachable_within(g, 'A', 0.5)
+    >>> reached.items
+    ['A', 'B', 'C']
+    >>> [round(time, 2) for time in reached.times.tolist()]
+    [0.0, 0.1, 0.3]
+    """
+    return reachable_from_any(g, [start], budget)
+
+
+def reachable_from_any(g: Graph, starts: list, budget: float) -> Reachable:
+    """Return the vertices of g that can be reached from any of starts with a travel time of at
+    most budget, with the travel time from, and the index of, the closest start of each.
+
+    Every start is put in the same heap, so this is a single search no matter how many starts
+    there are. In a graph that leaves vertices out (contraction.ContractedGraph), the left out
+    vertices are reached along the edge they were contracted into.
+
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> g.add_edge('A', 'B', 10, 1)
+    >>> g.add_edge('B', 'C', 10, 2)
+    >>> g.add_edge('C', 'D', 10, 5)
+    >>> reached = reachable_from_any(g, ['A', 'D'], 0.15)
+    >>> reached.items
+    ['A', 'D', 'B']
+    >>> reached.origins.tolist()
+    [0, 1, 0]
+    >>> from contraction import ContractedGraph
+    >>> reachable_from_any(ContractedGraph(g), ['A', 'D'], 0.15).items
+    ['A', 'D', 'B']
+    """
+    import numpy as np
+
+    heap = []
+    for i, start in enumerate(starts):
+        heapq.heappush(heap, (0.0, i, snap(g, start), i))
+    pushed = len(heap)
+
+    best = {}
+    items, times, origins = [], [], []
+    while heap != []:
+        time, _, v, origin = heapq.heappop(heap)
+        if v in best:
+            continue
+        best[v] = time
+        items.append(v)
+        times.append(time)
+        origins.append(origin)
+
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            u = neighbour_vertex.item
+            if u not in best and time + weight <= budget:
+                heapq.heappush(heap, (time + weight, pushed, u, origin))
+                pushed += 1
+
+    # a graph that leaves vertices out reaches them along the edges they were contracted into,
+    # from one of the two ends of the edge
+    left_out = {}
+    for v, time, origin in zip(items, times, origins):
+        for neighbour_vertex in g.get_vertex(v).neighbours:
+            chain = g.expand_path([v, neighbour_vertex.item])
+            along = time
+            for previous, item in zip(chain, chain[1:-1]):
+                along += g.get_weight(previous, item)
+                if along > budget:
+                    break
+                if item not in left_out or along < left_out[item][0]:
+                    left_out[item] = (along, origin)
+    if left_out:
+        rows = sorted(list(zip(times, items, origins))
+                      + [(time, item, origin) for item, (time, origin) in left_out.items()],
+                      key=lambda row: row[0])
+        times, items, origins = (list(column) for column in zip(*rows))
+
+    latitudes, longitudes = g.get_all_lat_long(items)
+    return Reachable(items, np.array(times, dtype=float), np.array(origins, dtype=np.int64),
+                     np.column_stack((np.array(latitudes, dtype=float),
+                                      np.array(longitudes, dtype=float))))
+
+
+class RouteCache:
+    """Shortest paths of a graph that are remembered until a change to the graph's edges could
+    make them wrong.
+
+    When edges change, a remembered path is only forgotten if it uses a changed edge, or if a
+    changed edge became cheaper than it was and is cheaper than the whole remembered path.
+
+    >>> from contraction import ContractedGraph
+    >>> g = Graph()
+    >>> for street in ['A', 'B', 'C', 'D', 'E']:
+    ...     g.add_vertex(street, 41.8, -87.6)
+    >>> for street1, street2 in [('A', 'B'), ('B', 'C'), ('C', 'D'), ('C', 'E')]:
+    ...     g.add_edge(street1, street2, 10, 1)
+    >>> list(RouteCache(ContractedGraph(g)).dijkstra('A', 'D'))
+    ['A', 'B', 'C', 'D']
+    """
+    # Private Instance Attributes:
+    #   - _graph: the graph the paths are in
+    #   - _paths: the remembered shortest path of every (start, end), with every vertex the graph
+    #       left out put back (see Graph.expand_path)
+    #   - _edges: the edges of the graph used by the remembered path of every (start, end)
+    #   - _queries_using: the (start, end) queries whose path uses each edge
+
+    _graph: Graph
+    _paths: dict[tuple[Any, Any], Path]
+    _edges: dict[tuple[Any, Any], list[frozenset]]
+    _queries_using: dict[frozenset, set[tuple[Any, Any]]]
+
+    def __init__(self, g: Graph) -> None:
+        self._graph = g
+        self._paths = {}
+        self._edges = {}
+        self._queries_using = {}
+        g.add_listener(self._on_edges_changed)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def dijkstra(self, start: Any, end: Any) -> Path:
+        """Return the Path containing the smallest cumulative weight from start to end, reusing
+        the remembered path if there is one
+        """
+        query = (snap(self._graph, start), snap(self._graph, end))
+        if query not in self._paths:
+            path = _dijkstra(self._graph, *query)
+            items = list(path)
+            self._paths[query] = _expanded(self._graph, path)
+            self._edges[query] = [frozenset((items[i], items[i + 1]))
+                                  for i in range(len(items) - 1)]
+            for edge in self._edges[query]:
+                self._queries_using.setdefault(edge, set()).add(query)
+
+        return self._paths[query]
+
+    def close(self) -> None:
+        """Stop following the changes of the graph and forget every path"""
+        self._graph.remove_listener(self._on_edges_changed)
+        self._paths.clear()
+        self._edges.clear()
+        self._queries_using.clear()
+
+    def _on_edges_changed(self, changes: dict[tuple[Any, Any], tuple[float, float]]) -> None:
+        """Forget the paths that the changed edges could make wrong"""
+        stale = set()
+        for (item1, item2), (old_weight, new_weight) in changes.items():
+            stale.update(self._queries_using.get(frozenset((item1, item2)), ()))
+            if new_weight < old_weight:
+                stale.update(query for query, path in self._paths.items()
+                             if new_weight < _cached_weight(path))
+
+        for query in stale:
+            self._paths.pop(query)
+            for edge in self._edges.pop(query):
+                self._queries_using[edge].discard(query)
 
 
 class Path(Iterable):
@@ -149,44 +516,218 @@ class Path(Iterable):
 #############################################################################
 
 
-def _dijkstra(g: Graph, start: Any, end: Any) -> _Node:
-    """Return the _Node containing the smallest cumulative weight from point a to b"""
+def _dijkstra(g: Graph, start: Any, end: Any, queue: str = DEFAULT_QUEUE) -> _Node:
+    """Return the _Node containing the smallest cumulative weight from point a to b, searching
+    with the kind of priority queue named queue (see priorityqueue.QUEUES)
+    """
 
-    # starts at the end because the path is built in reverse order
-    item_end = end
-    p_end = _PathNode(item_end, 0)
+    # starts at the end so that following the next hops from start gives the path in order
+    distances = {end: 0.0}
+    next_hops = {}
+    settled_vertices = set()
 
-    visited_vertices = {item_end: p_end}
+    heap = make_queue(queue)
+    heap.push(0.0, end)
 
-    heap = [p_end]
+    # only keys and items are put in the queue, so it never has to compare paths
+    while len(heap) > 0:
 
-    def recursive_dijkstra() -> _Node:
-        """Recursively calls the dijkstra alg on the globally accessible heap"""
+        distance, v = heap.pop()
+        if v in settled_vertices:
+            continue
+        settled_vertices.add(v)
 
-        heap_is_not_empty = (heap != [])
-        if heap_is_not_empty:
+        end_of_path = (v == start)
+        if end_of_path:
+            return _path_from_next_hops(next_hops, start, end)
 
-            p = heapq.heappop(heap)
-            v = p.get_item()
-            visited_vertices[v] = p
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            u = neighbour_vertex.item
+            new_distance = distance + weight
+            if u not in settled_vertices and new_distance < distances.get(u, float('inf')):
+                distances[u] = new_distance
+                next_hops[u] = (v, weight)
+                heap.push(new_distance, u)
 
-            end_of_path = (v == start)
-            if end_of_path:
-                return p
+    return _NullPathNode()
 
-            for neighbour_vertex in g.get_neighbours(v):
-                u = neighbour_vertex.item
 
-                if u not in visited_vertices:
-                    weight = g.get_weight(u, v)
-                    next_path = _PathNode(u, weight, p)
-                    heapq.heappush(heap, next_path)
+def _search_until_settled(g: Graph, start: Any, targets: set,
+                          queue: str) -> dict[Any, tuple[Any, float]]:
+    """Return the (previous item, edge weight) on the shortest path from start to every vertex
+    settled by a search from start that stops once every item in targets is settled
+    """
+    distances = {start: 0.0}
+    previous = {start: (None, 0.0)}
+    settled_vertices = set()
+    remaining = set(targets)
+
+    heap = make_queue(queue)
+    heap.push(0.0, start)
+    while len(heap) > 0 and remaining:
+        distance, v = heap.pop()
+        if v in settled_vertices:
+            continue
+        settled_vertices.add(v)
+        remaining.discard(v)
+
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            u = neighbour_vertex.item
+            new_distance = distance + weight
+            if u not in settled_vertices and new_distance < distances.get(u, float('inf')):
+                distances[u] = new_distance
+                previous[u] = (v, weight)
+                heap.push(new_distance, u)
+
+    return {item: previous[item] for item in settled_vertices}
+
+
+def _path_from_previous(previous: dict[Any, tuple[Any, float]], start: Any, end: Any) -> _Node:
+    """Return the Path from start to end following the (previous item, edge weight) of every item
+    back from end, or a null path if end was not reached
+    """
+    if end not in previous:
+        return _NullPathNode()
 
-            return recursive_dijkstra()
-        else:
-            return _NullPathNode()
+    node = _PathNode(end, 0)
+    item = end
+    while item != start:
+        item, weight = previous[item][0], previous[item][1]
+        node = _PathNode(item, weight, node)
+    return node
 
-    return recursive_dijkstra()
+
+def _path_from_next_hops(next_hops: dict[Any, tuple[Any, float]], start: Any, end: Any) -> _Node:
+    """Return the Path from start to end following the (next item, edge weight) of every item"""
+    items, weights = [start], []
+    while items[-1] != end:
+        item, weight = next_hops[items[-1]]
+        items.append(item)
+        weights.append(weight)
+
+    return make_path(items, weights)
+
+
+def _fifo_arrival(cube: Any, item1: Any, item2: Any, departure: datetime, elapsed: float) -> float:
+    """Return the earliest number of hours after departure at which item2 can be reached from
+    item1, when item1 is reached elapsed hours after departure.
+
+    Leaving at a later hour boundary (after waiting) is considered, but only boundaries before
+    the best arrival so far can improve on it.
+    """
+    when = departure + timedelta(hours=elapsed)
+    best = elapsed + cube.travel_time_at(item1, item2, when)
+
+    next_hour = when.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    boundary = elapsed + (next_hour - when) / timedelta(hours=1)
+    while boundary < best:
+        best = min(best, boundary + cube.travel_time_at(item1, item2, next_hour))
+        next_hour += timedelta(hours=1)
+        boundary += 1
+
+    return best
+
+
+def _shortest_path_tree(g: Graph, root: Any) -> tuple[dict[Any, float], dict[Any, Any]]:
+    """Return the distance from every vertex item connected to root to root, and the next item
+    on the shortest path from each item to root
+    """
+    distances = {}
+    next_hops = {root: None}
+    heap = [(0.0, 0, root, None)]
+    pushed = 1
+    while heap != []:
+        distance, _, v, next_hop = heapq.heappop(heap)
+        if v in distances:
+            continue
+        distances[v] = distance
+        next_hops[v] = next_hop
+
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            if neighbour_vertex.item not in distances:
+                heapq.heappush(heap, (distance + weight, pushed, neighbour_vertex.item, v))
+                pushed += 1
+
+    return distances, next_hops
+
+
+def _tree_path(next_hops: dict[Any, Any], item: Any) -> list:
+    """Return the items along the tree from item to the root of the tree"""
+    items = [item]
+    while next_hops[items[-1]] is not None:
+        items.append(next_hops[items[-1]])
+    return items
+
+
+def _spur_path(g: Graph, distances: dict[Any, float], next_hops: dict[Any, Any], spur: Any,
+               end: Any, removed_vertices: set, removed_edges: set[frozenset]) -> Optional[list]:
+    """Return the items along the shortest path from spur to end that avoids removed_vertices
+    and removed_edges, or None if there is no such path.
+
+    distances and next_hops are the shortest path tree to end of the whole graph.
+    """
+    tree_path = _tree_path(next_hops, spur)
+    if all(tree_path[i] not in removed_vertices
+           and frozenset((tree_path[i], tree_path[i + 1])) not in removed_edges
+           for i in range(len(tree_path) - 1)):
+        # removing vertices and edges can not make the path shorter, so it is still the shortest
+        return tree_path
+
+    # A* search, the tree distances are a consistent estimate of the remaining distance
+    costs = {spur: 0.0}
+    parents = {spur: None}
+    settled = set()
+    heap = [(distances[spur], 0, spur)]
+    pushed = 1
+    while heap != []:
+        _, _, v = heapq.heappop(heap)
+        if v in settled:
+            continue
+        settled.add(v)
+        if v == end:
+            return _tree_path(parents, end)[::-1]
+
+        for neighbour_vertex, weight in g.get_vertex(v).neighbours.items():
+            u = neighbour_vertex.item
+            if u in settled or u in removed_vertices or u not in distances \
+                    or frozenset((v, u)) in removed_edges:
+                continue
+            cost = costs[v] + weight
+            if cost < costs.get(u, float('inf')):
+                costs[u] = cost
+                parents[u] = v
+                heapq.heappush(heap, (cost + distances[u], pushed, u))
+                pushed += 1
+
+    return None
+
+
+def _items_weight(g: Graph, items: list) -> float:
+    """Return the cumulative weight of the edges between consecutive items"""
+    return sum(g.get_weight(items[i], items[i + 1]) for i in range(len(items) - 1))
+
+
+def _path_from_items(g: Graph, items: list) -> _Node:
+    """Return the Path through the items of g in order"""
+    node = _PathNode(items[-1], 0)
+    for i in range(len(items) - 2, -1, -1):
+        node = _PathNode(items[i], g.get_weight(items[i], items[i + 1]), node)
+    return node
+
+
+def _expanded(g: Graph, path: _Node) -> _Node:
+    """Return path with every vertex that g left out put back, see Graph.expand_path"""
+    if len(path) == 0:
+        return path
+
+    items = list(path)
+    expanded = g.expand_path(items)
+    return path if len(expanded) == len(items) else _path_from_items(g, expanded)
+
+
+def _cached_weight(path: Path) -> float:
+    """Return the weight of path, which is infinite if no path was found"""
+    return path.get_path_weight() if len(path) > 0 else float('inf')
 
 
 def _get_all_points(shortest_map: dict[Any, dict[Any, Path]]) -> set[Any]:
@@ -336,7 +877,7 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'max-line-length': 100,
         'disable': ['E1136', 'E9971'],
-        'extra-imports': ['heapq', 'graph', 'abc'],
+        'extra-imports': ['heapq', 'graph', 'abc', 'priorityqueue'],
         'allowed-io': [],
         'max-nested-blocks': 5
 
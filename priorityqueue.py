@@ -0,0 +1,257 @@
+"""
+CSC111 Project: priorityqueue.py
+
+Module Description
+==================
+
+Module containing the priority queues the shortest path searches can be run with. Each one holds
+(key, value) pairs and pops the pair with the smallest key, but never compares values, so values
+can be anything (path nodes, items, ...). Pairs with equal keys are popped in the order they were
+pushed.
+
+    - BinaryHeap: a binary heap (heapq), which works for any keys.
+    - PairingHeap: a pairing heap, which pushes in constant time.
+    - RadixHeap: a monotone radix heap over the bits of the keys. Keys are travel times, which are
+      non-negative floats, and the bits of non-negative IEEE 754 doubles are ordered the same way
+      as the doubles themselves, so they can be bucketed by their highest bit differing from the
+      last popped key without ever comparing two keys. Like every monotone queue, it can only be
+      used when no key pushed is smaller than the last key popped, which holds for Dijkstra's
+      algorithm since edge weights are never negative.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import heapq
+import struct
+from collections import deque
+from typing import Any
+
+# the number of bits of an IEEE 754 double
+_BITS = 64
+
+_DOUBLE = struct.Struct('<d')
+_UNSIGNED = struct.Struct('<Q')
+
+
+class PriorityQueue:
+    """Interface for a queue of (key, value) pairs popped in increasing order of key"""
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def push(self, key: float, value: Any) -> None:
+        """Add value with the priority key"""
+        raise NotImplementedError
+
+    def pop(self) -> tuple[float, Any]:
+        """Remove and return the (key, value) pair with the smallest key
+
+        Preconditions:
+            - len(self) > 0
+        """
+        raise NotImplementedError
+
+
+class BinaryHeap(PriorityQueue):
+    """A PriorityQueue stored in a binary heap
+
+    >>> queue = BinaryHeap()
+    >>> for key, value in [(2.0, 'b'), (1.0, 'a'), (2.0, 'c')]:
+    ...     queue.push(key, value)
+    >>> [queue.pop() for _ in range(len(queue))]
+    [(1.0, 'a'), (2.0, 'b'), (2.0, 'c')]
+    """
+    # Private Instance Attributes:
+    #   - _heap: the (key, push number, value) of every pair, in heapq order
+    #   - _pushed: the number of pairs pushed so far, which orders pairs with equal keys
+
+    _heap: list[tuple[float, int, Any]]
+    _pushed: int
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._pushed = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, key: float, value: Any) -> None:
+        """Add value with the priority key"""
+        heapq.heappush(self._heap, (key, self._pushed, value))
+        self._pushed += 1
+
+    def pop(self) -> tuple[float, Any]:
+        """Remove and return the (key, value) pair with the smallest key"""
+        key, _, value = heapq.heappop(self._heap)
+        return key, value
+
+
+class PairingHeap(PriorityQueue):
+    """A PriorityQueue stored in a pairing heap
+
+    >>> queue = PairingHeap()
+    >>> for key, value in [(2.0, 'b'), (1.0, 'a'), (2.0, 'c'), (0.5, 'd')]:
+    ...     queue.push(key, value)
+    >>> [queue.pop() for _ in range(len(queue))]
+    [(0.5, 'd'), (1.0, 'a'), (2.0, 'b'), (2.0, 'c')]
+    """
+    # Private Instance Attributes:
+    #   - _root: the node with the smallest key, as a [key, push number, value, children] list,
+    #       or None if the heap is empty
+    #   - _size: the number of pairs in the heap
+    #   - _pushed: the number of pairs pushed so far, which orders pairs with equal keys
+
+    _root: Any
+    _size: int
+    _pushed: int
+
+    def __init__(self) -> None:
+        self._root = None
+        self._size = 0
+        self._pushed = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, key: float, value: Any) -> None:
+        """Add value with the priority key"""
+        node = [key, self._pushed, value, []]
+        self._pushed += 1
+        self._size += 1
+        self._root = node if self._root is None else _meld(self._root, node)
+
+    def pop(self) -> tuple[float, Any]:
+        """Remove and return the (key, value) pair with the smallest key"""
+        root = self._root
+        children = root[3]
+        self._size -= 1
+
+        # first pass: meld the children in pairs from left to right
+        paired = [_meld(children[i], children[i + 1]) for i in range(0, len(children) - 1, 2)]
+        if len(children) % 2 == 1:
+            paired.append(children[-1])
+
+        # second pass: meld the pairs together from right to left
+        new_root = None
+        for node in reversed(paired):
+            new_root = node if new_root is None else _meld(node, new_root)
+        self._root = new_root
+
+        return root[0], root[2]
+
+
+class RadixHeap(PriorityQueue):
+    """A monotone PriorityQueue bucketing non-negative float keys by their IEEE 754 bits
+
+    >>> queue = RadixHeap()
+    >>> for key, value in [(2.0, 'b'), (1.0, 'a'), (2.0, 'c')]:
+    ...     queue.push(key, value)
+    >>> queue.pop()
+    (1.0, 'a')
+    >>> queue.push(1.5, 'd')
+    >>> [queue.pop() for _ in range(len(queue))]
+    [(1.5, 'd'), (2.0, 'b'), (2.0, 'c')]
+    >>> queue.push(-0.0, 'e')
+    Traceback (most recent call last):
+    ...
+    ValueError
+    >>> queue = RadixHeap()
+    >>> queue.push(1.0, 'f')
+    >>> queue.push(-0.0, 'g')
+    >>> queue.pop()
+    (0.0, 'g')
+    """
+    # Private Instance Attributes:
+    #   - _buckets: the (key bits, key, value) of every pair, in push order, in the bucket
+    #       numbered by the position of the highest bit in which its key bits differ from _last
+    #       (0 if they are equal to _last)
+    #   - _last: the bits of the last key popped
+    #   - _size: the number of pairs in the heap
+
+    _buckets: list[deque[tuple[int, float, Any]]]
+    _last: int
+    _size: int
+
+    def __init__(self) -> None:
+        self._buckets = [deque() for _ in range(_BITS + 1)]
+        self._last = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, key: float, value: Any) -> None:
+        """Add value with the priority key.
+        Raise a ValueError if key is negative, NaN or smaller than the last key popped.
+        """
+        if not key >= 0:
+            raise ValueError
+        # -0.0 == 0, but its sign bit would make its bits larger than those of any positive key
+        key = key + 0.0
+        bits = _UNSIGNED.unpack(_DOUBLE.pack(key))[0]
+        if bits < self._last:
+            raise ValueError
+        self._buckets[(bits ^ self._last).bit_length()].append((bits, key, value))
+        self._size += 1
+
+    def pop(self) -> tuple[float, Any]:
+        """Remove and return the (key, value) pair with the smallest key"""
+        buckets = self._buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            # every pair of the first non-empty bucket is moved to a lower bucket once its
+            # smallest key becomes the last key
+            bucket, buckets[i] = buckets[i], deque()
+            last = min(entry[0] for entry in bucket)
+            for entry in bucket:
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+            self._last = last
+
+        self._size -= 1
+        # bucket 0 only holds keys equal to the last key, in push order
+        _, key, value = buckets[0].popleft()
+        return key, value
+
+
+QUEUES = {'binary': BinaryHeap, 'pairing': PairingHeap, 'radix': RadixHeap}
+
+DEFAULT_QUEUE = 'binary'
+
+
+def make_queue(name: str) -> PriorityQueue:
+    """Return a new empty priority queue of the kind named in QUEUES.
+    Raise a ValueError if there is no such kind of queue.
+    """
+    if name not in QUEUES:
+        raise ValueError('unknown priority queue ' + repr(name) + ', expected one of '
+                         + ', '.join(QUEUES))
+    return QUEUES[name]()
+
+
+def _meld(node1: list, node2: list) -> list:
+    """Return the root of the pairing heap made by joining the pairing heaps rooted at node1 and
+    node2
+    """
+    if (node2[0], node2[1]) < (node1[0], node1[1]):
+        node1, node2 = node2, node1
+    node1[3].append(node2)
+    return node1
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['heapq', 'struct'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
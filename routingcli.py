@@ -0,0 +1,280 @@
+"""
+CSC111 Project: routingcli.py
+
+Module Description
+==================
+
+Command line program for answering a batch of shortest path queries without the gui.
+
+    python routingcli.py transformed_final.csv queries.csv --time 17 --day 4 --month 3
+
+Every row of the queries csv is either
+    - start street, end street
+    - start latitude, start longitude, end latitude, end longitude
+Locations are snapped to the closest checkpoint of the graph in a single call to the spatial index.
+The results are written as csv rows of start, end, travel time and the ';' separated path, in
+the order of the queries, and the number of queries answered per second is reported on stderr.
+Queries that share a start are answered together by a single search from that start, which is
+run by scipy.sparse.csgraph when SciPy is installed (see csgraphbackend). With --workers 4 the
+queries are split by start between 4 processes that share the graph in shared memory.
+
+With --depart 2021-03-04T17:30 the routes are time-dependent instead: every street segment is
+travelled at the speed recorded for the hour it is reached, and the arrival time is added to every
+result row.
+
+With --cube speed_cube the weights are taken from a cube precomputed by speedcube.py instead of
+being computed from the dataset, so the dataset csv can be left out:
+
+    python routingcli.py queries.csv --cube speed_cube --time 17 --day 4 --month 3
+
+With --reachable 10 no routes are found: instead, the area reachable within 10 minutes of any of
+the starts of the queries is drawn on a map (reachable.html, or the file given with --map, which is
+GeoJSON if its name ends with .geojson), every checkpoint coloured by how long it takes to reach.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import argparse
+import csv
+import sys
+import time
+from datetime import datetime
+from typing import Any, Optional, TextIO
+
+from csgraphbackend import batch_paths, scipy_available
+from graph import Graph
+from guisupporter import load_data, load_table, load_graph_from_load_data, \
+    filter_data_from_selection
+from pathcalculator import reachable_from_any, time_dependent_dijkstra
+
+
+def read_queries(file: TextIO) -> list[tuple[Any, Any]]:
+    """Return the (start, end) pairs of the queries csv. Locations are returned as
+    (latitude, longitude) tuples and street names as strings.
+    """
+    queries = []
+    for row in csv.reader(file):
+        if len(row) == 0:
+            continue
+        elif len(row) == 4:
+            queries.append(((float(row[0]), float(row[1])), (float(row[2]), float(row[3]))))
+        elif len(row) == 2:
+            queries.append((row[0], row[1]))
+        else:
+            raise ValueError('a query must have either 2 streets or 4 coordinates: ' + str(row))
+
+    return queries
+
+
+def snap_queries(g: Graph, queries: list[tuple[Any, Any]]) -> list[tuple[Any, Any]]:
+    """Return the queries with every (latitude, longitude) location replaced by the item of the
+    closest vertex of g. All the locations are snapped together.
+    """
+    import numpy as np
+
+    locations = [point for query in queries for point in query if isinstance(point, tuple)]
+    if not locations:
+        return queries
+
+    snapped = iter(g.nearest_vertices(np.array(locations, dtype=float)))
+    return [tuple(next(snapped) if isinstance(point, tuple) else point for point in query)
+            for query in queries]
+
+
+def load_slice_graph(traffic_file: str, time: str, day: str, month: str) -> Graph:
+    """Return the graph of the rows of traffic_file recorded at the given time, day and month.
+    An empty string matches every value.
+    """
+    selections = {'time': [time], 'day': [day], 'month': [month],
+                  'start point': [''], 'end point': ['']}
+    data = filter_data_from_selection(load_table(traffic_file), selections)
+    return load_graph_from_load_data(data)
+
+
+def write_results(g: Graph, queries: list[tuple[Any, Any]], file: TextIO,
+                  workers: int = 1) -> None:
+    """Write the shortest path of every query to file as a csv row, in the order of queries.
+    Queries sharing a start are answered by a single search.
+    With more than one worker (and SciPy installed), the queries are split by start between
+    worker processes sharing the compiled graph, see parallel_results.
+    """
+    if workers > 1 and scipy_available():
+        results = parallel_results(g, queries, workers)
+    else:
+        results = [(path.get_path_weight(), list(path)) for path in batch_paths(g, queries)]
+
+    writer = csv.writer(file)
+    for (start, end), (weight, items) in zip(queries, results):
+        writer.writerow([start, end, weight, ';'.join(str(item) for item in items)])
+
+
+def parallel_results(g: Graph, queries: list[tuple[Any, Any]],
+                     workers: int) -> list[tuple[float, list]]:
+    """Return the (weight, items) of the shortest path of every query, in the order of queries,
+    found by worker processes.
+
+    The graph is compiled and published once in shared memory (see sharedgraph), and every worker
+    attaches to it instead of receiving its own copy. Queries with the same start are always
+    given to the same worker, so each start is still searched from once.
+
+    Preconditions:
+        - csgraphbackend.scipy_available()
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from compiledgraph import CompiledGraph
+    from sharedgraph import SharedGraph, attach_worker
+
+    starts = sorted({start for start, _ in queries}, key=str)
+    worker_of = {start: i % workers for i, start in enumerate(starts)}
+    chunks = [[] for _ in range(workers)]
+    for position, (start, end) in enumerate(queries):
+        chunks[worker_of[start]].append((position, start, end))
+
+    results = [None] * len(queries)
+    with SharedGraph.publish(CompiledGraph.from_graph(g)) as shared:
+        with ProcessPoolExecutor(workers, initializer=attach_worker,
+                                 initargs=(shared.handle,)) as pool:
+            for chunk, found in zip(chunks, pool.map(_route_chunk, chunks)):
+                for (position, _, _), result in zip(chunk, found):
+                    results[position] = result
+
+    return results
+
+
+def _route_chunk(chunk: list[tuple[int, Any, Any]]) -> list[tuple[float, list]]:
+    """Return the (weight, items) of the shortest path of every (position, start, end) query of
+    chunk in the graph attached by this worker process
+    """
+    from csgraphbackend import CSGraphRouter
+    from sharedgraph import worker_graph
+
+    paths = CSGraphRouter(worker_graph()).batch_dijkstra([(start, end) for _, start, end in chunk])
+    return [(path.get_path_weight(), list(path)) for path in paths]
+
+
+def write_time_dependent_results(g: Graph, cube: Any, queries: list[tuple[Any, Any]],
+                                 departure: datetime, file: TextIO) -> None:
+    """Write the quickest path of every query when leaving at departure to file as a csv row"""
+    writer = csv.writer(file)
+    for start, end in queries:
+        path, arrival = time_dependent_dijkstra(g, cube, start, end, departure)
+        writer.writerow([start, end, path.get_path_weight(), ';'.join(str(item) for item in path),
+                         '' if arrival is None else arrival.isoformat()])
+
+
+def write_reachable(g: Graph, starts: list, minutes: float, filename: str) -> int:
+    """Write the map of the checkpoints of g reachable within the given minutes of any of starts
+    to filename, as GeoJSON if its name ends with .geojson and as html otherwise, and return the
+    number of checkpoints reached
+    """
+    from mapping import write_reachable_geojson, write_reachable_map
+
+    budget = minutes / 60
+    reached = reachable_from_any(g, list(dict.fromkeys(starts)), budget)
+    if filename.endswith('.geojson'):
+        write_reachable_geojson(reached, filename, budget)
+    else:
+        write_reachable_map(reached, filename, budget)
+    return len(reached.items)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Answer a batch of shortest path queries.')
+    parser.add_argument('data', nargs='?',
+                        help='the transformed traffic csv, not needed with --cube')
+    parser.add_argument('queries', help='the csv of queries, "-" to read from stdin')
+    parser.add_argument('--time', default='17')
+    parser.add_argument('--day', default='4')
+    parser.add_argument('--month', default='3')
+    parser.add_argument('--depart', type=datetime.fromisoformat,
+                        help='route with time-dependent travel times leaving at this time')
+    parser.add_argument('--cube', help='the directory of a precomputed speed cube')
+    parser.add_argument('--output', help='the csv to write the results to (default stdout)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='answer the queries in this many processes sharing the graph')
+    parser.add_argument('--reachable', type=float, metavar='MINUTES',
+                        help='map the area reachable within MINUTES of the query starts instead')
+    parser.add_argument('--map', help='the html or .geojson file of the reachable area map')
+    args = parser.parse_args(argv)
+    if args.data is None and args.cube is None:
+        parser.error('the transformed traffic csv is required without --cube')
+    if args.reachable is not None and args.depart is not None:
+        parser.error('--reachable cannot be used with --depart')
+
+    if args.cube is not None:
+        from speedcube import SpeedCube
+        cube = SpeedCube.load(args.cube)
+        if args.depart is None:
+            g = cube.slice_graph(int(args.time), int(args.day), int(args.month),
+                                 recorded_only=True)
+        else:
+            g = cube.slice_graph(0, 1, 1)
+    elif args.depart is None:
+        g = load_slice_graph(args.data, args.time, args.day, args.month)
+        cube = None
+    else:
+        from speedcube import SpeedCube
+        data = load_data(args.data)
+        g, cube = load_graph_from_load_data(data), SpeedCube.from_rows(data)
+
+    if args.queries == '-':
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.queries, encoding='utf-8') as file:
+            queries = read_queries(file)
+    queries = snap_queries(g, queries)
+
+    if args.reachable is not None:
+        from mapping import REACHABLE_MAP_FILE
+        filename = REACHABLE_MAP_FILE if args.map is None else args.map
+        reached = write_reachable(g, [start for start, _ in queries], args.reachable, filename)
+        print(f'{reached} checkpoints reachable within {args.reachable:g} minutes written to '
+              f'{filename}', file=sys.stderr)
+        return
+
+    start = time.perf_counter()
+    if args.output is None:
+        _write(g, cube, queries, args.depart, sys.stdout, args.workers)
+    else:
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            _write(g, cube, queries, args.depart, file, args.workers)
+    seconds = time.perf_counter() - start
+
+    # reported on stderr so that it does not mix with results written to stdout
+    print(f'{len(queries)} queries in {seconds:.3f} s '
+          f'({len(queries) / seconds if seconds > 0 else float("inf"):.0f} queries/s)',
+          file=sys.stderr)
+
+
+def _write(g: Graph, cube: Any, queries: list[tuple[Any, Any]], departure: Optional[datetime],
+           file: TextIO, workers: int) -> None:
+    """Write the results of the queries to file with write_results, or with
+    write_time_dependent_results leaving at departure if it is given
+    """
+    if departure is None:
+        write_results(g, queries, file, workers)
+    else:
+        write_time_dependent_results(g, cube, queries, departure, file)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python routingcli.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'csv', 'sys', 'time', 'datetime', 'numpy',
+                              'concurrent.futures', 'csgraphbackend', 'graph', 'guisupporter',
+                              'pathcalculator', 'compiledgraph', 'sharedgraph', 'speedcube',
+                              'mapping'],
+            'allowed-io': ['main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
@@ -0,0 +1,339 @@
+"""
+CSC111 Project: routingdaemon.py
+
+Module Description
+==================
+
+A routing daemon that keeps datasets, slice graphs and routers loaded between queries, and the
+thin client that sends it queries, so that routing from the shell does not pay for the imports,
+reading the csv and building the graph every time.
+
+    python routingdaemon.py serve
+    python routingdaemon.py query transformed_final.csv queries.csv --time 17 --day 4 --month 3
+    python routingdaemon.py stop
+
+The daemon listens on a Unix domain socket (--socket, DEFAULT_SOCKET by default), and refuses to
+start if another daemon is already listening there. It keeps the MAX_SLICES slices used most
+recently loaded. Every message, both ways, is a JSON object encoded in UTF-8 and preceded by its
+length as a 4 byte big-endian unsigned integer. Every connection is served on its own thread and
+can send any number of requests, each answered in turn, while the requests of all connections are
+answered one at a time:
+
+    - {"op": "route", "data": csv path, "time": ..., "day": ..., "month": ..., "queries": [[start,
+      end], ...]}, where a start or end is a street name or a [latitude, longitude] pair, is
+      answered with {"ok": true, "results": [[start, end, weight, [street, ...]], ...]} in the
+      order of the queries. The weight of a query without a path is null. A relative csv path is
+      relative to the working directory of the daemon, so the client sends absolute paths.
+    - {"op": "stats"} is answered with the numbers of datasets and slices loaded and requests
+      answered.
+    - {"op": "stop"} stops the daemon after answering.
+A request that fails is answered with {"ok": false, "error": message}.
+
+The client only imports the standard library and prints the results as the same csv rows as
+routingcli.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import argparse
+import csv
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'csc111-routing.sock')
+
+# the largest message accepted, so a corrupt length cannot make the reader allocate gigabytes
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# the most slice graphs kept loaded, the least recently used one is dropped first
+MAX_SLICES = 16
+
+_LENGTH = struct.Struct('>I')
+
+
+def send_message(connection: socket.socket, message: Any) -> None:
+    """Send message to connection as length-prefixed JSON"""
+    data = json.dumps(message).encode('utf-8')
+    connection.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def receive_message(connection: socket.socket) -> Any:
+    """Return the next length-prefixed JSON message received from connection, or None if the
+    connection was closed before a new message started.
+    Raise a ValueError if the message is too long or the connection is closed in the middle of it.
+
+    >>> server, client = socket.socketpair()
+    >>> send_message(client, {'op': 'stats'})
+    >>> receive_message(server)
+    {'op': 'stats'}
+    >>> client.close()
+    >>> receive_message(server) is None
+    True
+    >>> server.close()
+    """
+    header = _receive_exactly(connection, _LENGTH.size)
+    if header is None:
+        return None
+
+    length = _LENGTH.unpack(header)[0]
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f'a message of {length} bytes is longer than {MAX_MESSAGE_BYTES}')
+    data = _receive_exactly(connection, length)
+    if data is None:
+        raise ValueError('the connection closed in the middle of a message')
+    return json.loads(data.decode('utf-8'))
+
+
+def request(message: dict, socket_path: str = DEFAULT_SOCKET) -> Any:
+    """Send message to the daemon listening on socket_path and return its answer.
+    Raise a ValueError if the daemon answers with an error.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        send_message(connection, message)
+        answer = receive_message(connection)
+
+    if answer is None or not answer.get('ok'):
+        raise ValueError(answer.get('error') if answer else 'the daemon closed the connection')
+    return answer
+
+
+class RoutingDaemon:
+    """The datasets, slice graphs and routers kept loaded by the daemon, which answer requests"""
+    # Private Instance Attributes:
+    #   - _tables: the TrafficTable of every dataset file loaded so far
+    #   - _slices: the (graph, router) of the MAX_SLICES (dataset file, time, day, month) slices
+    #       used most recently, from the least recently used, where the router is a
+    #       csgraphbackend.CSGraphRouter, or None without SciPy
+    #   - _answered: the number of requests answered so far
+    #   - stopping: whether a stop request was answered
+
+    _tables: dict[str, Any]
+    _slices: OrderedDict[tuple[str, str, str, str], tuple[Any, Any]]
+    _answered: int
+    stopping: bool
+
+    def __init__(self) -> None:
+        self._tables = {}
+        self._slices = OrderedDict()
+        self._answered = 0
+        self.stopping = False
+
+    def answer(self, message: Any) -> dict:
+        """Return the answer to the request message"""
+        self._answered += 1
+        try:
+            if not isinstance(message, dict):
+                raise ValueError('a request must be a JSON object')
+            op = message.get('op')
+            if op == 'route':
+                return {'ok': True, 'results': self._route(message)}
+            elif op == 'stats':
+                return {'ok': True, 'datasets': len(self._tables), 'slices': len(self._slices),
+                        'answered': self._answered}
+            elif op == 'stop':
+                self.stopping = True
+                return {'ok': True}
+            else:
+                raise ValueError('unknown op ' + repr(op))
+        except Exception as error:  # the daemon keeps running whatever a request does
+            return {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+
+    def _route(self, message: dict) -> list[list]:
+        """Return the [start, end, weight, path] of every query of a route request"""
+        from routingcli import snap_queries
+        from pathcalculator import batch_dijkstra
+
+        g, router = self._slice(str(message['data']), str(message.get('time', '17')),
+                                str(message.get('day', '4')), str(message.get('month', '3')))
+        queries = [tuple(tuple(point) if isinstance(point, list) else point for point in query)
+                   for query in message['queries']]
+        queries = snap_queries(g, queries)
+        for start, end in queries:
+            if not g.check_in(start) or not g.check_in(end):
+                raise ValueError(f'no checkpoint named {start if not g.check_in(start) else end!r}')
+
+        paths = batch_dijkstra(g, queries) if router is None else router.batch_dijkstra(queries)
+        return [[start, end, path.get_path_weight() if len(path) > 0 else None, list(path)]
+                for (start, end), path in zip(queries, paths)]
+
+    def _slice(self, data: str, hour: str, day: str, month: str) -> tuple[Any, Any]:
+        """Return the graph and router of the given slice of the dataset file data, loading them
+        if they are not loaded, and dropping the least recently used slice if more than
+        MAX_SLICES are
+        """
+        key = (os.path.abspath(data), hour, day, month)
+        if key in self._slices:
+            self._slices.move_to_end(key)
+        else:
+            from csgraphbackend import CSGraphRouter, scipy_available
+            from guisupporter import filter_data_from_selection, load_graph_from_load_data, \
+                load_table
+
+            if key[0] not in self._tables:
+                self._tables[key[0]] = load_table(data)
+            selections = {'time': [hour], 'day': [day], 'month': [month],
+                          'start point': [''], 'end point': ['']}
+            g = load_graph_from_load_data(filter_data_from_selection(self._tables[key[0]],
+                                                                     selections))
+            self._slices[key] = (g, CSGraphRouter(g) if scipy_available() else None)
+            if len(self._slices) > MAX_SLICES:
+                self._slices.popitem(last=False)
+
+        return self._slices[key]
+
+
+def serve(socket_path: str = DEFAULT_SOCKET) -> None:
+    """Answer requests on the Unix domain socket socket_path until a stop request.
+    Raise a ValueError if another daemon is already listening on socket_path.
+    """
+    daemon = RoutingDaemon()
+    # the connection threads take turns to use the daemon
+    lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        """Answers every request of one connection in turn"""
+
+        def handle(self) -> None:
+            message = receive_message(self.request)
+            while message is not None:
+                with lock:
+                    answer = daemon.answer(message)
+                send_message(self.request, answer)
+                if daemon.stopping:
+                    self.server.shutdown()
+                    return
+                message = receive_message(self.request)
+
+    if os.path.exists(socket_path):
+        if _listening(socket_path):
+            raise ValueError(f'a daemon is already listening on {socket_path}')
+        # a socket file left behind by a daemon that did not stop cleanly
+        os.remove(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+        # a connection left open by a client does not keep the daemon from stopping
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def _listening(socket_path: str) -> bool:
+    """Return whether something accepts connections on the Unix domain socket socket_path
+
+    >>> path = os.path.join(tempfile.mkdtemp(), 'test.sock')
+    >>> listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    >>> listener.bind(path)
+    >>> listener.listen()
+    >>> _listening(path)
+    True
+    >>> listener.close()
+    >>> _listening(path)
+    False
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> Optional[bytes]:
+    """Return the next size bytes received from connection, or None if it closes first"""
+    chunks, remaining = [], size
+    while remaining > 0:
+        chunk = connection.recv(min(remaining, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def _read_queries(filename: str) -> list[list]:
+    """Return the queries of a queries csv (see routingcli.read_queries) as JSON lists"""
+    file = sys.stdin if filename == '-' else open(filename, newline='', encoding='utf-8')
+    queries = []
+    with file:
+        for row in csv.reader(file):
+            if len(row) == 4:
+                queries.append([[float(row[0]), float(row[1])], [float(row[2]), float(row[3])]])
+            elif len(row) == 2:
+                queries.append(row)
+            elif len(row) != 0:
+                raise ValueError('a query must have either 2 streets or 4 coordinates: ' + str(row))
+    return queries
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: run the daemon, or send it queries or a stop request"""
+    parser = argparse.ArgumentParser(description='Keep the routing data loaded between queries.')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='the path of the Unix socket')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('serve', help='run the daemon until it is stopped')
+    query = subparsers.add_parser('query', help='send queries to the daemon')
+    query.add_argument('data', help='the transformed traffic csv')
+    query.add_argument('queries', help='the csv of queries, "-" to read from stdin')
+    query.add_argument('--time', default='17')
+    query.add_argument('--day', default='4')
+    query.add_argument('--month', default='3')
+    subparsers.add_parser('stats', help='show what the daemon has loaded')
+    subparsers.add_parser('stop', help='stop the daemon')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'serve':
+            serve(args.socket)
+        elif args.command == 'query':
+            start = time.perf_counter()
+            answer = request({'op': 'route', 'data': os.path.abspath(args.data),
+                              'time': args.time, 'day': args.day, 'month': args.month,
+                              'queries': _read_queries(args.queries)}, args.socket)
+            writer = csv.writer(sys.stdout)
+            for start_item, end_item, weight, path in answer['results']:
+                writer.writerow([start_item, end_item, 0 if weight is None else weight,
+                                 ';'.join(str(item) for item in path)])
+            print(f'{len(answer["results"])} queries in {time.perf_counter() - start:.3f} s',
+                  file=sys.stderr)
+        elif args.command == 'stats':
+            answer = request({'op': 'stats'}, args.socket)
+            print(f'{answer["datasets"]} datasets and {answer["slices"]} slices loaded, '
+                  f'{answer["answered"]} requests answered')
+        else:
+            request({'op': 'stop'}, args.socket)
+    except (OSError, ValueError) as error:
+        print(f'routingdaemon: {error}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python routingdaemon.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'csv', 'json', 'os', 'socket', 'socketserver', 'struct',
+                              'sys', 'tempfile', 'threading', 'time', 'collections', 'routingcli',
+                              'pathcalculator', 'csgraphbackend', 'guisupporter'],
+            'allowed-io': ['_read_queries', 'main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
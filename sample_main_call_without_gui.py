@@ -3,7 +3,7 @@ To run everything. I am adding comments so you guys can see what does what , at
 me and then make changes in the main file and any subsequent changes you need to make.
 """
 from shortest_path_calculator import gets_original_gives_full_path, only_2_points
-from mapping import mapping_on_maps_multiple, mapping_on_maps_singular
+from mapping import show_routes
 from visualization import visualise
 from graph import load_graph, Graph
 # Graph = __import__("Graph & Node").Graph
@@ -17,8 +17,6 @@ full_path = gets_original_gives_full_path(g, start, end, visitor)  # Gives the f
 # between start and end which goes through the locations mentioned in visitor.
 path = only_2_points(g, start, end)  # Gives the full shortest path between start and end , here we
 # don't have a visitor parameter.
-mapping_on_maps_multiple(g, full_path)  # Two map functions so that on the webbrowser it opens two
-# files.
-mapping_on_maps_singular(g, path)  # In the actual main file we would need to add Kaartik's plotly
-# function and we'd be good I think.
+show_routes(g, [full_path, path], ['Through the visitors', 'Direct'])  # Both routes are drawn on
+# one map, which opens in a single browser tab.
 visualise(full_path, g)
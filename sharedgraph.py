@@ -0,0 +1,278 @@
+"""
+CSC111 Project: sharedgraph.py
+
+Module Description
+==================
+
+Module for sharing a compiledgraph.CompiledGraph between processes without copying it. The
+arrays of the graph, and a table of the names of its vertices, are published into a single
+multiprocessing.shared_memory segment, and every worker process attaches numpy arrays viewing
+that segment directly, so the memory used by a worker does not grow with the graph, however
+many workers there are. Workers are given the small picklable SharedGraphHandle, never the graph.
+
+    with SharedGraph.publish(compiled) as shared:
+        with ProcessPoolExecutor(initializer=attach_worker, initargs=(shared.handle,)) as pool:
+            ...   # workers call worker_graph()
+
+Lifetime: the process that publishes a graph owns its segment and unlinks it when it closes the
+SharedGraph (or leaves its with block); attached processes only close their own view of it,
+which attach_worker does when the worker exits. The arrays of a SharedGraph must not be used after
+it is closed.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import atexit
+import bisect
+from collections.abc import Sequence
+from multiprocessing import shared_memory
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from compiledgraph import CompiledGraph
+
+# the arrays of a compiled graph stored in the segment, along with the two arrays of the name
+# table: the utf-8 bytes of every name one after another, and where each name starts in them
+_FIELDS = ('offsets', 'targets', 'weights', 'coordinates', 'components', 'name_bytes',
+           'name_offsets')
+
+# arrays in the segment start at multiples of this many bytes
+_ALIGNMENT = 64
+
+
+class SharedGraphHandle(NamedTuple):
+    """What a process needs to attach to a published graph
+
+    Instance Attributes:
+        - name: the name of the shared memory segment
+        - layout: the (field, dtype, shape, byte offset) of every array in the segment
+    """
+    name: str
+    layout: tuple[tuple[str, str, tuple[int, ...], int], ...]
+
+
+class NameTable(Sequence):
+    """The vertex names of a shared graph, decoded from the shared name table when accessed.
+
+    Names are in increasing order, as CompiledGraph.from_graph numbers vertices by their items as
+    strings, so a name is found by binary search without building a dict in every process.
+
+    >>> names = NameTable.from_names(['A', 'B', 'Bay Road'])
+    >>> list(names), names.index('B'), len(names)
+    (['A', 'B', 'Bay Road'], 1, 3)
+    """
+    # Private Instance Attributes:
+    #   - _bytes: the utf-8 bytes of every name, one after another
+    #   - _offsets: where every name starts in _bytes, with one extra entry holding len(_bytes)
+
+    _bytes: np.ndarray
+    _offsets: np.ndarray
+
+    def __init__(self, name_bytes: np.ndarray, name_offsets: np.ndarray) -> None:
+        self._bytes = name_bytes
+        self._offsets = name_offsets
+
+    @classmethod
+    def from_names(cls, names: list[str]) -> NameTable:
+        """Return the table of names, which must be in increasing order"""
+        encoded = [name.encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def buffers(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the two arrays this table is made of: the utf-8 bytes of every name one after
+        another, and where each name starts in them followed by their total length
+        """
+        return self._bytes, self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError
+        return self._bytes[self._offsets[i]:self._offsets[i + 1]].tobytes().decode('utf-8')
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        """Return the position of the name value.
+        Raise a ValueError if there is no such name.
+        """
+        i = bisect.bisect_left(self, value, start, len(self) if stop is None else stop)
+        if i < len(self) and self[i] == value:
+            return i
+        raise ValueError
+
+
+class SharedCompiledGraph(CompiledGraph):
+    """A CompiledGraph whose arrays and vertex names are views of a shared memory segment"""
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        super().__init__(NameTable(arrays['name_bytes'], arrays['name_offsets']),
+                         arrays['offsets'], arrays['targets'], arrays['weights'],
+                         arrays['coordinates'], arrays['components'])
+
+    def index_of(self, item: Any) -> int:
+        """Return the number of the vertex with the given item.
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        return self.get_items().index(str(item))
+
+
+class SharedGraph:
+    """A compiled graph in a shared memory segment, either published by this process or attached
+    to from a handle
+
+    >>> from syntheticgraph import corridor_grid
+    >>> compiled = CompiledGraph.from_graph(corridor_grid(3, 3, checkpoints=1))
+    >>> with SharedGraph.publish(compiled) as shared:
+    ...     attached = SharedGraph.attach(shared.handle)
+    ...     graph = attached.graph
+    ...     same = graph.neighbours(graph.index_of('I1_1'))[0].tolist() == \\
+    ...         compiled.neighbours(compiled.index_of('I1_1'))[0].tolist()
+    ...     del graph
+    ...     attached.close()
+    >>> same
+    True
+    """
+    # Private Instance Attributes:
+    #   - _memory: the shared memory segment, or None once closed
+    #   - _owner: whether this process published the segment, and so unlinks it when closed
+    #   - _graph: the graph viewing the segment, or None once closed
+    #   - handle: what another process needs to attach to the segment
+
+    _memory: Optional[shared_memory.SharedMemory]
+    _owner: bool
+    _graph: Optional[SharedCompiledGraph]
+    handle: SharedGraphHandle
+
+    def __init__(self, memory: shared_memory.SharedMemory, handle: SharedGraphHandle,
+                 owner: bool) -> None:
+        self._memory = memory
+        self._owner = owner
+        self.handle = handle
+        self._graph = SharedCompiledGraph({
+            field: np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            for field, dtype, shape, offset in handle.layout})
+
+    @classmethod
+    def publish(cls, compiled: CompiledGraph) -> SharedGraph:
+        """Return compiled copied into a new shared memory segment owned by this process.
+        Vertex numbers are stored as 32 bit integers when they fit, which scipy can use without
+        copying them.
+        """
+        index_type = np.int32 if len(compiled.targets) < 2 ** 31 else np.int64
+        name_bytes, name_offsets = NameTable.from_names([str(item) for item
+                                                         in compiled.get_items()]).buffers()
+        arrays = {'offsets': compiled.offsets.astype(index_type),
+                  'targets': compiled.targets.astype(index_type),
+                  'weights': compiled.weights, 'coordinates': compiled.coordinates,
+                  'components': compiled.components, 'name_bytes': name_bytes,
+                  'name_offsets': name_offsets}
+
+        layout, size = [], 0
+        for field in _FIELDS:
+            array = np.ascontiguousarray(arrays[field])
+            layout.append((field, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for field, dtype, shape, offset in layout:
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            view[...] = arrays[field]
+        del view
+
+        return cls(memory, SharedGraphHandle(memory.name, tuple(layout)), owner=True)
+
+    @classmethod
+    def attach(cls, handle: SharedGraphHandle) -> SharedGraph:
+        """Return the graph published with handle by another process, without copying it.
+
+        The attaching process must be started by the publishing process through multiprocessing
+        (a pool worker, say), so that they share a resource tracker, which then leaves the segment
+        for the owner to unlink.
+        """
+        return cls(shared_memory.SharedMemory(name=handle.name), handle, owner=False)
+
+    @property
+    def graph(self) -> SharedCompiledGraph:
+        """The graph viewing the shared segment.
+        Raise a ValueError if this SharedGraph is closed.
+        """
+        if self._graph is None:
+            raise ValueError('the shared graph is closed')
+        return self._graph
+
+    def close(self) -> None:
+        """Stop using the segment in this process, unlinking it if this process published it.
+        Closing twice does nothing.
+        """
+        if self._memory is None:
+            return
+
+        self._graph = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self) -> SharedGraph:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _WorkerState:
+    """What attach_worker keeps in a worker process
+
+    Instance Attributes:
+        - shared: the graph attached by attach_worker, or None if it was not called
+    """
+    shared: Optional[SharedGraph]
+
+    def __init__(self) -> None:
+        self.shared = None
+
+
+_WORKER = _WorkerState()
+
+
+def attach_worker(handle: SharedGraphHandle) -> None:
+    """Attach this worker process to the graph published with handle, to be used as the
+    initializer of a process pool. The graph is closed when the worker exits.
+    """
+    _WORKER.shared = SharedGraph.attach(handle)
+    atexit.register(_WORKER.shared.close)
+
+
+def worker_graph() -> SharedCompiledGraph:
+    """Return the graph attached by attach_worker in this worker process.
+    Raise a ValueError if attach_worker was not called in this process.
+    """
+    if _WORKER.shared is None:
+        raise ValueError('attach_worker was not called in this process')
+    return _WORKER.shared.graph
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['atexit', 'bisect', 'collections.abc', 'multiprocessing', 'numpy',
+                          'compiledgraph'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -8,6 +8,10 @@ This module contains functions which make use of the graphs and maps generated u
 algorithm to return the shortest path between two points in the graph , which goes through a certain
 no. of specified points.
 
+ItineraryPlanner keeps the travel times between the points of an itinerary and its best order
+known so far, so that adding or removing a point only costs one search and a local
+re-optimization of the order instead of planning the whole itinerary again.
+
 Copyright and Usage Information
 ===============================
 This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
@@ -15,52 +19,254 @@ This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik
 
 """
 from __future__ import annotations
+from collections.abc import Iterable
 from typing import Any, Optional
-from pathcalculator import get_shortest_map_and_graph, dijkstra
+from pathcalculator import Path, dijkstra, snap
 from graph import load_graph, Graph
 # Graph = __import__("Graph & Node").Graph
 # load_graph = __import__("Graph & Node").load_graph
 
+# the most points in between an itinerary can have for its exact order to be worth finding, since
+# the exact order takes time exponential in the number of points
+EXACT_LIMIT = 12
+
 
 def gets_original_gives_full_path(graph: Graph, starting_point: Any, ending_point: Any,
                                   points: list[Any]) -> list[Any]:
     """
     This function returns the shortest path for traversing between 2 street landmarks which takes a
     route which goes through a certain no. of specified points.
+    The points are visited in the exact best order, found by an ItineraryPlanner.
     """
-    s = get_shortest_map_and_graph(graph, starting_point, ending_point, points)
-    shortest_path = connected_with(s[1], starting_point, ending_point, points)
-    shortest_map = s[0]
-    output = []
-    for i in range(len(shortest_path) - 1):
-        start = shortest_path[i]
-        end = shortest_path[i + 1]
-        output.append(shortest_map[start][end])
+    return ItineraryPlanner(graph, starting_point, ending_point, points).get_full_path(exact=True)
 
-    full_path = []
-    for path in output:
-        for _ in range(len(path) - 1):
-            full_path.append(path.get_item())
-            path = path.get_next()
-    full_path.append(ending_point)
 
-    return full_path
+class ItineraryPlanner:
+    """A route from a start to an end that goes through points in between, which can be added and
+    removed one at a time.
 
+    The planner keeps the travel times between the points of the itinerary, from the shortest
+    paths of allpairs.all_pairs (one search from each point in between when it is added, unless
+    the graph is small enough for dense matrices), and the best order of the points found so
+    far. A point added is inserted where it adds the least travel time (cheapest insertion), and
+    the order is then improved by reversing parts of it for as long as that shortens the route
+    (2-opt). The exact best order is found on demand, by dynamic programming over the subsets of
+    the points (the Held-Karp algorithm).
 
-def connected_with(graph: Graph, starting_point: Any, ending_point: Any,
-                   in_between: list[Any]) -> Optional[list, str]:
-    """
-    This function returns the shortest path, based on the shortest graph, between two points in our
-    graph, which goes through a certain no. of specified points.
+    The graph is undirected, so the travel time from a to b is the travel time from b to a.
+
+    >>> from syntheticgraph import corridor_grid
+    >>> g = corridor_grid(4, 4, checkpoints=1)
+    >>> planner = ItineraryPlanner(g, 'I0_0', 'I3_3', ['I3_0', 'I0_3'])
+    >>> planner.add_point('I1_1')
+    >>> planner.get_order()[0], planner.get_order()[-1], len(planner.get_order())
+    ('I0_0', 'I3_3', 5)
+    >>> planner.remove_point('I0_3')
+    >>> planner.get_order() == planner.get_order(exact=True)
+    True
     """
-    z = graph.get_all_paths(starting_point, ending_point)
-    d = []
-    for i in z:
-        if len(i) == 2 + len(in_between):
-            d.append((i, get_path_weight(graph, i)))
+    # Private Instance Attributes:
+    #   - _graph: the graph the itinerary is in
+    #   - _start: the start of the itinerary
+    #   - _end: the end of the itinerary
+    #   - _points: the points in between, in the best order found so far
+    #   - _pairs: the shortest paths between the points of the itinerary, an allpairs.AllPairs
+    #   - _times: the travel time between every two points of the itinerary asked for so far, both
+    #       ways
+    #   - _exact: the exact best order of _points, or None if it was not found since the last edit
+
+    _graph: Graph
+    _start: Any
+    _end: Any
+    _points: list
+    _pairs: Any
+    _times: dict[Any, dict[Any, float]]
+    _exact: Optional[list]
+
+    def __init__(self, graph: Graph, start: Any, end: Any, points: Iterable = ()) -> None:
+        """Plan the itinerary from start to end through points.
+        Raise a ValueError if start or end is neither a vertex item of graph nor a location.
+        """
+        from allpairs import all_pairs
+
+        self._graph = graph
+        self._start = snap(graph, start)
+        self._end = snap(graph, end)
+        # every point is prepared to be an endpoint before the paths are found, see snap
+        points = [snap(graph, point) for point in points]
+        self._pairs = all_pairs(graph, len(points) + 2)
+        self._points = []
+        self._times = {self._start: {}, self._end: {}}
+        self._exact = None
+
+        for point in points:
+            self.add_point(point)
+
+    def get_points(self) -> list:
+        """Return the points in between, in the best order found so far"""
+        return list(self._points)
+
+    def add_point(self, point: Any) -> None:
+        """Add point to the points in between, where it adds the least travel time, and improve
+        the order of the points with 2-opt. Locations are snapped as in pathcalculator.dijkstra.
+        Raise a ValueError if point is neither a vertex item of the graph nor a location, or if
+        it is already in between.
+        """
+        point = snap(self._graph, point)
+        if point in self._points:
+            raise ValueError
+
+        try:
+            self._pairs.distance(point, point)
+        except ValueError:
+            # snapping put a vertex the graph had left out back, so the paths are found again
+            from allpairs import all_pairs
+            self._pairs = all_pairs(self._graph, len(self._points) + 3)
+
+        self._times.setdefault(point, {})
+        for other in [self._start, self._end] + self._points:
+            self._time(point, other)
+
+        stops = self.get_order()
+        position = min(range(len(stops) - 1),
+                       key=lambda i: self._time(stops[i], point) + self._time(point, stops[i + 1])
+                       - self._time(stops[i], stops[i + 1]))
+        self._points.insert(position, point)
+        self._two_opt()
+        self._exact = None
+
+    def remove_point(self, point: Any) -> None:
+        """Remove point from the points in between and improve the order of the rest with 2-opt.
+        Raise a ValueError if point is not in between.
+        """
+        self._points.remove(point)
+        for times in self._times.values():
+            times.pop(point, None)
+        if point not in (self._start, self._end):
+            del self._times[point]
+
+        self._two_opt()
+        self._exact = None
+
+    def set_points(self, points: Iterable) -> None:
+        """Make points the points in between, only adding and removing the points that differ.
+        Raise a ValueError if a point is neither a vertex item of the graph nor a location.
+        """
+        points = [snap(self._graph, point) for point in points]
+        for point in self.get_points():
+            if point not in points:
+                self.remove_point(point)
+        for point in points:
+            if point not in self._points:
+                self.add_point(point)
+
+    def get_order(self, exact: bool = False) -> list:
+        """Return the start, the points in between in the best order found so far (or in the exact
+        best order if exact is True), and the end
+        """
+        if exact and self._exact is None:
+            self._exact = self._exact_order()
+        return [self._start] + (self._exact if exact else self._points) + [self._end]
+
+    def get_weight(self, exact: bool = False) -> float:
+        """Return the travel time along the route in the order of get_order(exact), which is
+        infinite if a point cannot be reached
+        """
+        stops = self.get_order(exact)
+        return sum(_travel_time(stops[i], stops[i + 1], self._path(stops[i], stops[i + 1]))
+                   for i in range(len(stops) - 1))
+
+    def get_full_path(self, exact: bool = False) -> list:
+        """Return the items along the route in the order of get_order(exact), or an empty list if
+        a point cannot be reached
+        """
+        stops = self.get_order(exact)
+        full_path = [self._start]
+        for i in range(len(stops) - 1):
+            leg = list(self._path(stops[i], stops[i + 1]))
+            if leg == []:
+                return []
+            full_path.extend(leg[1:])
+        return full_path
+
+    def _path(self, start: Any, end: Any) -> Path:
+        """Return the shortest path from start to end, which are points of the itinerary"""
+        return self._pairs.path(start, end)
+
+    def _time(self, start: Any, end: Any) -> float:
+        """Return the travel time from start to end, which are points of the itinerary"""
+        if end not in self._times[start]:
+            time = self._pairs.distance(start, end)
+            self._times[start][end] = time
+            self._times[end][start] = time
+        return self._times[start][end]
+
+    def _two_opt(self) -> None:
+        """Reverse parts of the order of the points in between for as long as one of them
+        shortens the route
+        """
+        stops = self.get_order()
+        improved = True
+        while improved:
+            improved = False
+            for i in range(1, len(stops) - 2):
+                for j in range(i + 1, len(stops) - 1):
+                    change = self._time(stops[i - 1], stops[j]) \
+                        + self._time(stops[i], stops[j + 1]) \
+                        - self._time(stops[i - 1], stops[i]) - self._time(stops[j], stops[j + 1])
+                    if change < -1e-12:
+                        stops[i:j + 1] = reversed(stops[i:j + 1])
+                        improved = True
+        self._points = stops[1:-1]
+
+    def _exact_order(self) -> list:
+        """Return the order of the points in between with the least travel time, found by dynamic
+        programming over the subsets of the points
+        """
+        points = self._points
+        k = len(points)
+        if k < 2:
+            return list(points)
+
+        # best[subset][last] is the least travel time from the start through the points of subset
+        # (a bitmask), ending at the point numbered last, and previous[subset][last] the point
+        # before last on that route
+        best = [[float('inf')] * k for _ in range(1 << k)]
+        previous = [[-1] * k for _ in range(1 << k)]
+        for i in range(k):
+            best[1 << i][i] = self._time(self._start, points[i])
+
+        for subset in range(1, 1 << k):
+            for last in range(k):
+                time = best[subset][last]
+                if time == float('inf'):
+                    continue
+                for following in range(k):
+                    if subset & (1 << following):
+                        continue
+                    extended = time + self._time(points[last], points[following])
+                    if extended < best[subset | (1 << following)][following]:
+                        best[subset | (1 << following)][following] = extended
+                        previous[subset | (1 << following)][following] = last
+
+        full = (1 << k) - 1
+        last = min(range(k), key=lambda i: best[full][i] + self._time(points[i], self._end))
+        if best[full][last] == float('inf'):
+            return list(points)
+
+        order, subset = [], full
+        while last != -1:
+            order.append(points[last])
+            subset, last = subset & ~(1 << last), previous[subset][last]
+        order.reverse()
+        return order
+
 
-    d.sort(key=lambda q: q[1])
-    return d[0][0]
+def _travel_time(start: Any, end: Any, path: Path) -> float:
+    """Return the travel time along path from start to end, which is infinite if it is empty"""
+    if len(path) == 0 and start != end:
+        return float('inf')
+    return path.get_path_weight()
 
 
 def get_path_weight(graph: Graph, path: list) -> float:
@@ -103,7 +309,7 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'max-line-length': 100,
         'disable': ['E1136'],
-        'extra-imports': ['pathcalculator', 'graph'],
+        'extra-imports': ['collections.abc', 'pathcalculator', 'graph'],
         'allowed-io': [],
         'max-nested-blocks': 5
 
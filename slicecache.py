@@ -0,0 +1,189 @@
+"""
+CSC111 Project: slicecache.py
+
+Module Description
+==================
+
+Command line program that precomputes the compiled graph of every (hour, day, month) time slice
+of the dataset, so that the graph of a slice can be loaded instead of being filtered and built
+from the whole dataset every time.
+
+    python slicecache.py transformed_final.csv slice_cache --workers 4
+
+The rows of the dataset are split by slice and every slice is built in its own process. Each
+slice is saved as a compiledgraph.CompiledGraph (with its connected component labels) in a
+directory named after CACHE_VERSION, which is increased whenever the saved format changes, so an
+old cache is never read by mistake. Every file is written atomically.
+
+A manifest records a hash of the rows each slice was built from, and slices whose rows have not
+changed since the last run are skipped.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+
+from compiledgraph import CompiledGraph
+from guisupporter import DATA_HEADER, load_graph_from_load_data, load_table
+from traffictable import STREET_COLUMNS, TrafficTable
+
+CACHE_VERSION = 1
+
+_MANIFEST_FILE = 'manifest.json'
+
+SliceKey = tuple[int, int, int]
+
+
+def partition_slices(table: TrafficTable) -> dict[SliceKey, np.ndarray]:
+    """Return the indices of the rows of table in every (hour, day, month) slice
+
+    >>> rows = [('25', 'A', 'B', '1', '17', '4', '3', '0', '0', '0', '1'),
+    ...         ('30', 'B', 'C', '1', '8', '4', '3', '0', '1', '1', '1'),
+    ...         ('20', 'A', 'C', '1', '17', '4', '3', '0', '0', '1', '1')]
+    >>> slices = partition_slices(TrafficTable.from_rows(rows))
+    >>> {key: indices.tolist() for key, indices in slices.items()}
+    {(8, 4, 3): [1], (17, 4, 3): [0, 2]}
+    """
+    keys = np.column_stack([table.column(header) for header in ('time', 'day', 'month')])
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind='stable')
+    bounds = np.cumsum(np.bincount(inverse.ravel(), minlength=len(unique_keys)))[:-1]
+
+    return {tuple(int(value) for value in key): indices
+            for key, indices in zip(unique_keys.tolist(), np.split(order, bounds))}
+
+
+def slice_digest(table: TrafficTable) -> str:
+    """Return a hash of the rows of table, which only changes when the rows do"""
+    digest = hashlib.sha256()
+    for col, header in enumerate(DATA_HEADER):
+        if col in STREET_COLUMNS:
+            digest.update('\0'.join(table.values(header)).encode())
+        else:
+            digest.update(np.ascontiguousarray(table.column(header)).tobytes())
+    return digest.hexdigest()
+
+
+def cache_directory(directory: str) -> str:
+    """Return the directory inside directory holding the slices of the current CACHE_VERSION"""
+    return os.path.join(directory, 'v' + str(CACHE_VERSION))
+
+
+def slice_filename(directory: str, hour: int, day: int, month: int) -> str:
+    """Return the file the compiled graph of the given slice is saved in"""
+    return os.path.join(cache_directory(directory), f'slice_{hour}_{day}_{month}.npz')
+
+
+def load_slice(directory: str, hour: int, day: int, month: int) -> CompiledGraph:
+    """Return the compiled graph of the given slice saved in the cache directory by build_cache"""
+    return CompiledGraph.load(slice_filename(directory, hour, day, month))
+
+
+def build_cache(table: TrafficTable, directory: str,
+                workers: Optional[int] = None) -> tuple[list[SliceKey], list[SliceKey]]:
+    """Build and save the compiled graph of every slice of table whose rows changed since the
+    last build in directory, using a pool of worker processes.
+    Return the slices that were built and the slices that were skipped.
+    """
+    os.makedirs(cache_directory(directory), exist_ok=True)
+    manifest = _read_manifest(directory)
+
+    built, skipped, pending = [], [], {}
+    for key, indices in partition_slices(table).items():
+        rows = table.take(indices)
+        digest = slice_digest(rows)
+        if manifest.get(_manifest_key(key)) == digest and os.path.exists(slice_filename(
+                directory, *key)):
+            skipped.append(key)
+        else:
+            pending[key] = (rows, digest)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_build_slice, rows, slice_filename(directory, *key)): key
+                       for key, (rows, _) in pending.items()}
+            for future in as_completed(futures):
+                future.result()
+                key = futures[future]
+                manifest[_manifest_key(key)] = pending[key][1]
+                # saved after every slice, so an interrupted build keeps the finished slices
+                _write_manifest(directory, manifest)
+                built.append(key)
+
+    return built, skipped
+
+
+def _build_slice(rows: TrafficTable, filename: str) -> None:
+    """Build the compiled graph of rows and save it in filename (run in a worker process)"""
+    CompiledGraph.from_graph(load_graph_from_load_data(rows)).save(filename)
+
+
+def _manifest_key(key: SliceKey) -> str:
+    return '_'.join(str(value) for value in key)
+
+
+def _read_manifest(directory: str) -> dict[str, str]:
+    """Return the hash of the rows of every slice saved in the cache directory"""
+    filename = os.path.join(cache_directory(directory), _MANIFEST_FILE)
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _write_manifest(directory: str, manifest: dict[str, str]) -> None:
+    """Atomically replace the manifest of the cache directory"""
+    filename = os.path.join(cache_directory(directory), _MANIFEST_FILE)
+    descriptor, temporary = tempfile.mkstemp(dir=cache_directory(directory), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, sort_keys=True)
+        os.replace(temporary, filename)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: build the slice cache of a dataset"""
+    parser = argparse.ArgumentParser(description='Precompute the graph of every time slice.')
+    parser.add_argument('data', help='the transformed traffic csv')
+    parser.add_argument('directory', help='the directory of the slice cache')
+    parser.add_argument('--workers', type=int, help='the number of worker processes')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    built, skipped = build_cache(load_table(args.data), args.directory, args.workers)
+    print(f'{len(built)} slices built, {len(skipped)} unchanged slices skipped in '
+          f'{time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python slicecache.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'hashlib', 'json', 'os', 'sys', 'tempfile', 'time',
+                              'concurrent.futures', 'numpy', 'compiledgraph', 'guisupporter',
+                              'traffictable'],
+            'allowed-io': ['_read_manifest', '_write_manifest', 'main'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
@@ -0,0 +1,325 @@
+"""
+CSC111 Project: spatialindex.py
+
+Module Description
+==================
+
+Module containing a k-d tree over the coordinates of the vertices of a graph. It is used to snap
+raw latitude and longitude locations to the nearest checkpoint (street vertex), so that routes can
+be asked for between any two locations in Chicago instead of only between exact street names.
+
+The coordinates are projected onto a flat plane in metres around the mean latitude of the points,
+which is accurate enough at the scale of a city.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import numpy as np
+
+METRES_PER_DEGREE = 111_320.0
+LEAF_SIZE = 16
+
+# number of points snapped at a time by nearest_many, to bound the size of the temporary arrays
+_CHUNK_SIZE = 1024
+
+
+class SpatialIndex:
+    """A k-d tree answering nearest and within radius queries over items with coordinates
+
+    >>> index = SpatialIndex(['a', 'b', 'c'], [(41.80, -87.60), (41.85, -87.65), (41.90, -87.60)])
+    >>> index.nearest(41.86, -87.64)
+    'b'
+    >>> sorted(index.within_radius(41.80, -87.60, 7000))
+    ['a', 'b']
+    >>> index.nearest_many(np.array([[41.89, -87.61], [41.79, -87.6]]))
+    ['c', 'a']
+    """
+    # Private Instance Attributes:
+    #   - _items: the items, ordered so that the points of every leaf are contiguous
+    #   - _points: the projected (x, y) coordinates in metres of each item in _items
+    #   - _origin: the (latitude, longitude) the projection is centred on
+    #   - _long_scale: the number of metres in a degree of longitude at _origin
+    #   - _axis: the axis each node splits on, or -1 if the node is a leaf
+    #   - _split: the coordinate each node splits at
+    #   - _children: the (left, right) child of each node
+    #   - _ranges: the [start, end) range of _points each node contains
+    #   - _boxes: the (min x, min y, max x, max y) bounding box of each node
+    #   - _leaves: the node ids of the leaves
+    #   - _leaf_points: the points of each leaf in _leaves, padded with infinitely far points
+    #   - _leaf_members: the indices in _points of the points in _leaf_points
+    #   - _leaf_position: the position in _leaves of each node, or -1 if it is not a leaf
+
+    _items: list
+    _points: np.ndarray
+    _origin: tuple[float, float]
+    _long_scale: float
+    _axis: np.ndarray
+    _split: np.ndarray
+    _children: np.ndarray
+    _ranges: np.ndarray
+    _boxes: np.ndarray
+    _leaves: np.ndarray
+    _leaf_points: np.ndarray
+    _leaf_members: np.ndarray
+    _leaf_position: np.ndarray
+
+    def __init__(self, items: list, coordinates: Any) -> None:
+        """Build the index over items located at the corresponding (latitude, longitude) in
+        coordinates
+
+        Preconditions:
+            - len(items) == len(coordinates)
+        """
+        coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        if len(coordinates) == 0:
+            self._origin = (0.0, 0.0)
+        else:
+            self._origin = (float(coordinates[:, 0].mean()), float(coordinates[:, 1].mean()))
+        self._long_scale = METRES_PER_DEGREE * math.cos(math.radians(self._origin[0]))
+
+        order = np.arange(len(items))
+        points = self._project(coordinates)
+        self._build(points, order)
+
+        self._items = [items[i] for i in order]
+        self._points = points[order]
+        self._build_leaves()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def nearest(self, latitude: float, longitude: float) -> Any:
+        """Return the item closest to the given location
+
+        Preconditions:
+            - len(self) > 0
+        """
+        point = self._project(np.array([[latitude, longitude]]))[0]
+        return self._items[self._nearest_index(point)]
+
+    def nearest_many(self, coordinates: np.ndarray) -> list:
+        """Return the item closest to each (latitude, longitude) row of coordinates
+
+        Preconditions:
+            - len(self) > 0
+        """
+        indices, _ = self.nearest_indices(coordinates)
+        return [self._items[i] for i in indices]
+
+    def nearest_indices(self, coordinates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return the position in self.items() of the item closest to each (latitude, longitude)
+        row of coordinates and the distances in metres to those items
+
+        All the points are pushed down the tree together to the leaves they fall into, then
+        searched for together again from the root, only descending into the nodes whose box is
+        closer than the best item found so far for each point.
+
+        Preconditions:
+            - len(self) > 0
+        """
+        queries = self._project(np.asarray(coordinates, dtype=float).reshape(-1, 2))
+        indices = np.empty(len(queries), dtype=np.int64)
+        distances = np.empty(len(queries))
+
+        for start in range(0, len(queries), _CHUNK_SIZE):
+            chunk = queries[start:start + _CHUNK_SIZE]
+            best_index, best_squared = self._descend_to_leaves(chunk)
+            self._improve(chunk, best_index, best_squared)
+            indices[start:start + len(chunk)] = best_index
+            distances[start:start + len(chunk)] = np.sqrt(best_squared)
+
+        return indices, distances
+
+    def within_radius(self, latitude: float, longitude: float, radius: float) -> list:
+        """Return the items at most radius metres away from the given location"""
+        point = self._project(np.array([[latitude, longitude]]))[0]
+        found = []
+        stack = [0] if len(self._items) > 0 else []
+        while stack:
+            node = stack.pop()
+            if self._box_distance_squared(node, point) > radius * radius:
+                continue
+            if self._axis[node] == -1:
+                start, end = self._ranges[node]
+                diff = self._points[start:end] - point
+                close = np.flatnonzero(np.einsum('ij,ij->i', diff, diff) <= radius * radius)
+                found.extend(self._items[start + i] for i in close)
+            else:
+                stack.extend(self._children[node])
+
+        return found
+
+    def items(self) -> list:
+        """Return the indexed items in the order used by nearest_indices"""
+        return self._items
+
+    def _project(self, coordinates: np.ndarray) -> np.ndarray:
+        """Return the (latitude, longitude) coordinates as (x, y) metres from the origin"""
+        return np.column_stack(((coordinates[:, 1] - self._origin[1]) * self._long_scale,
+                                (coordinates[:, 0] - self._origin[0]) * METRES_PER_DEGREE))
+
+    def _build(self, points: np.ndarray, order: np.ndarray) -> None:
+        """Build the tree nodes over points, reordering order in place so that every node
+        covers a contiguous range of it
+        """
+        axis, split, children, ranges, boxes = [], [], [], [], []
+
+        def new_node(start: int, end: int) -> int:
+            """Add a leaf node covering order[start:end] and return its id"""
+            members = points[order[start:end]]
+            axis.append(-1)
+            split.append(0.0)
+            children.append((0, 0))
+            ranges.append((start, end))
+            if end > start:
+                boxes.append((*members.min(axis=0), *members.max(axis=0)))
+            else:
+                boxes.append((math.inf, math.inf, -math.inf, -math.inf))
+            return len(axis) - 1
+
+        stack = [new_node(0, len(order))]
+        while stack:
+            node = stack.pop()
+            start, end = ranges[node]
+            if end - start <= LEAF_SIZE:
+                continue
+
+            spread = np.subtract(boxes[node][2:], boxes[node][:2])
+            node_axis = int(np.argmax(spread))
+            middle = (start + end) // 2
+            segment = order[start:end]
+            partitioned = np.argpartition(points[segment, node_axis], middle - start)
+            order[start:end] = segment[partitioned]
+
+            axis[node] = node_axis
+            split[node] = float(points[order[middle], node_axis])
+            children[node] = (new_node(start, middle), new_node(middle, end))
+            stack.extend(children[node])
+
+        self._axis = np.array(axis)
+        self._split = np.array(split)
+        self._children = np.array(children, dtype=np.int64).reshape(-1, 2)
+        self._ranges = np.array(ranges, dtype=np.int64).reshape(-1, 2)
+        self._boxes = np.array(boxes, dtype=float).reshape(-1, 4)
+
+    def _build_leaves(self) -> None:
+        """Store the points of every leaf padded to LEAF_SIZE with infinitely far away points,
+        so that the leaves can be searched for many queries at once
+        """
+        self._leaves = np.flatnonzero(self._axis == -1)
+        self._leaf_points = np.full((len(self._leaves), LEAF_SIZE, 2), np.inf)
+        self._leaf_members = np.zeros((len(self._leaves), LEAF_SIZE), dtype=np.int64)
+        self._leaf_position = np.full(len(self._axis), -1, dtype=np.int64)
+        for i, leaf in enumerate(self._leaves):
+            start, end = self._ranges[leaf]
+            self._leaf_points[i, :end - start] = self._points[start:end]
+            self._leaf_members[i, :end - start] = np.arange(start, end)
+            self._leaf_position[leaf] = i
+
+    def _descend_to_leaves(self, queries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return the index of and the squared distance to the closest point in the leaf each
+        query falls into
+        """
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        inner = self._axis[nodes] != -1
+        while inner.any():
+            current = nodes[inner]
+            go_right = queries[inner, self._axis[current]] >= self._split[current]
+            nodes[inner] = self._children[current, go_right.astype(np.int64)]
+            inner = self._axis[nodes] != -1
+
+        leaf_ids = self._leaf_position[nodes]
+        diff = self._leaf_points[leaf_ids] - queries[:, None, :]
+        squared = np.einsum('ijk,ijk->ij', diff, diff)
+        closest = squared.argmin(axis=1)
+        rows = np.arange(len(queries))
+
+        return self._leaf_members[leaf_ids, closest], squared[rows, closest]
+
+    def _improve(self, queries: np.ndarray, best_index: np.ndarray,
+                 best_squared: np.ndarray) -> None:
+        """Replace the best_index and best_squared distance of every query with those of a closer
+        point, if there is one, searching down the tree for all the queries at once
+        """
+        query_ids = np.arange(len(queries))
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        while len(query_ids) > 0:
+            # only the nodes whose box is closer than the best point so far could hold a closer one
+            boxes, points = self._boxes[nodes], queries[query_ids]
+            dx = np.maximum(np.maximum(boxes[:, 0] - points[:, 0], 0), points[:, 0] - boxes[:, 2])
+            dy = np.maximum(np.maximum(boxes[:, 1] - points[:, 1], 0), points[:, 1] - boxes[:, 3])
+            close = dx * dx + dy * dy < best_squared[query_ids]
+            query_ids, nodes = query_ids[close], nodes[close]
+
+            leaf = self._axis[nodes] == -1
+            if leaf.any():
+                leaf_queries, leaf_ids = query_ids[leaf], self._leaf_position[nodes[leaf]]
+                diff = self._leaf_points[leaf_ids] - queries[leaf_queries, None, :]
+                squared = np.einsum('ijk,ijk->ij', diff, diff)
+                closest = squared.argmin(axis=1)
+                closest_squared = squared[np.arange(len(closest)), closest]
+                closest_index = self._leaf_members[leaf_ids, closest]
+
+                # the closest point of the leaves reached by each query
+                order = np.lexsort((closest_squared, leaf_queries))
+                improved_ids, first = np.unique(leaf_queries[order], return_index=True)
+                closest_squared = closest_squared[order][first]
+                closest_index = closest_index[order][first]
+                improved = closest_squared < best_squared[improved_ids]
+                best_squared[improved_ids[improved]] = closest_squared[improved]
+                best_index[improved_ids[improved]] = closest_index[improved]
+
+            query_ids = np.repeat(query_ids[~leaf], 2)
+            nodes = self._children[nodes[~leaf]].reshape(-1)
+
+    def _nearest_index(self, point: np.ndarray) -> int:
+        """Return the index in self._points of the point closest to point"""
+        best_index, best_squared = -1, math.inf
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance_squared(node, point) >= best_squared:
+                continue
+            if self._axis[node] == -1:
+                start, end = self._ranges[node]
+                diff = self._points[start:end] - point
+                squared = np.einsum('ij,ij->i', diff, diff)
+                closest = int(squared.argmin())
+                if squared[closest] < best_squared:
+                    best_index, best_squared = start + closest, float(squared[closest])
+            else:
+                left, right = self._children[node]
+                # visit the side of the split containing the point first
+                if point[self._axis[node]] >= self._split[node]:
+                    stack.extend((left, right))
+                else:
+                    stack.extend((right, left))
+
+        return best_index
+
+    def _box_distance_squared(self, node: int, point: np.ndarray) -> float:
+        """Return the squared distance from point to the bounding box of node"""
+        box = self._boxes[node]
+        dx = max(box[0] - point[0], 0.0, point[0] - box[2])
+        dy = max(box[1] - point[1], 0.0, point[1] - box[3])
+        return dx * dx + dy * dy
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['numpy', 'math'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
@@ -0,0 +1,282 @@
+"""
+CSC111 Project: speedcube.py
+
+Module Description
+==================
+
+Module containing the SpeedCube, which stores the average time it takes to travel along every
+street segment for every hour of the day, day of the week and month of the year. It is the source
+of the edge weights of every time slice (so a slice graph is built from one slice of an array
+instead of a scan over the dataset) and of the time-dependent routing, where the weight of an
+edge depends on the time at which the edge is reached.
+
+Times that have no recordings for a segment are filled in from coarser averages of that segment,
+in order: the same hour and day over every month, the same hour over every day and month, and
+finally every recording of the segment. A mask keeps track of which times were really recorded.
+
+The cube is precomputed once from the transformed dataset and saved in numpy files that are
+memory-mapped when loaded:
+
+    python speedcube.py transformed_final.csv speed_cube
+
+Hours are numbered 0 to 23, days of the week 1 (Monday) to 7 (Sunday) and months 1 to 12, the same
+way they are stored in the dataset.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from graph import Graph
+from guisupporter import I_SPEED, I_START, I_END, I_LENGTH, I_TIME, I_DAY, I_MONTH, \
+    I_START_LAT, I_START_LON, I_END_LAT, I_END_LON, load_data
+
+HOURS = 24
+DAYS = 7
+MONTHS = 12
+
+_TRAVEL_TIMES_FILE = 'travel_times.npy'
+_MASK_FILE = 'mask.npy'
+_SEGMENTS_FILE = 'segments.json'
+
+
+def segment_key(item1: Any, item2: Any) -> tuple[Any, Any]:
+    """Return the key of the (undirected) segment between item1 and item2
+
+    >>> segment_key('Madison', 'Kinzie') == segment_key('Kinzie', 'Madison')
+    True
+    """
+    return (item1, item2) if str(item1) <= str(item2) else (item2, item1)
+
+
+class SpeedCube:
+    """The average travel time along each street segment for every (hour, day, month)
+
+    >>> rows = [('20', 'A', 'B', '2', '17', '4', '3', '0', '0', '0', '1'),
+    ...         ('10', 'A', 'B', '2', '17', '4', '3', '0', '0', '0', '1'),
+    ...         ('30', 'B', 'C', '3', '8', '1', '3', '0', '1', '1', '1')]
+    >>> cube = SpeedCube.from_rows(rows)
+    >>> round(cube.travel_time('B', 'A', 17, 4, 3), 2)  # the mean of 2 / 20 and 2 / 10
+    0.15
+    >>> round(cube.travel_time('B', 'C', 17, 4, 3), 2)  # never recorded at 5PM, so filled in
+    0.1
+    >>> cube.is_recorded('B', 'C', 17, 4, 3)
+    False
+    >>> [round(float(w), 2) for w in cube.slice_weights(17, 4, 3)]
+    [0.15, 0.1]
+    """
+    # Private Instance Attributes:
+    #   - _segments: the key of each segment, in the order of the first axis of _travel_times
+    #   - _index: the position of each segment key in _segments
+    #   - _coordinates: the (latitude, longitude) of every item at the end of a segment
+    #   - _travel_times: the mean travel time of each (segment, hour, day - 1, month - 1), filled
+    #       in from coarser averages when nothing was recorded
+    #   - _mask: whether each entry of _travel_times was recorded
+
+    _segments: list[tuple[Any, Any]]
+    _index: dict[tuple[Any, Any], int]
+    _coordinates: dict[Any, tuple[float, float]]
+    _travel_times: np.ndarray
+    _mask: np.ndarray
+
+    def __init__(self, segments: list[tuple[Any, Any]],
+                 coordinates: dict[Any, tuple[float, float]],
+                 travel_times: np.ndarray, mask: np.ndarray) -> None:
+        """
+        Preconditions:
+            - travel_times.shape == (len(segments), HOURS, DAYS, MONTHS)
+            - mask.shape == travel_times.shape
+        """
+        self._segments = segments
+        self._index = {segment: i for i, segment in enumerate(segments)}
+        self._coordinates = coordinates
+        self._travel_times = travel_times
+        self._mask = mask
+
+    @classmethod
+    def from_rows(cls, data: Iterable[tuple]) -> SpeedCube:
+        """Return the SpeedCube of the rows of data, which are in the guisupporter row format"""
+        segments, index, coordinates = [], {}, {}
+        codes, hours, days, months, times = [], [], [], [], []
+        for row in data:
+            key = segment_key(row[I_START], row[I_END])
+            if key not in index:
+                index[key] = len(segments)
+                segments.append(key)
+            coordinates.setdefault(row[I_START], (float(row[I_START_LAT]),
+                                                  float(row[I_START_LON])))
+            coordinates.setdefault(row[I_END], (float(row[I_END_LAT]), float(row[I_END_LON])))
+            codes.append(index[key])
+            hours.append(int(row[I_TIME]))
+            days.append(int(row[I_DAY]) - 1)
+            months.append(int(row[I_MONTH]) - 1)
+            times.append(float(row[I_LENGTH]) / float(row[I_SPEED]))
+
+        shape = (len(segments), HOURS, DAYS, MONTHS)
+        cells = np.ravel_multi_index((np.array(codes, dtype=np.int64), np.array(hours, dtype=int),
+                                      np.array(days, dtype=int), np.array(months, dtype=int)),
+                                     shape)
+        totals = np.bincount(cells, weights=times, minlength=int(np.prod(shape))).reshape(shape)
+        counts = np.bincount(cells, minlength=int(np.prod(shape))).reshape(shape)
+
+        return cls(segments, coordinates, _fill_from_coarser(totals, counts), counts > 0)
+
+    @classmethod
+    def load(cls, directory: str) -> SpeedCube:
+        """Return the SpeedCube saved in directory. The arrays are memory-mapped, so only the
+        parts of them that are used are read from disk.
+        """
+        with open(os.path.join(directory, _SEGMENTS_FILE), encoding='utf-8') as file:
+            saved = json.load(file)
+
+        segments = [tuple(segment) for segment in saved['segments']]
+        coordinates = {item: tuple(point) for item, point in saved['coordinates']}
+        travel_times = np.load(os.path.join(directory, _TRAVEL_TIMES_FILE), mmap_mode='r')
+        mask = np.load(os.path.join(directory, _MASK_FILE), mmap_mode='r')
+
+        return cls(segments, coordinates, travel_times, mask)
+
+    def save(self, directory: str) -> None:
+        """Save this SpeedCube in directory so that it can be loaded by SpeedCube.load"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, _TRAVEL_TIMES_FILE), np.asarray(self._travel_times))
+        np.save(os.path.join(directory, _MASK_FILE), np.asarray(self._mask))
+        with open(os.path.join(directory, _SEGMENTS_FILE), 'w', encoding='utf-8') as file:
+            json.dump({'segments': self._segments,
+                       'coordinates': list(self._coordinates.items())}, file)
+
+    def __contains__(self, segment: tuple[Any, Any]) -> bool:
+        return segment_key(*segment) in self._index
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def get_segments(self) -> list[tuple[Any, Any]]:
+        """Return the key of every segment in the order of the weights of slice_weights"""
+        return self._segments
+
+    def travel_time(self, item1: Any, item2: Any, hour: int, day: int, month: int) -> float:
+        """Return the average time to travel between item1 and item2 at the given time
+
+        Preconditions:
+            - (item1, item2) in self
+        """
+        i = self._index[segment_key(item1, item2)]
+        return float(self._travel_times[i, hour, day - 1, month - 1])
+
+    def travel_time_at(self, item1: Any, item2: Any, when: datetime) -> float:
+        """Return the average time to travel between item1 and item2 when starting at when
+
+        Preconditions:
+            - (item1, item2) in self
+        """
+        return self.travel_time(item1, item2, when.hour, when.isoweekday(), when.month)
+
+    def is_recorded(self, item1: Any, item2: Any, hour: int, day: int, month: int) -> bool:
+        """Return whether the travel time between item1 and item2 at the given time comes from
+        the dataset rather than being filled in
+
+        Preconditions:
+            - (item1, item2) in self
+        """
+        i = self._index[segment_key(item1, item2)]
+        return bool(self._mask[i, hour, day - 1, month - 1])
+
+    def get_profile(self, item1: Any, item2: Any) -> np.ndarray:
+        """Return the (HOURS, DAYS, MONTHS) array of travel times between item1 and item2
+
+        Preconditions:
+            - (item1, item2) in self
+        """
+        return self._travel_times[self._index[segment_key(item1, item2)]]
+
+    def slice_weights(self, hour: int, day: int, month: int) -> np.ndarray:
+        """Return the travel time of every segment at the given time, in the order of
+        get_segments()
+        """
+        return self._travel_times[:, hour, day - 1, month - 1]
+
+    def slice_mask(self, hour: int, day: int, month: int) -> np.ndarray:
+        """Return whether the travel time of every segment was recorded at the given time"""
+        return self._mask[:, hour, day - 1, month - 1]
+
+    def slice_graph(self, hour: int, day: int, month: int, recorded_only: bool = False) -> Graph:
+        """Return the graph of every segment weighted by its travel time at the given time.
+        If recorded_only is True, only the segments recorded at that time are included.
+        """
+        weights = self.slice_weights(hour, day, month)
+        if recorded_only:
+            included = np.flatnonzero(self.slice_mask(hour, day, month))
+        else:
+            included = range(len(self._segments))
+
+        g = Graph()
+        for i in included:
+            item1, item2 = self._segments[i]
+            for item in (item1, item2):
+                latitude, longitude = self._coordinates[item]
+                g.add_vertex(item, latitude, longitude)
+            # a speed of 1 makes the weight of the edge exactly the travel time
+            g.add_edge(item1, item2, 1, weights[i])
+
+        return g
+
+
+def _fill_from_coarser(totals: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Return the mean travel times totals / counts as float32, with the cells without recordings
+    filled in from the mean over every month, then over every day and month, then over all times
+    """
+    def mean(axes: tuple) -> np.ndarray:
+        """Return the mean over the given axes, nan where there are no recordings"""
+        total, count = totals.sum(axis=axes, keepdims=True), counts.sum(axis=axes, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return total / count
+
+    filled = np.broadcast_to(mean(()), totals.shape).copy()
+    for axes in ((3,), (2, 3), (1, 2, 3)):
+        missing = np.isnan(filled)
+        if not missing.any():
+            break
+        filled[missing] = np.broadcast_to(mean(axes), totals.shape)[missing]
+
+    return filled.astype(np.float32)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Command line entry point: precompute the cube of a dataset and save it"""
+    parser = argparse.ArgumentParser(description='Precompute the travel time cube.')
+    parser.add_argument('data', help='the transformed traffic csv')
+    parser.add_argument('directory', help='the directory to save the cube in')
+    args = parser.parse_args(argv)
+
+    cube = SpeedCube.from_rows(load_data(args.data))
+    cube.save(args.directory)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--check']:
+        # python speedcube.py --check runs the doctests and PythonTA instead of the program
+        import doctest
+        doctest.testmod()
+
+        import python_ta
+        python_ta.check_all(config={
+            'max-line-length': 100,
+            'disable': ['E1136'],
+            'extra-imports': ['argparse', 'json', 'os', 'sys', 'datetime', 'numpy', 'graph',
+                              'guisupporter'],
+            'allowed-io': ['SpeedCube.load', 'SpeedCube.save'],
+            'max-nested-blocks': 5
+        })
+    else:
+        main()
@@ -0,0 +1,123 @@
+"""
+CSC111 Project: syntheticgraph.py
+
+Module Description
+==================
+
+Module for generating synthetic street graphs around Chicago, used to benchmark and check the
+routing code without the dataset. Every generator takes a seed, so the same arguments always give
+the same graph.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+import random
+
+from graph import Graph
+
+# the south west corner of the generated graphs
+ORIGIN = (41.70, -87.80)
+
+# roughly the length of a chicago block in degrees
+BLOCK_DEGREES = 0.005
+
+# the length in miles of a block
+BLOCK_MILES = 0.35
+
+MIN_SPEED = 10
+MAX_SPEED = 40
+
+
+def corridor_grid(rows: int, columns: int, checkpoints: int = 3, seed: int = 0) -> Graph:
+    """Return a grid of rows by columns intersections, where every block between two neighbouring
+    intersections is a corridor passing through checkpoints checkpoints, each with exactly two
+    neighbours. Intersections are named 'I<row>_<column>' and checkpoints 'C<row>_<column><N or
+    E><number>' after the intersection at the south or west end of their block.
+
+    >>> g = corridor_grid(2, 2, checkpoints=1)
+    >>> len(g.get_all_vertices())
+    8
+    >>> sorted(v.item for v in g.get_neighbours('C0_0E0'))
+    ['I0_0', 'I0_1']
+    """
+    rng = random.Random(seed)
+    g = Graph()
+    for row in range(rows):
+        for column in range(columns):
+            g.add_vertex(f'I{row}_{column}', ORIGIN[0] + row * BLOCK_DEGREES,
+                         ORIGIN[1] + column * BLOCK_DEGREES)
+
+    for row in range(rows):
+        for column in range(columns):
+            if row + 1 < rows:
+                _add_corridor(g, rng, (row, column), (row + 1, column), 'N', checkpoints)
+            if column + 1 < columns:
+                _add_corridor(g, rng, (row, column), (row, column + 1), 'E', checkpoints)
+
+    return g
+
+
+def random_graph(vertices: int, edges: int, seed: int = 0) -> Graph:
+    """Return a connected graph with the given number of vertices, named 'V<number>', and at most
+    the given number of edges (at least vertices - 1) between random vertices with random speeds
+
+    >>> g = random_graph(10, 15, seed=1)
+    >>> len(g.get_all_vertices())
+    10
+    >>> g.get_all_connected_components({'V0'}) == g.get_all_vertices()
+    True
+    """
+    rng = random.Random(seed)
+    g = Graph()
+    for i in range(vertices):
+        g.add_vertex(f'V{i}', ORIGIN[0] + rng.random() * 0.2, ORIGIN[1] + rng.random() * 0.2)
+
+    # a random spanning tree keeps the graph connected
+    for i in range(1, vertices):
+        _add_random_edge(g, rng, f'V{i}', f'V{rng.randrange(i)}')
+
+    for _ in range(edges - (vertices - 1)):
+        i, j = rng.randrange(vertices), rng.randrange(vertices)
+        if i != j:
+            _add_random_edge(g, rng, f'V{i}', f'V{j}')
+
+    return g
+
+
+def _add_corridor(g: Graph, rng: random.Random, start: tuple[int, int], end: tuple[int, int],
+                  direction: str, checkpoints: int) -> None:
+    """Add the checkpoints of the block from the intersection start to the intersection end,
+    along with the edges joining them in a row
+    """
+    previous = f'I{start[0]}_{start[1]}'
+    for k in range(checkpoints):
+        fraction = (k + 1) / (checkpoints + 1)
+        item = f'C{start[0]}_{start[1]}{direction}{k}'
+        g.add_vertex(item, ORIGIN[0] + (start[0] + (end[0] - start[0]) * fraction) * BLOCK_DEGREES,
+                     ORIGIN[1] + (start[1] + (end[1] - start[1]) * fraction) * BLOCK_DEGREES)
+        g.add_edge(previous, item, rng.uniform(MIN_SPEED, MAX_SPEED),
+                   BLOCK_MILES / (checkpoints + 1))
+        previous = item
+
+    g.add_edge(previous, f'I{end[0]}_{end[1]}', rng.uniform(MIN_SPEED, MAX_SPEED),
+               BLOCK_MILES / (checkpoints + 1))
+
+
+def _add_random_edge(g: Graph, rng: random.Random, item1: str, item2: str) -> None:
+    """Add an edge between item1 and item2 of a random length and speed"""
+    g.add_edge(item1, item2, rng.uniform(MIN_SPEED, MAX_SPEED), rng.uniform(0.1, 1.0))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['random', 'graph'],
+        'allowed-io': [],
+        'max-nested-blocks': 5
+    })
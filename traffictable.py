@@ -0,0 +1,278 @@
+"""
+CSC111 Project: traffictable.py
+
+Module Description
+==================
+
+Module containing the TrafficTable, a compact replacement for the list of csv row tuples used by
+the gui. Every column of the guisupporter row format is stored as one typed numpy array: times, days
+and months as int8, speeds, lengths and coordinates as float64 (so edge weights match the ones
+computed from the csv exactly), and the start and end streets as int32 codes into a single
+vocabulary of street names, so that every street name is only stored once.
+
+A TrafficTable still behaves like the list of rows it replaces (len, indexing and iteration give
+row tuples in the guisupporter format), so the code reading rows keeps working, while code that
+knows about it can work on whole columns at once.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2021 Aryaman Modi, Craig Katsube, Garv Sood, Kaartik Issar
+"""
+from __future__ import annotations
+
+import csv
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from guisupporter import DATA_HEADER, I_START, I_END
+
+# the numpy type of each column of DATA_HEADER, street columns are stored as codes
+COLUMN_TYPES = (np.float64, np.int32, np.int32, np.float64, np.int8, np.int8, np.int8,
+                np.float64, np.float64, np.float64, np.float64)
+
+STREET_COLUMNS = (I_START, I_END)
+
+# the array module type codes matching COLUMN_TYPES, used while reading the csv
+_ARRAY_CODES = ('d', 'i', 'i', 'd', 'b', 'b', 'b', 'd', 'd', 'd', 'd')
+
+
+class TrafficTable(Sequence):
+    """A table of traffic recordings in the guisupporter row format stored column by column
+
+    >>> table = TrafficTable.from_rows([('25', 'Madison', 'Kinzie', '0.5', '17', '4', '3',
+    ...                                  '41.88', '-87.63', '41.89', '-87.63')])
+    >>> table[0][:7]
+    (25.0, 'Madison', 'Kinzie', 0.5, 17, 4, 3)
+    >>> table.column('day')
+    array([4], dtype=int8)
+    >>> table.get_streets()
+    ['Madison', 'Kinzie']
+    """
+    # Private Instance Attributes:
+    #   - _streets: the vocabulary of street names, indexed by their code
+    #   - _columns: the array of every column of DATA_HEADER, in order
+    #   - _codes: the code of every street name, built the first time a code is looked up
+
+    _streets: list[str]
+    _columns: tuple[np.ndarray, ...]
+    _codes: Optional[dict[Any, int]]
+
+    def __init__(self, streets: list[str], columns: tuple[np.ndarray, ...]) -> None:
+        """
+        Preconditions:
+            - len(columns) == len(DATA_HEADER)
+            - all(len(column) == len(columns[0]) for column in columns)
+        """
+        self._streets = streets
+        self._columns = columns
+        self._codes = None
+
+    @classmethod
+    def from_csv(cls, traffic_file: str) -> TrafficTable:
+        """Return the table of the transformed csv, selecting the same columns as
+        guisupporter.load_data without keeping the rows as strings
+        """
+        with open(traffic_file, encoding='utf-8') as file:
+            csv_reader = csv.reader(file)
+            next(csv_reader)
+            return cls.from_rows((row[3],) + tuple(row[6:9]) + tuple(row[10:17])
+                                 for row in csv_reader)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> TrafficTable:
+        """Return the table of the rows, which are in the guisupporter row format"""
+        streets, codes = [], {}
+        buffers = [array(code) for code in _ARRAY_CODES]
+        for row in rows:
+            for col, value in enumerate(row):
+                if col in STREET_COLUMNS:
+                    if value not in codes:
+                        codes[value] = len(streets)
+                        streets.append(value)
+                    buffers[col].append(codes[value])
+                elif _ARRAY_CODES[col] == 'b':
+                    buffers[col].append(int(value))
+                else:
+                    buffers[col].append(float(value))
+
+        columns = tuple(np.frombuffer(buffer, dtype=dtype) if len(buffer) > 0
+                        else np.zeros(0, dtype=dtype)
+                        for buffer, dtype in zip(buffers, COLUMN_TYPES))
+        return cls(streets, columns)
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[tuple, TrafficTable]:
+        """Return the row at index, or a TrafficTable of the rows in the slice"""
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+
+        return tuple(self._streets[column[index]] if col in STREET_COLUMNS
+                     else column[index].item() for col, column in enumerate(self._columns))
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Iterate through the rows of the table"""
+        columns = [[self._streets[code] for code in column.tolist()] if col in STREET_COLUMNS
+                   else column.tolist() for col, column in enumerate(self._columns)]
+        return zip(*columns)
+
+    def column(self, header: str) -> np.ndarray:
+        """Return the array of the column with the given header. Street columns are returned as
+        codes, see get_streets.
+
+        Preconditions:
+            - header in DATA_HEADER
+        """
+        return self._columns[DATA_HEADER.index(header)]
+
+    def values(self, header: str) -> list:
+        """Return the values in the column with the given header, with street names decoded"""
+        col = DATA_HEADER.index(header)
+        if col in STREET_COLUMNS:
+            return [self._streets[code] for code in self._columns[col].tolist()]
+        return self._columns[col].tolist()
+
+    def distinct(self, header: str) -> list:
+        """Return the distinct values in the column with the given header, found with np.unique
+        on the column's array, with street names decoded
+
+        >>> rows = [('25', 'A', 'B', '1', '17', '4', '3', '0', '0', '0', '1'),
+        ...         ('30', 'B', 'C', '1', '8', '4', '3', '0', '1', '1', '1')]
+        >>> table = TrafficTable.from_rows(rows)
+        >>> table.distinct('time'), table.distinct('day'), table.distinct('start point')
+        ([8, 17], [4], ['A', 'B'])
+        """
+        col = DATA_HEADER.index(header)
+        unique = np.unique(self._columns[col]).tolist()
+        if col in STREET_COLUMNS:
+            return [self._streets[code] for code in unique]
+        return unique
+
+    def get_streets(self) -> list[str]:
+        """Return the vocabulary of street names, where the name with code i is at index i"""
+        return self._streets
+
+    def street_code(self, street: Any) -> int:
+        """Return the code of street, or -1 if it is not a street of this table"""
+        if self._codes is None:
+            self._codes = {name: code for code, name in enumerate(self._streets)}
+        return self._codes.get(street, -1)
+
+    def selection_mask(self, selections: dict[str, list]) -> np.ndarray:
+        """Return whether each row has one of the selected values in every column of selections.
+        Selected values may be given as strings, the way the gui menus hold them. Empty strings
+        are ignored, so a column whose selected values are all empty is not restricted.
+
+        >>> rows = [('25', 'A', 'B', '1', '17', '4', '3', '0', '0', '0', '1'),
+        ...         ('30', 'B', 'C', '1', '8', '4', '3', '0', '1', '1', '1')]
+        >>> table = TrafficTable.from_rows(rows)
+        >>> table.selection_mask({'time': ['17', 8], 'end point': ['C'], 'month': ['']})
+        array([False,  True])
+
+        Preconditions:
+            - all(header in DATA_HEADER for header in selections)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for header, selection in selections.items():
+            values = [value for value in selection if value != '']
+            if values:
+                mask &= np.isin(self.column(header), self._encode(header, values))
+
+        return mask
+
+    def select(self, selections: dict[str, list]) -> np.ndarray:
+        """Return the indices of the rows matching selections, as described in selection_mask"""
+        return np.flatnonzero(self.selection_mask(selections))
+
+    def connected_mask(self, streets: Iterable) -> np.ndarray:
+        """Return whether each row is connected to one of streets by the rows of this table,
+        taken as edges between their start and end streets. No row is if one of streets is not a
+        street of any row, like Graph.get_all_connected_components raising a ValueError.
+
+        The connected components are found on the street code columns: every street starts out
+        labelled with its own code, then repeatedly takes the smallest label of the streets it
+        shares a row with, and the label of its label, until no label changes.
+
+        >>> rows = [('25', 'A', 'B', '1', '17', '4', '3', '0', '0', '0', '1'),
+        ...         ('30', 'C', 'B', '1', '17', '4', '3', '0', '1', '1', '1'),
+        ...         ('30', 'D', 'E', '1', '17', '4', '3', '0', '1', '1', '1')]
+        >>> table = TrafficTable.from_rows(rows)
+        >>> table.connected_mask(['A']), table.connected_mask(['E'])
+        (array([ True,  True, False]), array([False, False,  True]))
+        >>> table.take([0]).connected_mask(['A', 'C'])
+        array([False])
+        """
+        starts, ends = self._columns[I_START], self._columns[I_END]
+        codes = np.array([self.street_code(street) for street in streets], dtype=np.int64)
+        # the extra last entry stays False for the code -1 of unknown streets
+        present = np.zeros(len(self._streets) + 1, dtype=bool)
+        present[starts] = True
+        present[ends] = True
+        if not present[codes].all():
+            return np.zeros(len(self), dtype=bool)
+
+        labels = np.arange(len(self._streets))
+        while True:
+            smallest = np.minimum(labels[starts], labels[ends])
+            updated = labels.copy()
+            np.minimum.at(updated, starts, smallest)
+            np.minimum.at(updated, ends, smallest)
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+
+        return np.isin(labels[starts], labels[codes])
+
+    def take(self, indices: Any) -> TrafficTable:
+        """Return a table of the rows at the given indices, sharing the street vocabulary"""
+        return TrafficTable(self._streets, tuple(column[indices] for column in self._columns))
+
+    def nbytes(self) -> int:
+        """Return the number of bytes used by the columns of this table"""
+        return sum(column.nbytes for column in self._columns)
+
+    def _encode(self, header: str, values: list) -> np.ndarray:
+        """Return values converted to the type stored in the column with the given header.
+        Street names are converted to their codes, where unknown streets get the code -1.
+        Raise a ValueError if a value of an integer column is not an integer it can hold.
+
+        >>> table = TrafficTable.from_rows([])
+        >>> table._encode('time', ['17', 8.0])
+        array([17,  8], dtype=int8)
+        >>> table._encode('time', ['17.5'])
+        Traceback (most recent call last):
+        ...
+        ValueError: 17.5 is not a valid time
+        """
+        col = DATA_HEADER.index(header)
+        if col in STREET_COLUMNS:
+            return np.array([self.street_code(value) for value in values], dtype=np.int32)
+
+        numbers = np.array([float(value) for value in values])
+        dtype = np.dtype(COLUMN_TYPES[col])
+        if dtype.kind == 'i':
+            limits = np.iinfo(dtype)
+            for value, number in zip(values, numbers):
+                if not (np.isfinite(number) and number == np.round(number)
+                        and limits.min <= number <= limits.max):
+                    raise ValueError(f'{value} is not a valid {header}')
+        return numbers.astype(dtype)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'max-line-length': 100,
+        'disable': ['E1136'],
+        'extra-imports': ['numpy', 'csv', 'array', 'guisupporter'],
+        'allowed-io': ['TrafficTable.from_csv'],
+        'max-nested-blocks': 5
+    })
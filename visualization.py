@@ -7,20 +7,41 @@ Module Description
 One half of the visualisation part of project. Plotting the latitudes and longitudes of the path on
 the map of Chicago city.
 Includes a helper function that converts list[latitudes] and list[longitudes] to a single list.
+
+The map image is only read from disk once, every route is drawn with a single scatter and a single
+LineCollection, and RouteRenderer.render_batch draws many routes off-screen (Agg) to png files.
 Copyright and Usage Information
 
 ===============================
 
 This file is Copyright (c) 2021 Kaartik Issar, Aryaman Modi, Craig Katsube and Garv Sood.
 """
-
-
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
+import math
+import os
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import matplotlib.image
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 from graph import Graph
 
 # Graph = __import__("Graph & Node").Graph
 # load_graph = __import__("Graph & Node").load_graph
 
+MAP_IMAGE = 'map1.png'
+
+# endpoints obtained from computation in datatransformation.py
+MAP_BOX = (41.65900629, 42.0128288601, -87.535052, -87.8367650119)
+
+# the number of labels drawn when the whole map is shown, this grows as the view is zoomed in
+MAX_LABELS = 15
+
 
 def convert_to_tuple_points(lst1: list, lst2: list) -> list:
     """
@@ -37,27 +58,153 @@ def convert_to_tuple_points(lst1: list, lst2: list) -> list:
     return new_lst
 
 
+@lru_cache(maxsize=None)
+def load_basemap(image_file: str = MAP_IMAGE) -> np.ndarray:
+    """Return the pixels of the map image, reading the file only the first time it is asked for
+    """
+    return matplotlib.image.imread(image_file)
+
+
 def visualise(lst: list, g: Graph) -> None:
     """
     Give a visual representation of the given path on the map of Chicago City.
     """
-    map_img = plt.imread('map1.png')
+    import matplotlib.pyplot as plt
 
-    # endpoints obtained from computation in datatransformation.py
-    box = (41.65900629, 42.0128288601, -87.535052, -87.8367650119)
     _, ax = plt.subplots(figsize=(8, 7))
+    RouteRenderer(g).draw(ax, lst)
+
 
-    lst1, lst2 = g.get_all_lat_long(lst)
-    lst_lat_long = convert_to_tuple_points(lst1, lst2)
+def thin_labels(n: int, zoom: float, max_labels: int = MAX_LABELS) -> list[int]:
+    """Return the indices of the n points of a path that should be labelled when the view is
+    zoomed in by a factor of zoom. The first and last points are always labelled.
+
+    >>> thin_labels(5, 1.0)
+    [0, 1, 2, 3, 4]
+    >>> thin_labels(100, 1.0, max_labels=10)
+    [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 99]
+    >>> thin_labels(100, 2.0, max_labels=10)[:4]
+    [0, 5, 10, 15]
+    """
+    if n == 0:
+        return []
 
-    for point in lst_lat_long:
-        ax.scatter(float(point[0]), float(point[1]), zorder=10, alpha=0.8, c='black', s=30)
-    ax.set_title('Plotting a path on Chicago map')
-    ax.set_xlim(41.65900629, 42.0128288601)
-    ax.set_ylim(-87.535052, -87.8367650119)
-    for i, txt in enumerate(lst):
-        ax.annotate(txt + ' ,' + str(i + 1), (lst_lat_long[i][0], lst_lat_long[i][1]))
-    ax.imshow(map_img, zorder=0, extent=box, aspect='equal')
+    step = max(1, math.ceil(n / (max_labels * max(zoom, 1.0))))
+    indices = list(range(0, n, step))
+    if indices[-1] != n - 1:
+        indices.append(n - 1)
+    return indices
+
+
+class RouteRenderer:
+    """Draws paths of a graph on top of the map of Chicago City
+    """
+    # Private Attributes:
+    #   - _graph: the graph containing the coordinates of the path items
+    #   - _image_file: the map image drawn underneath the routes
+    #   - _box: the (left, right, bottom, top) extent of the map image
+    #   - _max_labels: the number of labels to draw when the whole map is visible
+
+    _graph: Graph
+    _image_file: str
+    _box: tuple[float, float, float, float]
+    _max_labels: int
+
+    def __init__(self, g: Graph, image_file: str = MAP_IMAGE,
+                 box: tuple[float, float, float, float] = MAP_BOX,
+                 max_labels: int = MAX_LABELS) -> None:
+        self._graph = g
+        self._image_file = image_file
+        self._box = box
+        self._max_labels = max_labels
+
+    def draw(self, ax: Axes, path: list) -> None:
+        """Draw the path on ax. Labels are thinned again every time the view is zoomed."""
+        scatter, lines = self._setup_axes(ax)
+
+        labels = []
+        points = self._update_artists(ax, path, scatter, lines, labels)
+
+        def on_zoom(_: Axes) -> None:
+            """Redraw the labels of the points according to the new view"""
+            self._relabel(ax, path, points, labels)
+
+        ax.callbacks.connect('xlim_changed', on_zoom)
+        ax.callbacks.connect('ylim_changed', on_zoom)
+
+    def render_to_file(self, path: list, filename: str, dpi: int = 100) -> None:
+        """Draw the path off-screen and save it as an image to filename"""
+        self.render_batch([path], [filename], dpi)
+
+    def render_batch(self, paths: list[list], filenames: list[str], dpi: int = 100) -> None:
+        """Draw each path off-screen and save it to its corresponding filename.
+
+        One figure is reused for all the paths, so the map image is only drawn once.
+
+        Preconditions:
+            - len(paths) == len(filenames)
+        """
+        fig = Figure(figsize=(8, 7))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        scatter, lines = self._setup_axes(ax)
+
+        labels = []
+        for path, filename in zip(paths, filenames):
+            self._update_artists(ax, path, scatter, lines, labels)
+
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fig.savefig(filename, dpi=dpi)
+
+    def _setup_axes(self, ax: Axes) -> tuple[Any, LineCollection]:
+        """Draw the map on ax and return the (empty) scatter and line artists used for the routes
+        """
+        ax.set_title('Plotting a path on Chicago map')
+        ax.set_xlim(self._box[0], self._box[1])
+        ax.set_ylim(self._box[2], self._box[3])
+        ax.imshow(load_basemap(self._image_file), zorder=0, extent=self._box, aspect='equal')
+
+        scatter = ax.scatter([], [], zorder=10, alpha=0.8, c='black', s=30)
+        lines = LineCollection([], zorder=5, colors='#6495ED', linewidths=2.0)
+        ax.add_collection(lines)
+
+        return scatter, lines
+
+    def _update_artists(self, ax: Axes, path: list, scatter: Any, lines: LineCollection,
+                        labels: list) -> np.ndarray:
+        """Set the points and the lines to the ones of path, relabel them and return the
+        (latitude, longitude) array of the path
+        """
+        lats, longs = self._graph.get_all_lat_long(path)
+        points = np.column_stack((np.asarray(lats, dtype=float), np.asarray(longs, dtype=float)))
+
+        scatter.set_offsets(points.reshape(-1, 2))
+        lines.set_segments(np.stack((points[:-1], points[1:]), axis=1) if len(points) > 1 else [])
+        self._relabel(ax, path, points, labels)
+
+        return points
+
+    def _relabel(self, ax: Axes, path: list, points: np.ndarray, labels: list) -> None:
+        """Replace the labels in labels with the labels of the visible points of path that are
+        kept after thinning by the current zoom
+        """
+        for label in labels:
+            label.remove()
+        labels.clear()
+
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        visible = np.flatnonzero((points[:, 0] >= x0) & (points[:, 0] <= x1)
+                                 & (points[:, 1] >= y0) & (points[:, 1] <= y1))
+
+        full_area = abs((self._box[1] - self._box[0]) * (self._box[3] - self._box[2]))
+        view_area = max((x1 - x0) * (y1 - y0), 1e-12)
+        zoom = math.sqrt(full_area / view_area)
+
+        for j in thin_labels(len(visible), zoom, self._max_labels):
+            i = visible[j]
+            labels.append(ax.annotate(str(path[i]) + ' ,' + str(i + 1), tuple(points[i])))
 
 
 if __name__ == '__main__':
@@ -68,7 +215,9 @@ if __name__ == '__main__':
     python_ta.check_all(config={
         'max-line-length': 100,
         'disable': ['E1136'],
-        'extra-imports': ['matplotlib.pyplot', 'graph'],
+        'extra-imports': ['matplotlib.pyplot', 'matplotlib.image', 'matplotlib.axes',
+                          'matplotlib.backends.backend_agg', 'matplotlib.collections',
+                          'matplotlib.figure', 'numpy', 'graph', 'math', 'os', 'functools'],
         'allowed-io': [],
         'max-nested-blocks': 5
 